@@ -3,71 +3,352 @@
 Script para converter imagens de jogos para PNG
 Converte JPG, JPEG, JFIF, WEBP para PNG otimizado
 
+Além da capa em tamanho original (<jogo>-cover.png), cada imagem gera, na
+mesma decodificação, variantes em larguras menores e em WebP (e AVIF, se
+pedido): <jogo>-cover-640w.webp, <jogo>-cover.webp, ... O arquivo
+imagens-convertidas/covers.json lista, por jogo, as variantes com
+dimensões e tamanho em bytes, para o launcher e a loja escolherem o menor
+arquivo adequado.
+
+Conversão incremental: o manifesto imagens-convertidas/.convert-manifest.json
+guarda, por imagem, o hash SHA-256 da original, as configurações de
+conversão e o hash da capa gerada. Imagens cujas originais e configurações
+não mudaram (e cuja capa continua no disco) são puladas, e capas de
+originais removidas são apagadas.
+
 Uso:
-    python convert-images.py
+    python convert-images.py            # usa todos os núcleos, só o que mudou
+    python convert-images.py --jobs 1   # sequencial
+    python convert-images.py --full     # reconverte tudo
+    python convert-images.py --widths 960,480 --formats png,webp,avif
 
 Dependências:
     pip install Pillow
 """
 
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
 from pathlib import Path
+import argparse
+import hashlib
+import io
+import json
+import os
 import sys
 
 # Configurações
 INPUT_DIR = Path("imagens-originais/")
 OUTPUT_DIR = Path("imagens-convertidas/")
 SUPPORTED_FORMATS = ['.jpg', '.jpeg', '.jfif', '.webp', '.png']
+MANIFEST_NAME = ".convert-manifest.json"
+COVERS_MANIFEST_NAME = "covers.json"
+
+# Variantes geradas por padrão (além do tamanho original)
+DEFAULT_WIDTHS = [640, 320]
+DEFAULT_FORMATS = ['png', 'webp']
+
+# Parâmetros de cada formato de saída
+OUTPUT_FORMATS = {
+    'png': {'format': 'PNG', 'extension': 'png', 'options': {'optimize': True, 'compress_level': 9}},
+    'webp': {'format': 'WEBP', 'extension': 'webp', 'options': {'quality': 82, 'method': 6}},
+    'avif': {'format': 'AVIF', 'extension': 'avif', 'options': {'quality': 60, 'speed': 6}},
+}
+
+def build_settings(widths: list, formats: list) -> dict:
+    """Configurações que afetam os arquivos gerados (mudá-las invalida o cache)"""
+    return {
+        'version': 2,
+        'background': [255, 255, 255],
+        'widths': sorted(set(widths), reverse=True),
+        'formats': {name: OUTPUT_FORMATS[name]['options'] for name in formats},
+    }
+
+def file_hash(path: Path) -> str:
+    """SHA-256 do conteúdo do arquivo"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(output_dir: Path) -> dict:
+    """Manifesto da última conversão ({} se não existe ou está corrompido)"""
+    try:
+        manifest = json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('files', {}) if isinstance(manifest, dict) else {}
+
+def save_manifest(output_dir: Path, files: dict):
+    """Grava o manifesto de forma atômica"""
+    path = output_dir / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({'files': files}, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+def entry_outputs(entry: dict) -> list:
+    """Arquivos gerados registrados em uma entrada do manifesto"""
+    if 'variants' in entry:
+        return [variant['file'] for variant in entry['variants']]
+    return [entry['output']] if entry.get('output') else []
+
+def is_up_to_date(entry: dict, source_hash: str, settings: dict, output_dir: Path) -> bool:
+    """True se as variantes registradas no manifesto ainda correspondem à original"""
+    if not entry or entry.get('source_hash') != source_hash or entry.get('settings') != settings:
+        return False
+    return all(
+        (output_dir / variant['file']).is_file() and file_hash(output_dir / variant['file']) == variant['hash']
+        for variant in entry['variants']
+    )
+
+def save_covers_manifest(output_dir: Path, files: dict):
+    """Grava covers.json (variantes de cada capa) a partir do manifesto de conversão"""
+    covers = {}
+    for source, entry in sorted(files.items()):
+        if 'variants' not in entry:
+            continue
+        covers[Path(source).stem] = {
+            'source': source,
+            'width': entry['width'],
+            'height': entry['height'],
+            'variants': [
+                {key: variant[key] for key in ('file', 'format', 'width', 'height', 'bytes')}
+                for variant in entry['variants']
+            ],
+        }
+
+    path = output_dir / COVERS_MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({'covers': covers}, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+def find_images(input_dir: Path) -> tuple:
+    """
+    Lista as imagens suportadas do diretório, uma vez cada
+
+    A extensão é comparada sem diferenciar maiúsculas, então em sistemas de
+    arquivos case-insensitive a mesma imagem não aparece duas vezes. Se duas
+    imagens gerariam a mesma capa (ex.: jogo.jpg e Jogo.png, já que o nome
+    também é comparado sem diferenciar maiúsculas), vale a primeira em ordem
+    alfabética.
+
+    Returns:
+        (imagens em ordem alfabética, imagens ignoradas por nome repetido)
+    """
+    images = []
+    skipped = []
+    stems = set()
+
+    for path in sorted(input_dir.iterdir()):
+        if not path.is_file() or path.suffix.lower() not in SUPPORTED_FORMATS:
+            continue
+        stem = path.stem.casefold()
+        if stem in stems:
+            skipped.append(path)
+            continue
+        stems.add(stem)
+        images.append(path)
+
+    return images, skipped
+
+def encode_variants(input_path: Path, settings: dict) -> tuple:
+    """
+    Decodifica a imagem uma vez e codifica todas as variantes
+
+    Returns:
+        (largura, altura, variantes) com cada variante como dicionário
+        {'file', 'format', 'width', 'height', 'data'}
+    """
+    img = Image.open(input_path)
+
+    # Converter para RGB se necessário (remover transparência)
+    if img.mode in ['RGBA', 'P', 'LA']:
+        # Criar fundo branco
+        background = Image.new('RGB', img.size, tuple(settings['background']))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ['RGBA', 'LA'] else None)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Tamanho original + larguras menores que ele (sem ampliar)
+    sizes = [(img.width, None)] + [(width, width) for width in settings['widths'] if width < img.width]
+
+    variants = []
+    for width, label in sizes:
+        if label is None:
+            resized = img
+        else:
+            height = max(1, round(img.height * width / img.width))
+            resized = img.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
 
-def convert_image(input_path: Path, output_dir: Path) -> bool:
+        suffix = f"-{label}w" if label else ""
+        for name, options in settings['formats'].items():
+            output_format = OUTPUT_FORMATS[name]
+            buffer = io.BytesIO()
+            resized.save(buffer, output_format['format'], **options)
+            variants.append({
+                'file': f"{input_path.stem}-cover{suffix}.{output_format['extension']}",
+                'format': name,
+                'width': resized.width,
+                'height': resized.height,
+                'data': buffer.getvalue(),
+            })
+
+    return img.width, img.height, variants
+
+def convert_image(input_path: Path, output_dir: Path, settings: dict) -> dict:
     """
-    Converte uma imagem para PNG otimizado
+    Converte uma imagem para PNG otimizado e gera as variantes
+
+    Roda nos processos do pool, então não imprime nada: o resultado é
+    impresso pelo processo principal, na ordem das imagens.
 
     Args:
         input_path: Caminho da imagem original
         output_dir: Diretório de saída
+        settings: Configurações de conversão (ver build_settings)
 
     Returns:
-        True se converteu com sucesso, False caso contrário
+        Dicionário com dimensões, variantes geradas (sem os bytes) e erro
+        (None se converteu)
     """
+    result = {'input': input_path, 'error': None}
+
     try:
-        # Abrir imagem
-        img = Image.open(input_path)
+        width, height, variants = encode_variants(input_path, settings)
 
-        # Converter para RGB se necessário (remover transparência)
-        if img.mode in ['RGBA', 'P', 'LA']:
-            # Criar fundo branco
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ['RGBA', 'LA'] else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
+        for variant in variants:
+            data = variant.pop('data')
+            (output_dir / variant['file']).write_bytes(data)
+            variant['bytes'] = len(data)
+            variant['hash'] = hashlib.sha256(data).hexdigest()
 
-        # Nome do arquivo de saída
-        output_name = f"{input_path.stem}-cover.png"
-        output_path = output_dir / output_name
+        result['input_size'] = input_path.stat().st_size
+        result['width'] = width
+        result['height'] = height
+        result['variants'] = variants
 
-        # Salvar como PNG otimizado
-        img.save(output_path, 'PNG', optimize=True, compress_level=9)
+    except Exception as e:
+        result['error'] = str(e)
 
-        # Informações sobre a conversão
-        input_size = input_path.stat().st_size / 1024  # KB
-        output_size = output_path.stat().st_size / 1024  # KB
-        reduction = ((input_size - output_size) / input_size * 100) if input_size > 0 else 0
+    return result
 
-        print(f"✅ {input_path.name} → {output_name}")
-        print(f"   Tamanho: {input_size:.1f} KB → {output_size:.1f} KB ({reduction:+.1f}%)")
+def print_result(result: dict, index: int, total: int):
+    """Imprime o resultado de uma conversão"""
+    name = result['input'].name
+    if result['error'] is not None:
+        print(f"[{index}/{total}] ❌ Erro ao converter {name}: {result['error']}")
+        return
 
-        return True
+    variants = result['variants']
+    print(f"[{index}/{total}] ✅ {name} → {variants[0]['file']} (+{len(variants) - 1} variantes)")
+    print(f"   Original: {result['input_size'] / 1024:.1f} KB")
 
-    except Exception as e:
-        print(f"❌ Erro ao converter {input_path.name}: {e}")
-        return False
+    by_width = {}
+    for variant in variants:
+        by_width.setdefault(variant['width'], []).append(f"{variant['format']} {variant['bytes'] / 1024:.1f} KB")
+    for width, sizes in by_width.items():
+        print(f"   {width}px: {', '.join(sizes)}")
+
+def convert_all(images: list, output_dir: Path, settings: dict, jobs: int):
+    """
+    Converte as imagens em um pool de processos (a codificação PNG nível 9
+    é limitada por CPU) e entrega os resultados na ordem das imagens
+    """
+    if jobs <= 1 or len(images) <= 1:
+        for img_path in images:
+            yield convert_image(img_path, output_dir, settings)
+        return
+
+    count = len(images)
+    with ProcessPoolExecutor(max_workers=min(jobs, count)) as executor:
+        yield from executor.map(convert_image, images, [output_dir] * count, [settings] * count)
+
+def parse_list(value: str) -> list:
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+def add_conversion_arguments(parser: argparse.ArgumentParser):
+    """Opções de conversão (compartilhadas com publish-covers.py)"""
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Processos de conversão em paralelo (padrão: número de CPUs)')
+    parser.add_argument('--full', action='store_true',
+                        help='Reconverter todas as imagens, ignorando o manifesto')
+    parser.add_argument('--widths', default=','.join(str(width) for width in DEFAULT_WIDTHS),
+                        help='Larguras das variantes menores, em pixels (padrão: %(default)s; vazio = só original)')
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS),
+                        help='Formatos gerados: png, webp, avif (padrão: %(default)s)')
+
+def validate_conversion_args(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """Converte --widths/--formats em listas, encerrando com erro se inválidos"""
+    try:
+        args.widths = [int(width) for width in parse_list(args.widths)]
+    except ValueError:
+        parser.error(f"--widths inválido: {args.widths}")
+    if any(width <= 0 for width in args.widths):
+        parser.error("--widths deve conter larguras positivas")
+
+    args.formats = parse_list(args.formats)
+    unknown = [name for name in args.formats if name not in OUTPUT_FORMATS]
+    if unknown or not args.formats:
+        parser.error(f"--formats inválido: {', '.join(unknown) or 'vazio'} (use {', '.join(OUTPUT_FORMATS)})")
+    if 'avif' in args.formats and not features.check('avif'):
+        parser.error("AVIF não suportado por esta instalação do Pillow (atualize o Pillow >= 11.2)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Converte capas de jogos para PNG otimizado')
+    add_conversion_arguments(parser)
+    args = parser.parse_args()
+    validate_conversion_args(parser, args)
+    return args
+
+def remove_missing_sources(manifest: dict, images: list, output_dir: Path) -> int:
+    """
+    Apaga as capas de originais que não existem mais e as tira do manifesto
+
+    Returns:
+        Número de arquivos apagados
+    """
+    current_names = {path.name for path in images}
+    current_stems = {path.stem for path in images}
+    removed = 0
+
+    for name in [name for name in manifest if name not in current_names]:
+        entry = manifest.pop(name)
+        if Path(name).stem in current_stems:
+            continue  # Mesmo nome de capa de outra original; os arquivos agora são dela
+        for output in entry_outputs(entry):
+            if (output_dir / output).is_file():
+                (output_dir / output).unlink()
+                removed += 1
+        print(f"🗑️  Removidas as capas de {name} (original não existe mais)")
+
+    return removed
+
+def remove_stale_variants(previous_entry: dict, variants: list, output_dir: Path) -> int:
+    """Apaga variantes que as configurações atuais não geram mais"""
+    generated = {variant['file'] for variant in variants}
+    removed = 0
+    for output in entry_outputs(previous_entry or {}):
+        if output not in generated and (output_dir / output).is_file():
+            (output_dir / output).unlink()
+            removed += 1
+    return removed
+
+def manifest_entry(source_hash: str, settings: dict, width: int, height: int, variants: list) -> dict:
+    return {
+        'source_hash': source_hash,
+        'settings': settings,
+        'width': width,
+        'height': height,
+        'variants': variants,
+    }
 
 def main():
     """Função principal"""
+    args = parse_args()
+
     print("=" * 70)
     print("CONVERSÃO DE IMAGENS PARA PNG")
     print("=" * 70)
@@ -86,29 +367,56 @@ def main():
     print()
 
     # Listar imagens
-    images = []
-    for ext in SUPPORTED_FORMATS:
-        images.extend(list(INPUT_DIR.glob(f"*{ext}")))
-        images.extend(list(INPUT_DIR.glob(f"*{ext.upper()}")))
+    images, duplicates = find_images(INPUT_DIR)
+    for path in duplicates:
+        print(f"⚠️  Ignorando {path.name}: já existe outra imagem com o nome {path.stem} (sem diferenciar maiúsculas)")
 
     if not images:
         print(f"❌ Nenhuma imagem encontrada em {INPUT_DIR}")
         print(f"   Formatos suportados: {', '.join(SUPPORTED_FORMATS)}")
         sys.exit(1)
 
-    print(f"📸 Encontradas {len(images)} imagens para converter")
+    # Separar o que mudou desde a última conversão
+    settings = build_settings(args.widths, args.formats)
+    previous = load_manifest(OUTPUT_DIR)
+    manifest = dict(previous)
+    source_hashes = {path.name: file_hash(path) for path in images}
+    pending = [
+        path for path in images
+        if args.full or not is_up_to_date(manifest.get(path.name), source_hashes[path.name], settings, OUTPUT_DIR)
+    ]
+    unchanged = len(images) - len(pending)
+
+    # Capas de originais que não existem mais
+    removed = remove_missing_sources(manifest, images, OUTPUT_DIR)
+
+    jobs = max(1, args.jobs)
+    print(f"📸 Encontradas {len(images)} imagens, {len(pending)} para converter ({jobs} processo(s))")
+    if unchanged:
+        print(f"⏭️  {unchanged} inalteradas desde a última conversão")
     print()
 
     # Converter imagens
     success = 0
     failed = 0
 
-    for img_path in sorted(images):
-        if convert_image(img_path, OUTPUT_DIR):
-            success += 1
-        else:
-            failed += 1
-        print()  # Linha em branco entre conversões
+    try:
+        for index, result in enumerate(convert_all(pending, OUTPUT_DIR, settings, jobs), 1):
+            print_result(result, index, len(pending))
+            name = result['input'].name
+            if result['error'] is None:
+                success += 1
+                manifest[name] = manifest_entry(source_hashes[name], settings, result['width'],
+                                                result['height'], result['variants'])
+                removed += remove_stale_variants(previous.get(name), result['variants'], OUTPUT_DIR)
+            else:
+                failed += 1
+                manifest.pop(name, None)
+            print()  # Linha em branco entre conversões
+    finally:
+        # Conversões concluídas não são refeitas se a execução for interrompida
+        save_manifest(OUTPUT_DIR, manifest)
+        save_covers_manifest(OUTPUT_DIR, manifest)
 
     # Resumo
     print("=" * 70)
@@ -116,6 +424,9 @@ def main():
     print("=" * 70)
     print(f"✅ Sucessos: {success}")
     print(f"❌ Falhas:   {failed}")
+    print(f"⏭️  Inalteradas: {unchanged}")
+    if removed:
+        print(f"🗑️  Arquivos removidos: {removed}")
     print(f"📊 Total:    {len(images)}")
     print()
     print(f"📁 Imagens convertidas salvas em: {OUTPUT_DIR.absolute()}")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Script para converter e publicar capas de jogos em uma única etapa
+
+Junta convert-images.py e upload-game-covers.py em um pipeline: os
+processos de conversão entregam as variantes codificadas (PNG/WebP/AVIF)
+direto a uma fila limitada de uploads, sem reler os arquivos do disco.
+Enquanto uma capa é enviada, as próximas já estão sendo codificadas, então
+o tempo total fica perto do maior dos dois (conversão ou upload), não da
+soma.
+
+Usa os mesmos manifestos dos dois scripts:
+- imagens-convertidas/.convert-manifest.json (cache de conversão) e
+  covers.json;
+- imagens-convertidas/.upload-manifest.json (o que já está no Storage).
+
+Uma capa é pulada quando a original e as configurações não mudaram e
+todas as variantes já foram enviadas; variantes com o mesmo conteúdo da
+última publicação não são reenviadas. Se só o upload ficou pendente (ex.:
+falha de rede), as variantes são reenviadas a partir da cópia em disco,
+sem reconverter. A cópia em imagens-convertidas/ é mantida, a não ser com
+--no-save.
+
+Uso:
+    python publish-covers.py
+    python publish-covers.py --jobs 4 --concurrency 16
+    python publish-covers.py --no-save
+
+Dependências:
+    pip install Pillow requests
+
+Configuração:
+    As mesmas de convert-images.py e upload-game-covers.py
+    (SUPABASE_URL, SUPABASE_ANON_KEY, ...)
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+import argparse
+import hashlib
+import importlib.util
+import queue
+import sys
+import threading
+import time
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+def load_script(module_name: str, file_name: str):
+    """
+    Importa um script irmão com hífen no nome
+
+    O módulo é registrado em sys.modules para que as funções dele possam
+    ser enviadas aos processos de conversão.
+    """
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+convert = load_script("convert_images", "convert-images.py")
+upload = load_script("upload_game_covers", "upload-game-covers.py")
+
+class Publisher:
+    """
+    Estado compartilhado entre o laço de conversão e as threads de upload
+
+    O manifesto de upload recebe cada variante enviada; uma capa conta como
+    publicada quando todas as suas variantes foram enviadas.
+    """
+
+    def __init__(self, upload_manifest: dict):
+        self.upload_manifest = upload_manifest
+        self.lock = threading.Lock()
+        self.waiting = {}  # original → [variantes pendentes, alguma falhou]
+        self.uploaded = 0
+        self.reused = 0
+        self.upload_failed = 0
+        self.published = 0
+
+    def add_cover(self, name: str, uploads: int):
+        with self.lock:
+            if uploads:
+                self.waiting[name] = [uploads, False]
+            else:
+                self.published += 1
+
+    def finish_upload(self, name: str, file_name: str, digest: str, size: int, ok: bool):
+        with self.lock:
+            state = self.waiting[name]
+            state[0] -= 1
+            if ok:
+                self.uploaded += 1
+                self.upload_manifest[file_name] = {'sha256': digest, 'size': size}
+            else:
+                self.upload_failed += 1
+                state[1] = True
+
+            if state[0] == 0:
+                del self.waiting[name]
+                if not state[1]:
+                    self.published += 1
+
+    def is_uploaded(self, variant: dict) -> bool:
+        with self.lock:
+            return self.upload_manifest.get(variant['file'], {}).get('sha256') == variant['hash']
+
+def upload_worker(uploads: queue.Queue, publisher: Publisher, session, args):
+    """Thread de upload: consome (original, arquivo, bytes, hash) até receber None"""
+    while True:
+        item = uploads.get()
+        if item is None:
+            return
+
+        name, file_name, data, digest = item
+        ok, message = upload.upload_data(session, file_name, data, args.retries, args.timeout)
+        publisher.finish_upload(name, file_name, digest, len(data), ok)
+        print(f"   📤 {file_name} {'✅' if ok else '❌'} {message}", flush=True)
+
+def is_published(entry: dict, source_hash: str, settings: dict, upload_manifest: dict) -> bool:
+    """True se a capa não mudou e todas as variantes já estão no Storage"""
+    if not entry or entry.get('source_hash') != source_hash or entry.get('settings') != settings:
+        return False
+    return all(
+        upload_manifest.get(variant['file'], {}).get('sha256') == variant['hash']
+        for variant in entry['variants']
+    )
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Converte e publica capas de jogos no Supabase Storage')
+    convert.add_conversion_arguments(parser)
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='Uploads simultâneos (padrão: %(default)s)')
+    parser.add_argument('--retries', type=int, default=4,
+                        help='Novas tentativas em timeouts, 429 e 5xx (padrão: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Timeout de cada requisição em segundos (padrão: %(default)s)')
+    parser.add_argument('--no-save', action='store_true',
+                        help=f'Não gravar as variantes em {convert.OUTPUT_DIR} (só os manifestos)')
+    args = parser.parse_args()
+    convert.validate_conversion_args(parser, args)
+    return args
+
+def main():
+    """Função principal"""
+    args = parse_args()
+
+    print("=" * 70)
+    print("CONVERSÃO E UPLOAD DE CAPAS")
+    print("=" * 70)
+    print()
+
+    if not upload.validate_config():
+        sys.exit(1)
+
+    input_dir = convert.INPUT_DIR
+    output_dir = convert.OUTPUT_DIR
+    if not input_dir.exists():
+        print(f"❌ Diretório de entrada não encontrado: {input_dir}")
+        print(f"   Crie o diretório e coloque as imagens nele")
+        sys.exit(1)
+
+    output_dir.mkdir(exist_ok=True)
+    save = not args.no_save
+    print(f"📁 Input:  {input_dir.absolute()}")
+    print(f"📁 Output: {output_dir.absolute() if save else '(não gravado, --no-save)'}")
+    print(f"🔗 Destino: {upload.SUPABASE_URL} → {upload.STORAGE_BUCKET}/{upload.STORAGE_PATH}/")
+    print()
+
+    images, duplicates = convert.find_images(input_dir)
+    for path in duplicates:
+        print(f"⚠️  Ignorando {path.name}: já existe outra imagem com o nome {path.stem}")
+
+    if not images:
+        print(f"❌ Nenhuma imagem encontrada em {input_dir}")
+        sys.exit(1)
+
+    # Separar o que mudou desde a última publicação
+    settings = convert.build_settings(args.widths, args.formats)
+    target = f"{upload.SUPABASE_URL}/{upload.STORAGE_BUCKET}/{upload.STORAGE_PATH}"
+    previous = convert.load_manifest(output_dir)
+    convert_manifest = dict(previous)
+    upload_manifest = upload.load_upload_manifest(target)
+    source_hashes = {path.name: convert.file_hash(path) for path in images}
+
+    to_convert = []
+    to_resend = []  # Já convertidas (cópia em disco válida), com upload pendente
+    for path in images:
+        entry = convert_manifest.get(path.name)
+        source_hash = source_hashes[path.name]
+        if args.full:
+            to_convert.append(path)
+        elif convert.is_up_to_date(entry, source_hash, settings, output_dir):
+            if not is_published(entry, source_hash, settings, upload_manifest):
+                to_resend.append(path)
+        elif save or not is_published(entry, source_hash, settings, upload_manifest):
+            # Com --no-save, basta já estar publicada
+            to_convert.append(path)
+
+    pending = len(to_convert) + len(to_resend)
+    unchanged = len(images) - pending
+    removed = convert.remove_missing_sources(convert_manifest, images, output_dir)
+
+    jobs = max(1, min(args.jobs, len(to_convert) or 1))
+    concurrency = max(1, args.concurrency)
+    print(f"📸 Encontradas {len(images)} imagens, {len(to_convert)} para converter e publicar "
+          f"({jobs} processo(s), {concurrency} uploads simultâneos)")
+    if to_resend:
+        print(f"🔁 {len(to_resend)} já convertidas com upload pendente (reenviadas do disco)")
+    if unchanged:
+        print(f"⏭️  {unchanged} inalteradas desde a última publicação")
+    print()
+
+    publisher = Publisher(upload_manifest)
+    convert_failed = 0
+    started = time.monotonic()
+
+    headers = {
+        "apikey": upload.SUPABASE_ANON_KEY,
+        "Authorization": f"Bearer {upload.SUPABASE_ANON_KEY}",
+    }
+    session = upload.create_session(headers, concurrency)
+
+    # Fila limitada: se o upload ficar para trás, a conversão espera
+    uploads = queue.Queue(maxsize=concurrency * 2)
+    threads = [
+        threading.Thread(target=upload_worker, args=(uploads, publisher, session, args), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        with session, ProcessPoolExecutor(max_workers=jobs) as executor:
+            # Poucas conversões em andamento, para as variantes não se acumularem na memória
+            remaining = iter(to_convert)
+            in_flight = {}
+            index = 0
+
+            def queue_uploads(name: str, variants: list, read_data) -> int:
+                items = []
+                for variant in variants:
+                    if publisher.is_uploaded(variant):
+                        publisher.reused += 1
+                    else:
+                        items.append((name, variant['file'], read_data(variant), variant['hash']))
+                publisher.add_cover(name, len(items))
+                for item in items:
+                    uploads.put(item)
+                return len(items)
+
+            def submit_next():
+                while len(in_flight) < jobs * 2:
+                    path = next(remaining, None)
+                    if path is None:
+                        return
+                    in_flight[executor.submit(convert.encode_variants, path, settings)] = path
+
+            submit_next()
+
+            # Enquanto as primeiras conversões rodam, reenviar o que ficou pendente
+            for path in to_resend:
+                index += 1
+                count = queue_uploads(path.name, convert_manifest[path.name]['variants'],
+                                      lambda variant: (output_dir / variant['file']).read_bytes())
+                print(f"[{index}/{pending}] 🔁 {path.name} → {count} variantes para reenviar", flush=True)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    index += 1
+                    try:
+                        width, height, variants = future.result()
+                    except Exception as e:
+                        convert_failed += 1
+                        convert_manifest.pop(path.name, None)
+                        print(f"[{index}/{pending}] ❌ Erro ao converter {path.name}: {e}", flush=True)
+                        continue
+
+                    encoded = {}
+                    for variant in variants:
+                        data = encoded[variant['file']] = variant.pop('data')
+                        variant['bytes'] = len(data)
+                        variant['hash'] = hashlib.sha256(data).hexdigest()
+                        if save:
+                            (output_dir / variant['file']).write_bytes(data)
+
+                    if save:
+                        removed += convert.remove_stale_variants(previous.get(path.name), variants, output_dir)
+                    with publisher.lock:
+                        convert_manifest[path.name] = convert.manifest_entry(
+                            source_hashes[path.name], settings, width, height, variants)
+
+                    print(f"[{index}/{pending}] 🎨 {path.name} → {len(variants)} variantes", flush=True)
+                    queue_uploads(path.name, variants, lambda variant: encoded.pop(variant['file']))
+
+                submit_next()
+
+            for _ in threads:
+                uploads.put(None)
+            for thread in threads:
+                thread.join()
+    finally:
+        # Capas publicadas não são refeitas se a execução for interrompida
+        with publisher.lock:
+            convert.save_manifest(output_dir, convert_manifest)
+            convert.save_covers_manifest(output_dir, convert_manifest)
+            upload.save_upload_manifest(target, upload_manifest)
+
+    elapsed = time.monotonic() - started
+    failed = convert_failed + publisher.upload_failed
+
+    # Resumo
+    print()
+    print("=" * 70)
+    print("RESUMO DA PUBLICAÇÃO")
+    print("=" * 70)
+    print(f"✅ Capas publicadas:   {publisher.published}")
+    print(f"📤 Arquivos enviados:  {publisher.uploaded}")
+    if publisher.reused:
+        print(f"♻️  Já no Storage:      {publisher.reused}")
+    print(f"❌ Falhas de conversão: {convert_failed}")
+    print(f"❌ Falhas de upload:   {publisher.upload_failed}")
+    print(f"⏭️  Inalteradas:        {unchanged}")
+    if removed:
+        print(f"🗑️  Arquivos removidos: {removed}")
+    print(f"📊 Total:              {len(images)}")
+    print(f"⏱️  Tempo:              {elapsed:.1f}s")
+    print()
+    print("=" * 70)
+
+    if failed > 0:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Publicação interrompida pelo usuário")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n\n❌ Erro fatal: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -2,91 +2,478 @@
 """
 Script para fazer upload de capas de jogos para Supabase Storage
 
+Os uploads rodam em paralelo (--concurrency) sobre um único pool de
+conexões keep-alive, com novas tentativas e backoff exponencial em
+timeouts, erros de conexão, 429 e 5xx. Cada upload concluído é registrado
+em imagens-convertidas/.upload-checkpoint.json; se a execução for
+interrompida, a próxima retoma de onde parou (o checkpoint é apagado
+quando todos os uploads terminam).
+
+Modo sync (--sync): lista a pasta remota uma vez e envia só as imagens
+novas ou alteradas. Uma imagem é considerada igual à remota quando o
+tamanho bate e o ETag (MD5 do conteúdo) ou o hash registrado no
+manifesto local imagens-convertidas/.upload-manifest.json bate. Com
+--delete, arquivos remotos sem imagem local correspondente são apagados;
+--dry-run apenas imprime o plano.
+
+Os arquivos são enviados direto do disco, sem carregá-los inteiros na
+memória. Acima de --resumable-over MB (padrão 6) o envio usa o upload
+resumível (TUS) do Supabase em blocos de 6 MB; a URL do upload fica no
+checkpoint, e uma nova execução continua do último bloco confirmado. O
+Content-Type vem da extensão do arquivo, então o script também serve para
+outros arquivos (ex.: instaladores):
+
+    UPLOAD_DIR=../../INSTALADORES UPLOAD_PATTERNS="*.exe,*.dmg,*.yml" \
+    STORAGE_BUCKET=releases STORAGE_PATH=launcher python upload-game-covers.py --sync
+
 Uso:
     python upload-game-covers.py
+    python upload-game-covers.py --concurrency 16
+    python upload-game-covers.py --restart   # ignora o checkpoint
+    python upload-game-covers.py --sync --dry-run
+    python upload-game-covers.py --sync --delete
 
 Dependências:
     pip install requests
 
 Configuração:
     Edite as variáveis SUPABASE_URL e SUPABASE_ANON_KEY abaixo
+    Opcionais (ambiente): STORAGE_BUCKET, STORAGE_PATH, UPLOAD_DIR, UPLOAD_PATTERNS
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
 import os
+import random
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 import sys
+import threading
+import time
 
 # ===================================================================
 # CONFIGURAÇÃO - AJUSTAR PARA SEU PROJETO
 # ===================================================================
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://SEU_PROJETO.supabase.co")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "SUA_ANON_KEY_AQUI")
-STORAGE_BUCKET = "games"
-STORAGE_PATH = "covers"
-IMAGES_DIR = Path("imagens-convertidas/")
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "games")
+STORAGE_PATH = os.getenv("STORAGE_PATH", "covers")
+IMAGES_DIR = Path(os.getenv("UPLOAD_DIR", "imagens-convertidas/"))
+UPLOAD_PATTERNS = os.getenv("UPLOAD_PATTERNS", "*.png,*.webp,*.avif").split(",")
+CHECKPOINT_FILE = IMAGES_DIR / ".upload-checkpoint.json"
+UPLOAD_MANIFEST_FILE = IMAGES_DIR / ".upload-manifest.json"
+
+# Itens por página na listagem do Storage e arquivos por requisição de remoção
+LIST_PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 1000
 
 # ===================================================================
 # NÃO MODIFICAR ABAIXO DESTA LINHA
 # ===================================================================
 
-def upload_image(file_path: Path, headers: dict) -> bool:
+# URLs listadas no resumo final (as demais seguem o padrão .../[arquivo])
+URLS_SHOWN = 10
+
+# Status HTTP que valem nova tentativa
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Upload resumível (TUS): o Supabase exige blocos de exatamente 6 MB (exceto o último)
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+TUS_VERSION = "1.0.0"
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("text/yaml", ".yml")
+
+def content_type_for(path: Path) -> str:
+    """Content-Type pela extensão do arquivo"""
+    return mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+def find_files(directory: Path, patterns: list) -> list:
+    """Arquivos do diretório que casam com algum dos padrões (sem repetição)"""
+    files = set()
+    for pattern in patterns:
+        files.update(path for path in directory.glob(pattern.strip()) if path.is_file())
+    return sorted(files)
+
+def create_session(headers: dict, concurrency: int) -> requests.Session:
+    """Sessão HTTP com um pool keep-alive do tamanho da concorrência"""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def file_digests(path: Path) -> tuple:
+    """(SHA-256, MD5) do conteúdo do arquivo em uma única leitura"""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
+def load_upload_manifest(target: str) -> dict:
+    """Arquivos enviados ao destino (nome → {sha256, size}); {} se não existe"""
+    try:
+        data = json.loads(UPLOAD_MANIFEST_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('target') != target:
+        return {}
+    return data.get('files', {})
+
+def save_upload_manifest(target: str, files: dict):
+    """Grava o manifesto de upload de forma atômica"""
+    tmp_path = UPLOAD_MANIFEST_FILE.with_name(UPLOAD_MANIFEST_FILE.name + ".tmp")
+    tmp_path.write_text(json.dumps({'target': target, 'files': files}, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, UPLOAD_MANIFEST_FILE)
+
+def list_remote(session: requests.Session, timeout: float = 30) -> dict:
+    """
+    Lista os arquivos da pasta remota (paginado)
+
+    Returns:
+        Nome do arquivo → metadata do Storage (size, eTag, mimetype...)
+    """
+    url = f"{SUPABASE_URL}/storage/v1/object/list/{STORAGE_BUCKET}"
+    files = {}
+    offset = 0
+
+    while True:
+        response = session.post(url, json={
+            'prefix': STORAGE_PATH,
+            'limit': LIST_PAGE_SIZE,
+            'offset': offset,
+            'sortBy': {'column': 'name', 'order': 'asc'},
+        }, timeout=timeout)
+        response.raise_for_status()
+        items = response.json()
+
+        for item in items:
+            if item.get('id') is not None:  # Sem id = subpasta
+                files[item['name']] = item.get('metadata') or {}
+
+        if len(items) < LIST_PAGE_SIZE:
+            return files
+        offset += len(items)
+
+def delete_remote(session: requests.Session, names: list, timeout: float = 30) -> int:
+    """Apaga arquivos da pasta remota em lotes; retorna quantos foram apagados"""
+    url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}"
+    deleted = 0
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        batch = names[start:start + DELETE_BATCH_SIZE]
+        response = session.delete(url, json={'prefixes': [f"{STORAGE_PATH}/{name}" for name in batch]},
+                                  timeout=timeout)
+        response.raise_for_status()
+        deleted += len(batch)
+    return deleted
+
+def plan_sync(images: list, digests: dict, remote: dict, manifest: dict) -> dict:
+    """
+    Compara as imagens locais com a listagem remota
+
+    Returns:
+        {'new': [...], 'changed': [...], 'unchanged': [...], 'orphans': [...]}
+        (imagens locais como Path, órfãos como nomes remotos)
+    """
+    plan = {'new': [], 'changed': [], 'unchanged': [], 'orphans': []}
+
+    for img in images:
+        metadata = remote.get(img.name)
+        if metadata is None:
+            plan['new'].append(img)
+            continue
+
+        sha256, md5 = digests[img.name]
+        same_size = metadata.get('size') == img.stat().st_size
+        etag = str(metadata.get('eTag', '')).strip('"').lower()
+        recorded = manifest.get(img.name, {})
+        if same_size and (etag == md5 or recorded.get('sha256') == sha256):
+            plan['unchanged'].append(img)
+        else:
+            plan['changed'].append(img)
+
+    local_names = {img.name for img in images}
+    plan['orphans'] = sorted(name for name in remote if name not in local_names)
+    return plan
+
+def print_plan(plan: dict, delete: bool, verbose: bool):
+    """Imprime o plano do modo sync"""
+    print(f"🆕 Novas:       {len(plan['new'])}")
+    print(f"✏️  Alteradas:   {len(plan['changed'])}")
+    print(f"✅ Inalteradas: {len(plan['unchanged'])}")
+    action = "serão apagados" if delete else "mantidos; use --delete para apagar"
+    print(f"🗑️  Órfãos:      {len(plan['orphans'])} ({action})")
+
+    if verbose and (plan['new'] or plan['changed'] or plan['orphans']):
+        print()
+        for img in plan['new']:
+            print(f"   + {img.name}")
+        for img in plan['changed']:
+            print(f"   ~ {img.name}")
+        for name in plan['orphans']:
+            print(f"   {'-' if delete else '?'} {name}")
+
+class Checkpoint:
+    """
+    Uploads concluídos da execução atual (nome do arquivo → hash) e URLs
+    dos uploads resumíveis em andamento
+
+    O destino (URL, bucket e pasta) faz parte do checkpoint: trocar o
+    projeto ou o bucket invalida os registros.
+    """
+
+    def __init__(self, path: Path, target: str):
+        self.path = path
+        self.target = target
+        self.completed = {}
+        self.partial = {}  # nome → {'sha256', 'url'}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('target') == self.target:
+            self.completed = data.get('completed', {})
+            self.partial = data.get('partial', {})
+
+    def is_done(self, file_name: str, digest: str) -> bool:
+        return self.completed.get(file_name) == digest
+
+    def mark_done(self, file_name: str, digest: str):
+        with self._lock:
+            self.completed[file_name] = digest
+            self.partial.pop(file_name, None)
+            self._save()
+
+    def resume_url(self, file_name: str, digest: str):
+        """URL de um upload resumível do mesmo conteúdo, se houver"""
+        entry = self.partial.get(file_name)
+        return entry['url'] if entry and entry.get('sha256') == digest else None
+
+    def mark_partial(self, file_name: str, digest: str, url: str):
+        with self._lock:
+            self.partial[file_name] = {'sha256': digest, 'url': url}
+            self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({
+            'target': self.target,
+            'completed': self.completed,
+            'partial': self.partial,
+        }, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+def send_with_retries(send, retries: int) -> tuple:
+    """
+    Chama send() repetindo timeouts, erros de conexão, 429 e 5xx com
+    backoff exponencial
+
+    Returns:
+        (resposta definitiva ou None, última mensagem de erro, novas tentativas)
+    """
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            response = send()
+            if response.status_code not in RETRY_STATUS:
+                return response, None, attempt
+            error = f"[ERRO {response.status_code}] {response.text[:200]}"
+        except requests.exceptions.Timeout:
+            error = "[TIMEOUT] Tempo esgotado"
+        except requests.exceptions.ConnectionError as e:
+            error = f"[CONNECTION ERROR] {e}"
+
+        if attempt < retries:
+            # Backoff exponencial com jitter: ~0.5 s, 1 s, 2 s, 4 s...
+            time.sleep(0.5 * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    return None, error, retries
+
+def upload_file(session: requests.Session, file_path: Path, digest: str, retries: int = 4,
+                timeout: float = 30, checkpoint: Checkpoint = None,
+                resumable_over: int = TUS_CHUNK_SIZE) -> tuple:
     """
-    Faz upload de uma imagem para o Supabase Storage
+    Faz upload de um arquivo para o Supabase Storage
+
+    Um único POST com x-upsert: true cria ou substitui o arquivo (antes era
+    um POST sem upsert e, se já existisse, um segundo POST com o corpo
+    inteiro). O corpo é lido do disco durante o envio; arquivos maiores que
+    resumable_over bytes usam o upload resumível (ver upload_resumable).
 
     Args:
+        session: Sessão HTTP com autenticação (ver create_session)
         file_path: Caminho do arquivo a ser enviado
-        headers: Headers HTTP com autenticação
+        digest: SHA-256 do arquivo (identifica uploads resumíveis no checkpoint)
+        retries: Novas tentativas em erros temporários
+        timeout: Timeout de cada requisição (segundos)
+        checkpoint: Onde guardar a URL de uploads resumíveis
+        resumable_over: Tamanho a partir do qual o upload é resumível
 
     Returns:
-        True se sucesso, False se falhou
+        (sucesso, mensagem)
     """
-    file_name = file_path.name
-    storage_file_path = f"{STORAGE_PATH}/{file_name}"
-    url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}/{storage_file_path}"
+    try:
+        size = file_path.stat().st_size
+        if size > resumable_over:
+            return upload_resumable(session, file_path, size, digest, retries, timeout, checkpoint)
 
-    print(f"📤 Uploading {file_name}...", end=" ", flush=True)
+        # Reaberto a cada tentativa: o requests envia o arquivo em blocos
+        return post_object(session, file_path.name, lambda: open(file_path, "rb"), retries, timeout)
 
-    try:
-        # Ler arquivo
-        with open(file_path, "rb") as f:
-            file_data = f.read()
-
-        # Preparar headers
-        upload_headers = headers.copy()
-        upload_headers["Content-Type"] = "image/png"
-        upload_headers["x-upsert"] = "false"  # Não sobrescrever se já existe
-
-        # Tentar upload (POST = criar novo)
-        response = requests.post(url, data=file_data, headers=upload_headers, timeout=30)
-
-        if response.status_code == 200:
-            print("✅ [OK] Sucesso!")
-            return True
-        elif response.status_code == 409:
-            # Arquivo já existe, tentar atualizar
-            print("⚠️  [EXISTS] Arquivo já existe, atualizando...", end=" ", flush=True)
-            upload_headers["x-upsert"] = "true"
-            response = requests.post(url, data=file_data, headers=upload_headers, timeout=30)
-
-            if response.status_code == 200:
-                print("✅ [OK]")
-                return True
-
-        # Erro
-        print(f"❌ [ERRO {response.status_code}]")
-        print(f"   Resposta: {response.text[:200]}")
-        return False
+    except Exception as e:
+        return False, f"[ERRO] {e}"
 
-    except requests.exceptions.Timeout:
-        print("❌ [TIMEOUT] Tempo esgotado")
-        return False
-    except requests.exceptions.ConnectionError as e:
-        print(f"❌ [CONNECTION ERROR] {e}")
-        return False
+def upload_data(session: requests.Session, file_name: str, data: bytes, retries: int = 4,
+                timeout: float = 30) -> tuple:
+    """
+    Faz upload de um conteúdo já em memória (ex.: capa recém-codificada
+    em publish-covers.py)
+
+    Returns:
+        (sucesso, mensagem)
+    """
+    try:
+        return post_object(session, file_name, lambda: data, retries, timeout)
     except Exception as e:
-        print(f"❌ [ERRO] {e}")
-        return False
+        return False, f"[ERRO] {e}"
+
+def post_object(session: requests.Session, file_name: str, open_body, retries: int, timeout: float) -> tuple:
+    """
+    POST de um objeto com x-upsert: true
+
+    Args:
+        open_body: Função que retorna o corpo (bytes ou arquivo aberto, que
+            é fechado após o envio); chamada a cada tentativa
+
+    Returns:
+        (sucesso, mensagem)
+    """
+    url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}/{STORAGE_PATH}/{file_name}"
+    upload_headers = {
+        "Content-Type": content_type_for(Path(file_name)),
+        "x-upsert": "true",
+    }
+
+    def send():
+        body = open_body()
+        try:
+            return session.post(url, data=body, headers=upload_headers, timeout=timeout)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+    response, error, attempts = send_with_retries(send, retries)
+    if response is None:
+        return False, error
+    if response.status_code != 200:
+        return False, f"[ERRO {response.status_code}] {response.text[:200]}"
+
+    suffix = f" após {attempts} nova(s) tentativa(s)" if attempts else ""
+    return True, f"[OK] Sucesso{suffix}"
+
+def upload_resumable(session: requests.Session, file_path: Path, size: int, digest: str,
+                     retries: int, timeout: float, checkpoint: Checkpoint = None) -> tuple:
+    """
+    Upload resumível (protocolo TUS do Supabase Storage)
+
+    Cria o upload (POST /storage/v1/upload/resumable) e envia o arquivo em
+    blocos de TUS_CHUNK_SIZE com PATCH, lendo um bloco por vez do disco. A
+    URL do upload vai para o checkpoint; se ele já tiver uma URL para o
+    mesmo conteúdo, o envio continua do offset informado pelo servidor.
+
+    Returns:
+        (sucesso, mensagem)
+    """
+    endpoint = f"{SUPABASE_URL}/storage/v1/upload/resumable"
+    tus_headers = {"Tus-Resumable": TUS_VERSION}
+
+    def current_offset(upload_url: str):
+        response, _, _ = send_with_retries(
+            lambda: session.head(upload_url, headers=tus_headers, timeout=timeout), retries)
+        if response is None or response.status_code not in (200, 204):
+            return None
+        return int(response.headers.get("Upload-Offset", 0))
+
+    upload_url = checkpoint.resume_url(file_path.name, digest) if checkpoint else None
+    offset = current_offset(upload_url) if upload_url else None
+    resumed = offset is not None
+
+    if offset is None:
+        metadata = {
+            'bucketName': STORAGE_BUCKET,
+            'objectName': f"{STORAGE_PATH}/{file_path.name}",
+            'contentType': content_type_for(file_path),
+            'cacheControl': '3600',
+        }
+        create_headers = {
+            **tus_headers,
+            "Upload-Length": str(size),
+            "Upload-Metadata": ",".join(
+                f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in metadata.items()
+            ),
+            "x-upsert": "true",
+        }
+        response, error, _ = send_with_retries(
+            lambda: session.post(endpoint, headers=create_headers, timeout=timeout), retries)
+        if response is None:
+            return False, error
+        if response.status_code != 201 or "Location" not in response.headers:
+            return False, f"[ERRO {response.status_code}] {response.text[:200]}"
+
+        upload_url = urljoin(endpoint, response.headers["Location"])
+        offset = 0
+        if checkpoint:
+            checkpoint.mark_partial(file_path.name, digest, upload_url)
+
+    resumed_at = offset
+    with open(file_path, "rb") as f:
+        while offset < size:
+            f.seek(offset)
+            chunk = f.read(TUS_CHUNK_SIZE)
+            patch_headers = {
+                **tus_headers,
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream",
+            }
+            response, error, _ = send_with_retries(
+                lambda: session.patch(upload_url, data=chunk, headers=patch_headers, timeout=timeout), retries)
+            if response is None:
+                return False, f"{error} (retomável em {offset / 1024 / 1024:.0f} MB)"
+
+            if response.status_code == 409:
+                # Offset divergente (ex.: bloco aceito mas a resposta se perdeu)
+                offset = current_offset(upload_url)
+                if offset is None:
+                    return False, "[ERRO] Não foi possível obter o offset do upload resumível"
+                continue
+            if response.status_code not in (200, 204):
+                return False, f"[ERRO {response.status_code}] {response.text[:200]}"
+
+            offset = int(response.headers.get("Upload-Offset", offset + len(chunk)))
+
+    detail = f", retomado em {resumed_at / 1024 / 1024:.0f} MB" if resumed else ""
+    return True, f"[OK] Sucesso (resumível, {size / 1024 / 1024:.1f} MB{detail})"
 
 def validate_config() -> bool:
     """
@@ -108,8 +495,35 @@ def validate_config() -> bool:
 
     return True
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Upload de capas de jogos para o Supabase Storage')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='Uploads simultâneos (padrão: %(default)s)')
+    parser.add_argument('--retries', type=int, default=4,
+                        help='Novas tentativas em timeouts, 429 e 5xx (padrão: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Timeout de cada requisição em segundos (padrão: %(default)s)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignorar o checkpoint e enviar todas as imagens')
+    parser.add_argument('--sync', action='store_true',
+                        help='Listar a pasta remota e enviar só imagens novas ou alteradas')
+    parser.add_argument('--delete', action='store_true',
+                        help='Com --sync, apagar arquivos remotos sem imagem local')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Com --sync, apenas mostrar o plano')
+    parser.add_argument('--resumable-over', type=float, default=TUS_CHUNK_SIZE / 1024 / 1024,
+                        help='Usar upload resumível (TUS) acima deste tamanho em MB (padrão: %(default)s)')
+    args = parser.parse_args()
+
+    if (args.delete or args.dry_run) and not args.sync:
+        parser.error("--delete e --dry-run exigem --sync")
+
+    return args
+
 def main():
     """Função principal"""
+    args = parse_args()
+
     print("=" * 70)
     print("UPLOAD DE IMAGENS PARA SUPABASE STORAGE")
     print("=" * 70)
@@ -125,35 +539,136 @@ def main():
         print("   Execute convert-images.py primeiro para converter as imagens")
         sys.exit(1)
 
-    # Listar imagens
-    images = list(IMAGES_DIR.glob("*.png"))
+    # Listar arquivos
+    images = find_files(IMAGES_DIR, UPLOAD_PATTERNS)
 
     if not images:
-        print(f"❌ Nenhuma imagem PNG encontrada em {IMAGES_DIR}")
+        print(f"❌ Nenhum arquivo ({', '.join(UPLOAD_PATTERNS)}) encontrado em {IMAGES_DIR}")
         sys.exit(1)
 
     print(f"📁 Diretório: {IMAGES_DIR.absolute()}")
     print(f"🔗 Supabase URL: {SUPABASE_URL}")
     print(f"🗄️  Bucket: {STORAGE_BUCKET}")
     print(f"📂 Path: {STORAGE_PATH}/")
-    print(f"📸 Imagens encontradas: {len(images)}")
+    print(f"📸 Arquivos encontrados: {len(images)} ({sum(img.stat().st_size for img in images) / 1024 / 1024:.1f} MB)")
     print()
 
+    target = f"{SUPABASE_URL}/{STORAGE_BUCKET}/{STORAGE_PATH}"
+    digests = {img.name: file_digests(img) for img in images}
+    manifest = load_upload_manifest(target)
+    checkpoint = Checkpoint(CHECKPOINT_FILE, target)
+
     # Preparar headers de autenticação
     headers = {
         "apikey": SUPABASE_ANON_KEY,
         "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
     }
 
+    concurrency = max(1, args.concurrency)
+    session = create_session(headers, concurrency)
+
+    # Uploads concluídos e uploads resumíveis de uma execução interrompida
+    if not args.restart:
+        checkpoint.load()
+
+    resumed = 0
+    unchanged = 0
+    orphans = []
+
+    if args.sync:
+        # Uma listagem da pasta remota no lugar de um POST por imagem
+        print("🔎 Listando arquivos remotos...")
+        try:
+            remote = list_remote(session, args.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Erro ao listar {STORAGE_BUCKET}/{STORAGE_PATH}: {e}")
+            sys.exit(1)
+        print(f"   {len(remote)} arquivos em {STORAGE_BUCKET}/{STORAGE_PATH}/")
+        print()
+
+        plan = plan_sync(images, digests, remote, manifest)
+        print_plan(plan, args.delete, verbose=args.dry_run)
+        print()
+
+        if args.dry_run:
+            print("🧪 Dry-run: nada foi enviado ou apagado")
+            return
+
+        pending = plan['new'] + plan['changed']
+        unchanged = len(plan['unchanged'])
+        orphans = plan['orphans'] if args.delete else []
+    else:
+        pending = [img for img in images if not checkpoint.is_done(img.name, digests[img.name][0])]
+        resumed = len(images) - len(pending)
+        if resumed:
+            print(f"⏭️  {resumed} imagens já enviadas na execução anterior (checkpoint)")
+
+    concurrency = min(concurrency, len(pending) or 1)
+    print(f"🚀 Enviando {len(pending)} imagens ({concurrency} uploads simultâneos)")
+    print()
+
     # Fazer upload das imagens
     success = 0
     failed = 0
-
-    for img in sorted(images):
-        if upload_image(img, headers):
+    uploaded = []
+    deleted = 0
+    started = time.monotonic()
+
+    def record(future):
+        """Contabiliza um upload concluído (checkpoint e manifesto)"""
+        nonlocal success, failed
+        finished.add(future)
+        img = futures[future]
+        ok, message = future.result()
+        if ok:
             success += 1
+            uploaded.append(img.name)
+            checkpoint.mark_done(img.name, digests[img.name][0])
+            manifest[img.name] = {'sha256': digests[img.name][0], 'size': img.stat().st_size}
+            print(f"[{len(finished)}/{len(pending)}] 📤 {img.name} ✅ {message}")
         else:
             failed += 1
+            print(f"[{len(finished)}/{len(pending)}] 📤 {img.name} ❌ {message}")
+
+    finished = set()
+    with session:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = {}
+        try:
+            futures = {
+                executor.submit(upload_file, session, img, digests[img.name][0], args.retries, args.timeout,
+                                checkpoint, int(args.resumable_over * 1024 * 1024)): img
+                for img in pending
+            }
+            for future in as_completed(futures):
+                record(future)
+
+            if orphans:
+                try:
+                    deleted = delete_remote(session, orphans, args.timeout)
+                    print(f"🗑️  {deleted} arquivos órfãos apagados")
+                except requests.exceptions.RequestException as e:
+                    failed += 1
+                    print(f"❌ Erro ao apagar arquivos órfãos: {e}")
+                for name in orphans[:deleted]:
+                    manifest.pop(name, None)
+        except KeyboardInterrupt:
+            # Ctrl-C: descartar a fila, mas registrar os uploads que já estavam em andamento
+            print("\n⚠️  Interrompido: cancelando os uploads na fila e aguardando os que já começaram...")
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future in futures:
+                if future not in finished and not future.cancelled():
+                    record(future)
+            print(f"💾 {success} enviados nesta execução; execute novamente para retomar")
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            checkpoint.save()
+            save_upload_manifest(target, manifest)
+
+    elapsed = time.monotonic() - started
+    if failed == 0:
+        checkpoint.clear()
 
     # Resumo
     print()
@@ -162,12 +677,28 @@ def main():
     print("=" * 70)
     print(f"✅ Sucessos: {success}")
     print(f"❌ Falhas:   {failed}")
+    if resumed:
+        print(f"⏭️  Retomadas: {resumed}")
+    if args.sync:
+        print(f"⏭️  Inalteradas: {unchanged}")
+        if args.delete:
+            print(f"🗑️  Apagadas: {deleted}")
     print(f"📊 Total:    {len(images)}")
+    print(f"⏱️  Tempo:    {elapsed:.1f}s")
     print()
 
-    if success > 0:
+    if failed > 0:
+        print("🔁 Execute novamente para retomar os uploads que falharam")
+        print()
+
+    if success + resumed + unchanged > 0:
+        public_url = f"{SUPABASE_URL}/storage/v1/object/public/{STORAGE_BUCKET}/{STORAGE_PATH}"
         print("🎉 URLs das imagens (use no banco de dados):")
-        print(f"   {SUPABASE_URL}/storage/v1/object/public/{STORAGE_BUCKET}/{STORAGE_PATH}/[nome-arquivo].png")
+        print(f"   {public_url}/[arquivo]")
+        for name in sorted(uploaded)[:URLS_SHOWN]:
+            print(f"   {public_url}/{name}")
+        if len(uploaded) > URLS_SHOWN:
+            print(f"   ... e mais {len(uploaded) - URLS_SHOWN} enviados nesta execução")
         print()
 
     print("=" * 70)
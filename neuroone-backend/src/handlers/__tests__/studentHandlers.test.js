@@ -0,0 +1,187 @@
+/**
+ * Testes Unitários - studentHandlers.js
+ * Testa o roteamento por aluno em sockets do bridge (vários headsets)
+ */
+
+import { jest } from '@jest/globals';
+
+const mockGetSession = jest.fn();
+const mockSaveEEGData = jest.fn();
+const mockSaveEEGDataBatch = jest.fn();
+const mockIsStudentEnrolled = jest.fn();
+
+jest.unstable_mockModule('../../services/database.js', () => ({
+  getSession: mockGetSession,
+  saveEEGData: mockSaveEEGData,
+  saveEEGDataBatch: mockSaveEEGDataBatch,
+  isStudentEnrolled: mockIsStudentEnrolled,
+}));
+
+jest.unstable_mockModule('@supabase/supabase-js', () => ({
+  createClient: jest.fn(() => ({})),
+}));
+
+// Importar módulo após mock
+const {
+  handleStudentJoin,
+  handleStudentLeave,
+  handleEEGData,
+  handleEEGBatch,
+  handleEEGAggregate,
+} = await import('../studentHandlers.js');
+
+function createSocket(role) {
+  return {
+    id: `socket-${role}`,
+    user: { role },
+    data: {},
+    emit: jest.fn(),
+    join: jest.fn(),
+    leave: jest.fn(),
+  };
+}
+
+function createIo() {
+  const emit = jest.fn();
+  return { emit, to: jest.fn(() => ({ emit })) };
+}
+
+describe('Student Handlers', () => {
+  let io;
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    io = createIo();
+    mockGetSession.mockResolvedValue({ id: 'sessao-1', title: 'Aula', status: 'active' });
+    mockIsStudentEnrolled.mockResolvedValue(true);
+    mockSaveEEGData.mockResolvedValue({});
+    mockSaveEEGDataBatch.mockImplementation(async (rows) => rows.length);
+  });
+
+  describe('socket do bridge', () => {
+    let socket;
+
+    beforeEach(async () => {
+      socket = createSocket('professor');
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-1', studentName: 'Ana' });
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-2', studentName: 'Bia' });
+    });
+
+    it('deve manter todos os alunos que entraram pelo mesmo socket', () => {
+      expect(socket.data.role).toBe('bridge');
+      expect([...socket.data.students.keys()]).toEqual(['aluno-1', 'aluno-2']);
+      expect(socket.emit).toHaveBeenCalledWith('student:joined', expect.objectContaining({ studentId: 'aluno-2' }));
+    });
+
+    it('deve gravar eeg:data no aluno do payload', async () => {
+      await handleEEGData(io, socket, { studentId: 'aluno-1', attention: 70, relaxation: 40 });
+      await handleEEGData(io, socket, { studentId: 'aluno-2', attention: 30, relaxation: 60 });
+
+      expect(mockSaveEEGData.mock.calls.map(([eeg]) => eeg.studentId)).toEqual(['aluno-1', 'aluno-2']);
+      expect(io.emit).toHaveBeenCalledWith('eeg:update', expect.objectContaining({
+        studentId: 'aluno-2',
+        studentName: 'Bia',
+      }));
+    });
+
+    it('deve rejeitar eeg:data de aluno que não entrou por este socket', async () => {
+      await handleEEGData(io, socket, { studentId: 'aluno-3', attention: 70, relaxation: 40 });
+
+      expect(mockSaveEEGData).not.toHaveBeenCalled();
+      expect(socket.emit).toHaveBeenCalledWith('error', expect.objectContaining({ studentId: 'aluno-3' }));
+    });
+
+    it('deve sair da sala só quando o último aluno da sessão sair', async () => {
+      await handleStudentLeave(io, socket, { studentId: 'aluno-1' });
+      expect(socket.leave).not.toHaveBeenCalled();
+
+      await handleStudentLeave(io, socket, { studentId: 'aluno-2' });
+      expect(socket.leave).toHaveBeenCalledWith('session:sessao-1');
+      expect(socket.data.students.size).toBe(0);
+    });
+  });
+
+  describe('eeg:batch', () => {
+    let socket;
+
+    beforeEach(async () => {
+      socket = createSocket('professor');
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-1', studentName: 'Ana' });
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-2', studentName: 'Bia' });
+      io.emit.mockClear();
+    });
+
+    it('deve gravar o lote em um insert e enviar só o último frame de cada aluno', async () => {
+      await handleEEGBatch(io, socket, {
+        sessionId: 'sessao-1',
+        samples: [
+          { studentId: 'aluno-1', attention: 10, relaxation: 40 },
+          { studentId: 'aluno-2', attention: 20, relaxation: 40 },
+          { studentId: 'aluno-1', attention: 30, relaxation: 40 },
+        ],
+      });
+
+      expect(mockSaveEEGDataBatch).toHaveBeenCalledTimes(1);
+      expect(mockSaveEEGDataBatch.mock.calls[0][0]).toHaveLength(3);
+      expect(io.emit).toHaveBeenCalledTimes(2);
+      expect(io.emit).toHaveBeenCalledWith('eeg:update', expect.objectContaining({ studentId: 'aluno-1', attention: 30 }));
+    });
+
+    it('deve descartar frames de outra sessão ou de aluno que não entrou', async () => {
+      await handleEEGBatch(io, socket, {
+        samples: [
+          { studentId: 'aluno-1', sessionId: 'sessao-antiga', attention: 10, relaxation: 40 },
+          { studentId: 'aluno-3', sessionId: 'sessao-1', attention: 10, relaxation: 40 },
+          { studentId: 'aluno-2', sessionId: 'sessao-1', attention: 10, relaxation: 40 },
+        ],
+      });
+
+      expect(mockSaveEEGDataBatch.mock.calls[0][0].map((eeg) => eeg.studentId)).toEqual(['aluno-2']);
+    });
+
+    it('não deve atualizar o dashboard com frames reenviados', async () => {
+      await handleEEGBatch(io, socket, {
+        sessionId: 'sessao-1',
+        replay: true,
+        samples: [{ studentId: 'aluno-1', attention: 10, relaxation: 40 }],
+      });
+
+      expect(mockSaveEEGDataBatch).toHaveBeenCalledTimes(1);
+      expect(io.emit).not.toHaveBeenCalled();
+      expect(socket.emit).toHaveBeenCalledWith('eeg:received', expect.objectContaining({ count: 1 }));
+    });
+  });
+
+  describe('eeg:aggregate', () => {
+    it('deve repassar aos professores só janelas de alunos do socket', async () => {
+      const socket = createSocket('professor');
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-1', studentName: 'Ana' });
+      io.emit.mockClear();
+
+      await handleEEGAggregate(io, socket, {
+        sessionId: 'sessao-1',
+        windows: [
+          { studentId: 'aluno-1', resolution: 1, start: 1000, count: 4 },
+          { studentId: 'aluno-9', resolution: 1, start: 1000, count: 4 },
+        ],
+      });
+
+      expect(io.to).toHaveBeenCalledWith('session:sessao-1');
+      expect(io.emit).toHaveBeenCalledWith('eeg:aggregate', {
+        sessionId: 'sessao-1',
+        windows: [{ studentId: 'aluno-1', resolution: 1, start: 1000, count: 4 }],
+      });
+    });
+  });
+
+  describe('socket de aluno', () => {
+    it('deve continuar usando o aluno do join', async () => {
+      const socket = createSocket('aluno');
+      await handleStudentJoin(io, socket, { sessionId: 'sessao-1', studentId: 'aluno-1', studentName: 'Ana' });
+      await handleEEGData(io, socket, { attention: 70, relaxation: 40 });
+
+      expect(socket.data.role).toBe('student');
+      expect(mockSaveEEGData).toHaveBeenCalledWith(expect.objectContaining({ studentId: 'aluno-1' }));
+    });
+  });
+});
@@ -1,9 +1,29 @@
-import { getSession, saveEEGData, isStudentEnrolled } from '../services/database.js';
+import { getSession, saveEEGData, saveEEGDataBatch, isStudentEnrolled } from '../services/database.js';
 import {
   addStudentToRoom,
   removeStudentFromRoom,
   updateStudentEEG,
 } from '../services/roomState.js';
+import { isBridgeSocket } from '../middleware/auth.js';
+
+/**
+ * Resolve the joined student an event refers to
+ * Bridge sockets carry several students, keyed by the payload studentId;
+ * regular sockets carry the single student stored in socket.data
+ * @param {Object} socket - Socket instance
+ * @param {Object} data - Event payload
+ * @returns {Object|null} { sessionId, studentId, studentName, roomName }
+ */
+export function getJoinedStudent(socket, data) {
+  if (socket.data.role === 'bridge') {
+    const studentId = data?.studentId;
+    const student = studentId ? socket.data.students.get(studentId) : null;
+    return student ? { studentId, ...student } : null;
+  }
+
+  const { sessionId, studentId, studentName, roomName } = socket.data;
+  return sessionId && studentId ? { sessionId, studentId, studentName, roomName } : null;
+}
 
 /**
  * Handle student joining a session room
@@ -45,11 +65,18 @@ export async function handleStudentJoin(io, socket, data) {
     await socket.join(roomName);
 
     // Store student info in socket data
-    socket.data.role = 'student';
-    socket.data.sessionId = sessionId;
-    socket.data.studentId = studentId;
-    socket.data.studentName = studentName;
-    socket.data.roomName = roomName;
+    if (isBridgeSocket(socket)) {
+      // Classroom bridge: one entry per headset on the same socket
+      socket.data.role = 'bridge';
+      socket.data.students = socket.data.students || new Map();
+      socket.data.students.set(studentId, { sessionId, studentName, roomName });
+    } else {
+      socket.data.role = 'student';
+      socket.data.sessionId = sessionId;
+      socket.data.studentId = studentId;
+      socket.data.studentName = studentName;
+      socket.data.roomName = roomName;
+    }
 
     console.log(`👨‍🎓 Student ${studentName} (${studentId}) joined session ${sessionId}`);
 
@@ -59,6 +86,7 @@ export async function handleStudentJoin(io, socket, data) {
     // Send confirmation to student
     socket.emit('student:joined', {
       sessionId,
+      studentId,
       session: {
         id: session.id,
         title: session.title,
@@ -83,20 +111,30 @@ export async function handleStudentJoin(io, socket, data) {
  * Handle student leaving a session room
  * @param {Object} io - Socket.io instance
  * @param {Object} socket - Socket instance
- * @param {Object} data - { sessionId }
+ * @param {Object} data - { sessionId } ({ studentId } on bridge sockets)
  */
 export async function handleStudentLeave(io, socket, data) {
   try {
-    const { sessionId, studentId, studentName } = data || socket.data;
+    const isBridge = socket.data.role === 'bridge';
+    const student = isBridge ? getJoinedStudent(socket, data) : data || socket.data;
 
-    if (!sessionId) {
+    if (!student?.sessionId) {
       return;
     }
 
+    const { sessionId, studentId, studentName } = student;
     const roomName = `session:${sessionId}`;
 
-    // Leave room
-    await socket.leave(roomName);
+    if (isBridge) {
+      socket.data.students.delete(studentId);
+    }
+
+    // Leave room (a bridge stays while other headsets of the session remain)
+    const stillInSession = isBridge
+      && [...socket.data.students.values()].some((other) => other.sessionId === sessionId);
+    if (!stillInSession) {
+      await socket.leave(roomName);
+    }
 
     console.log(`👨‍🎓 Student ${studentName} (${studentId}) left session ${sessionId}`);
 
@@ -112,14 +150,62 @@ export async function handleStudentLeave(io, socket, data) {
     });
 
     // Clear socket data
-    socket.data.sessionId = null;
-    socket.data.studentId = null;
-    socket.data.roomName = null;
+    if (!isBridge) {
+      socket.data.sessionId = null;
+      socket.data.studentId = null;
+      socket.data.roomName = null;
+    }
   } catch (error) {
     console.error('❌ Error in handleStudentLeave:', error);
   }
 }
 
+/**
+ * Build the EEG data object stored in the database
+ * @param {Object} student - Joined student (see getJoinedStudent)
+ * @param {Object} data - EEG data packet
+ * @returns {Object}
+ */
+function toEEGData(student, data) {
+  return {
+    sessionId: student.sessionId,
+    studentId: student.studentId,
+    timestamp: data.timestamp || new Date().toISOString(),
+    attention: data.attention,
+    relaxation: data.relaxation,
+    delta: data.delta || 0,
+    theta: data.theta || 0,
+    alpha: data.alpha || 0,
+    beta: data.beta || 0,
+    gamma: data.gamma || 0,
+    signalQuality: data.signalQuality || 0,
+    rawData: data.rawData || null,
+  };
+}
+
+/**
+ * Build the eeg:update payload sent to teachers
+ * @param {Object} student - Joined student (see getJoinedStudent)
+ * @param {Object} eegData - EEG data object (see toEEGData)
+ * @returns {Object}
+ */
+function toBroadcast(student, eegData) {
+  return {
+    sessionId: student.sessionId,
+    studentId: student.studentId,
+    studentName: student.studentName,
+    timestamp: eegData.timestamp,
+    attention: eegData.attention,
+    relaxation: eegData.relaxation,
+    delta: eegData.delta,
+    theta: eegData.theta,
+    alpha: eegData.alpha,
+    beta: eegData.beta,
+    gamma: eegData.gamma,
+    signalQuality: eegData.signalQuality,
+  };
+}
+
 /**
  * Handle EEG data from student
  * @param {Object} io - Socket.io instance
@@ -128,14 +214,16 @@ export async function handleStudentLeave(io, socket, data) {
  */
 export async function handleEEGData(io, socket, data) {
   try {
-    const { sessionId, studentId, studentName } = socket.data;
+    const student = getJoinedStudent(socket, data);
 
-    if (!sessionId || !studentId) {
-      console.error('❌ [EEG] Socket sem sessionId ou studentId');
-      socket.emit('error', { message: 'Not joined to any session' });
+    if (!student) {
+      console.error(`❌ [EEG] Aluno ${data?.studentId} não entrou na sessão por este socket`);
+      socket.emit('error', { message: 'Not joined to any session', studentId: data?.studentId });
       return;
     }
 
+    const { sessionId, studentId, studentName } = student;
+
     // Validate required fields
     if (data.attention === undefined || data.relaxation === undefined) {
       console.error('❌ [EEG] Dados inválidos recebidos:', data);
@@ -161,20 +249,7 @@ export async function handleEEGData(io, socket, data) {
     }
 
     // Prepare data for database
-    const eegData = {
-      sessionId,
-      studentId,
-      timestamp: data.timestamp || new Date().toISOString(),
-      attention: data.attention,
-      relaxation: data.relaxation,
-      delta: data.delta || 0,
-      theta: data.theta || 0,
-      alpha: data.alpha || 0,
-      beta: data.beta || 0,
-      gamma: data.gamma || 0,
-      signalQuality: data.signalQuality || 0,
-      rawData: data.rawData || null,
-    };
+    const eegData = toEEGData(student, data);
 
     console.log(`✅ [EEG] Dados válidos - Attention: ${eegData.attention}, Relaxation: ${eegData.relaxation}, Signal: ${eegData.signalQuality}`);
 
@@ -199,22 +274,7 @@ export async function handleEEGData(io, socket, data) {
 
     // Broadcast to teachers in session room
     const roomName = `session:${sessionId}`;
-    const broadcastData = {
-      sessionId,
-      studentId,
-      studentName: socket.data.studentName,
-      timestamp: eegData.timestamp,
-      attention: eegData.attention,
-      relaxation: eegData.relaxation,
-      delta: eegData.delta,
-      theta: eegData.theta,
-      alpha: eegData.alpha,
-      beta: eegData.beta,
-      gamma: eegData.gamma,
-      signalQuality: eegData.signalQuality,
-    };
-
-    io.to(roomName).emit('eeg:update', broadcastData);
+    io.to(roomName).emit('eeg:update', toBroadcast(student, eegData));
     console.log(`📡 [EEG] Dados enviados para professores na sala ${roomName}`);
 
     // Send acknowledgment to student
@@ -226,3 +286,111 @@ export async function handleEEGData(io, socket, data) {
     socket.emit('error', { message: 'Failed to process EEG data' });
   }
 }
+
+/**
+ * Handle a batch of EEG frames (eeg_bridge.py --batch and backlog replay after a reconnect)
+ * All frames are saved in one insert; only the latest frame per student is broadcast,
+ * and replayed frames ("replay": true) are saved without touching the live dashboard
+ * @param {Object} io - Socket.io instance
+ * @param {Object} socket - Socket instance
+ * @param {Object} data - { sessionId, samples: [EEG data packet], replay }
+ */
+export async function handleEEGBatch(io, socket, data) {
+  try {
+    const samples = Array.isArray(data?.samples) ? data.samples : [];
+    const records = [];
+    const latest = new Map(); // studentId -> { student, eegData }
+    let rejected = 0;
+
+    for (const sample of samples) {
+      const student = getJoinedStudent(socket, sample);
+      const valid = student
+        && (!sample.sessionId || sample.sessionId === student.sessionId)
+        && sample.attention !== undefined
+        && sample.relaxation !== undefined
+        && !(sample.attention === 0 && sample.relaxation === 0);
+
+      if (!valid) {
+        rejected++;
+        continue;
+      }
+
+      const eegData = toEEGData(student, sample);
+      records.push(eegData);
+      latest.set(student.studentId, { student, eegData });
+    }
+
+    if (rejected > 0) {
+      console.warn(`⚠️  [EEG] ${rejected}/${samples.length} frames do lote rejeitados (aluno não entrou por este socket ou dados inválidos)`);
+    }
+
+    if (records.length === 0) {
+      return;
+    }
+
+    saveEEGDataBatch(records)
+      .then((count) => {
+        console.log(`✅ EEG batch saved: ${count} frames${data.replay ? ' (replay)' : ''}`);
+      })
+      .catch((error) => {
+        console.error(`❌ Failed to save EEG batch (${records.length} frames):`, error);
+
+        socket.emit('eeg:save-failed', {
+          count: records.length,
+          message: 'Warning: EEG data may not have been saved to database',
+        });
+      });
+
+    if (!data.replay) {
+      for (const { student, eegData } of latest.values()) {
+        updateStudentEEG(student.sessionId, student.studentId, eegData);
+        io.to(`session:${student.sessionId}`).emit('eeg:update', toBroadcast(student, eegData));
+      }
+    }
+
+    socket.emit('eeg:received', {
+      timestamp: records[records.length - 1].timestamp,
+      count: records.length,
+    });
+  } catch (error) {
+    console.error('❌ Error in handleEEGBatch:', error);
+    socket.emit('error', { message: 'Failed to process EEG batch' });
+  }
+}
+
+/**
+ * Handle aggregated EEG windows (eeg_bridge.py --aggregates)
+ * Windows are relayed to the teachers of each student's session; windows for
+ * students not joined on this socket are dropped
+ * @param {Object} io - Socket.io instance
+ * @param {Object} socket - Socket instance
+ * @param {Object} data - { sessionId, windows: [{ studentId, resolution, start, count, ... }] }
+ */
+export async function handleEEGAggregate(io, socket, data) {
+  try {
+    const windows = Array.isArray(data?.windows) ? data.windows : [];
+    const bySession = new Map(); // sessionId -> windows
+
+    for (const window of windows) {
+      const student = getJoinedStudent(socket, window);
+      if (!student) {
+        continue;
+      }
+
+      if (!bySession.has(student.sessionId)) {
+        bySession.set(student.sessionId, []);
+      }
+      bySession.get(student.sessionId).push(window);
+    }
+
+    for (const [sessionId, sessionWindows] of bySession) {
+      io.to(`session:${sessionId}`).emit('eeg:aggregate', {
+        sessionId,
+        windows: sessionWindows,
+      });
+    }
+  } catch (error) {
+    console.error('❌ Error in handleEEGAggregate:', error);
+    socket.emit('error', { message: 'Failed to process EEG aggregate' });
+  }
+}
@@ -309,4 +309,63 @@ describe('Rate Limiting', () => {
       expect(socket.emit).toHaveBeenCalled();
     });
   });
+
+  describe('Sockets do bridge (vários headsets)', () => {
+    let middleware;
+    let socketCounter = 0;
+
+    beforeEach(() => {
+      middleware = createRateLimitMiddleware();
+    });
+
+    function bridgeSocket(students = 0) {
+      return {
+        id: `bridge-socket-${++socketCounter}`,
+        emit: jest.fn(),
+        user: { role: 'professor' },
+        data: { students: new Map(Array.from({ length: students }, (_, i) => [`aluno-${i}`, {}])) },
+      };
+    }
+
+    it('deve permitir o join de uma sala inteira pelo bridge', () => {
+      const socket = bridgeSocket();
+      const handler = jest.fn();
+      const joinHandler = middleware('student:join', handler);
+
+      for (let i = 0; i < 30; i++) {
+        joinHandler.call(socket, { sessionId: 'test', studentId: `aluno-${i}` });
+      }
+
+      expect(handler).toHaveBeenCalledTimes(30);
+      expect(socket.emit).not.toHaveBeenCalled();
+    });
+
+    it('deve manter 5 joins por minuto para alunos', () => {
+      const socket = { id: `aluno-socket-${++socketCounter}`, emit: jest.fn(), user: { role: 'aluno' }, data: {} };
+      const handler = jest.fn();
+      const joinHandler = middleware('student:join', handler);
+
+      for (let i = 0; i < 6; i++) {
+        joinHandler.call(socket, { sessionId: 'test' });
+      }
+
+      expect(handler).toHaveBeenCalledTimes(5);
+    });
+
+    it('deve dar 300 eeg:data por minuto a cada aluno do bridge', () => {
+      const socket = bridgeSocket(3);
+      const handler = jest.fn();
+      const eegHandler = middleware('eeg:data', handler);
+
+      for (let i = 0; i < 901; i++) {
+        eegHandler.call(socket, { studentId: `aluno-${i % 3}`, attention: 50 });
+      }
+
+      expect(handler).toHaveBeenCalledTimes(900);
+      expect(socket.emit).toHaveBeenCalledWith('error', expect.objectContaining({
+        event: 'eeg:data',
+        limit: 900,
+      }));
+    });
+  });
 });
@@ -102,6 +102,20 @@ export function hasRole(socket, allowedRoles) {
   return allowedRoles.includes(socket.user.role);
 }
 
+/**
+ * Roles allowed to stream several headsets (eeg_bridge.py) over one socket
+ */
+export const BRIDGE_ROLES = ['professor', 'direcao'];
+
+/**
+ * Check if socket belongs to a classroom bridge instead of a single student
+ * @param {Object} socket - Socket.io socket
+ * @returns {boolean}
+ */
+export function isBridgeSocket(socket) {
+  return hasRole(socket, BRIDGE_ROLES);
+}
+
 /**
  * Verify student is enrolled in class
  * @param {string} studentId - Student user ID
@@ -1,4 +1,5 @@
 import logger from '../utils/logger.js';
+import { isBridgeSocket } from './auth.js';
 
 /**
  * Rate limiter for Socket.io events
@@ -150,15 +151,42 @@ const rateLimiter = new RateLimiter();
 // Export class for testing
 export { RateLimiter };
 
+/**
+ * Scale a limit by the number of students joined on the socket
+ * A bridge socket streams every headset of the classroom, so each student keeps its own budget
+ * @param {Object} limits - { maxRequests, windowMs } per student
+ * @returns {Function} (socket) => { maxRequests, windowMs }
+ */
+export function perStudentLimit(limits) {
+  return (socket) => ({
+    ...limits,
+    maxRequests: limits.maxRequests * Math.max(1, socket.data?.students?.size || 0),
+  });
+}
+
+/**
+ * Use a different limit for bridge sockets (see isBridgeSocket)
+ * @param {Object} limits - Limit for regular sockets
+ * @param {Object} bridgeLimits - Limit for bridge sockets
+ * @returns {Function} (socket) => { maxRequests, windowMs }
+ */
+export function bridgeLimit(limits, bridgeLimits) {
+  return (socket) => (isBridgeSocket(socket) ? bridgeLimits : limits);
+}
+
 /**
  * Middleware to apply rate limiting to Socket.io events
- * @param {Object} limits - Rate limit configuration per event
+ * @param {Object} limits - Rate limit configuration per event ({ maxRequests, windowMs } or (socket) => limits)
  */
 export function createRateLimitMiddleware(limits = {}) {
   // Default limits
   const defaultLimits = {
-    'eeg:data': { maxRequests: 300, windowMs: 60000 }, // 5 Hz for 1 minute = 300 requests
-    'student:join': { maxRequests: 5, windowMs: 60000 },
+    'eeg:data': perStudentLimit({ maxRequests: 300, windowMs: 60000 }), // 5 Hz for 1 minute = 300 requests
+    'eeg:batch': { maxRequests: 300, windowMs: 60000 }, // One message carries every student of the socket
+    'eeg:aggregate': { maxRequests: 120, windowMs: 60000 }, // Closed windows, sent once per second
+    'clock:ping': { maxRequests: 30, windowMs: 60000 }, // Rounds of 4 pings every 30 s
+    // A bridge joins every headset of the classroom (and rejoins them after a reconnect)
+    'student:join': bridgeLimit({ maxRequests: 5, windowMs: 60000 }, { maxRequests: 120, windowMs: 60000 }),
     'teacher:join': { maxRequests: 5, windowMs: 60000 },
     'student:leave': { maxRequests: 10, windowMs: 60000 },
     'teacher:leave': { maxRequests: 10, windowMs: 60000 },
@@ -172,7 +200,8 @@ export function createRateLimitMiddleware(limits = {}) {
     return function rateLimitedHandler(data, ...args) {
       // Get socket from 'this' context (Socket.IO binds socket as 'this')
       const socket = this;
-      const limit = finalLimits[eventName] || finalLimits.default;
+      const entry = finalLimits[eventName] || finalLimits.default;
+      const limit = typeof entry === 'function' ? entry(socket) : entry;
 
       if (!rateLimiter.isAllowed(socket.id, eventName, limit)) {
         const remaining = rateLimiter.getRemaining(socket.id, eventName, limit.maxRequests);
@@ -213,6 +242,8 @@ export function getRateLimiterStats() {
 
 export default {
   createRateLimitMiddleware,
+  perStudentLimit,
+  bridgeLimit,
   clearSocketLimits,
   getRateLimiterStats,
 };
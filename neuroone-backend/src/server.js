@@ -17,6 +17,8 @@ import {
   handleStudentJoin,
   handleStudentLeave,
   handleEEGData,
+  handleEEGBatch,
+  handleEEGAggregate,
 } from './handlers/studentHandlers.js';
 import logger from './utils/logger.js';
 import metricsRouter from './routes/metrics.js';
@@ -143,6 +145,14 @@ io.on('connection', (socket) => {
   socket.on('student:join', rateLimitMiddleware('student:join', function(data) { return handleStudentJoin(io, this, data); }));
   socket.on('student:leave', rateLimitMiddleware('student:leave', function(data) { return handleStudentLeave(io, this, data); }));
   socket.on('eeg:data', rateLimitMiddleware('eeg:data', function(data) { return handleEEGData(io, this, data); }));
+  socket.on('eeg:batch', rateLimitMiddleware('eeg:batch', function(data) { return handleEEGBatch(io, this, data); }));
+  socket.on('eeg:aggregate', rateLimitMiddleware('eeg:aggregate', function(data) { return handleEEGAggregate(io, this, data); }));
+
+  // Clock sync (eeg_bridge.py --clock-sync): t1 = received, t2 = sent, epoch ms
+  socket.on('clock:ping', rateLimitMiddleware('clock:ping', function(data) {
+    const t1 = Date.now();
+    this.emit('clock:pong', { t0: data?.t0, t1, t2: Date.now() });
+  }));
 
   // Disconnect handler
   socket.on('disconnect', (reason) => {
@@ -152,7 +162,11 @@ io.on('connection', (socket) => {
     clearSocketLimits(socket);
 
     // Auto-cleanup on disconnect
-    if (socket.data.role === 'teacher' || socket.user?.role === 'professor') {
+    if (socket.data.role === 'bridge') {
+      for (const studentId of [...socket.data.students.keys()]) {
+        handleStudentLeave(io, socket, { studentId });
+      }
+    } else if (socket.data.role === 'teacher' || socket.user?.role === 'professor') {
       handleTeacherLeave(io, socket, socket.data);
     } else if (socket.data.role === 'student' || socket.user?.role === 'aluno') {
       handleStudentLeave(io, socket, socket.data);
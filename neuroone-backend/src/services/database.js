@@ -66,6 +66,28 @@ pool.on('error', (err) => {
   console.error('❌ Unexpected database error:', err);
 });
 
+/**
+ * Map an EEG data object to an eeg_data row
+ * @param {Object} data - EEG data object
+ * @returns {Object} - Row for the eeg_data table
+ */
+function toEEGRecord(data) {
+  return {
+    session_id: data.sessionId,
+    student_id: data.studentId,
+    timestamp: data.timestamp || new Date().toISOString(),
+    attention: data.attention,
+    relaxation: data.relaxation,
+    delta: data.delta || 0,
+    theta: data.theta || 0,
+    alpha: data.alpha || 0,
+    beta: data.beta || 0,
+    gamma: data.gamma || 0,
+    signal_quality: data.signalQuality || 0,
+    raw_data: data.rawData ? JSON.stringify(data.rawData) : null,
+  };
+}
+
 /**
  * Save EEG data to database
  * @param {Object} data - EEG data object
@@ -73,24 +95,9 @@ pool.on('error', (err) => {
  */
 export async function saveEEGData(data) {
   try {
-    const eegRecord = {
-      session_id: data.sessionId,
-      student_id: data.studentId,
-      timestamp: data.timestamp || new Date().toISOString(),
-      attention: data.attention,
-      relaxation: data.relaxation,
-      delta: data.delta || 0,
-      theta: data.theta || 0,
-      alpha: data.alpha || 0,
-      beta: data.beta || 0,
-      gamma: data.gamma || 0,
-      signal_quality: data.signalQuality || 0,
-      raw_data: data.rawData ? JSON.stringify(data.rawData) : null,
-    };
-
     const result = await supabaseQuery('eeg_data', {
       method: 'POST',
-      body: eegRecord
+      body: toEEGRecord(data)
     });
 
     return result[0];
@@ -100,6 +107,25 @@ export async function saveEEGData(data) {
   }
 }
 
+/**
+ * Save several EEG data objects in a single insert (eeg:batch)
+ * @param {Object[]} rows - EEG data objects
+ * @returns {Promise<number>} - Number of inserted rows
+ */
+export async function saveEEGDataBatch(rows) {
+  try {
+    await supabaseQuery('eeg_data', {
+      method: 'POST',
+      body: rows.map(toEEGRecord)
+    });
+
+    return rows.length;
+  } catch (error) {
+    console.error('❌ Error saving EEG data batch:', error);
+    throw error;
+  }
+}
+
 /**
  * Get session information
  * @param {string} sessionId - Session UUID
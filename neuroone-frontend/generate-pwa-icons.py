@@ -2,16 +2,121 @@
 """
 Generate PWA icons from NeuroOne logo
 Creates square icons with proper padding for PWA and maskable variants
+
+Icon specs are read from pwa-icons.json. The logo is decoded once and each
+size is downscaled from the smallest planned copy that is at least twice
+as large (a fixed progressive chain instead of one full-resolution resize
+per icon); PNG encoding runs in parallel. A cache in
+node_modules/.cache/pwa-icons.json stores the logo hash, each icon spec and
+the output hashes, so icons are only regenerated when one of them changes.
+
+Besides the PNGs it writes a multi-resolution favicon.ico, lossless WebP
+copies of the manifest icons (kept only when smaller than the PNG) and
+pwa-icons.generated.json with the manifest icons, precache lists and <head>
+tags, so vite.config.js and index.html no longer need to be kept in sync
+with the icon set by hand.
+
+Usage:
+    python generate-pwa-icons.py            # regenerate what changed
+    python generate-pwa-icons.py --force    # regenerate everything
 """
 
-from PIL import Image, ImageDraw
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+import argparse
+import hashlib
+import io
+import json
 import os
 
 # Paths
-LOGO_PATH = "src/assets/logo-neuroone.png"
-PUBLIC_DIR = "public"
+CONFIG_PATH = "pwa-icons.json"
+CACHE_PATH = os.path.join("node_modules", ".cache", "pwa-icons.json")
+
+# Bump when the rendering changes, to invalidate cached icons
+RENDER_VERSION = 4
+
+# Markers around the generated <head> tags in the HTML entry point
+HTML_START = "<!-- pwa-icons:start -->"
+HTML_END = "<!-- pwa-icons:end -->"
+
+# Manifest sizes that keep a PNG entry next to the WebP copy: the sizes
+# install prompts and splash screens require, for browsers without WebP icons
+REQUIRED_PNG_SIZES = (192, 512)
+
+MIME_TYPES = {
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.ico': 'image/x-icon',
+}
+
+def parse_color(value):
+    """'#RRGGBB' or '#RRGGBBAA' -> RGBA tuple"""
+    value = value.lstrip('#')
+    if len(value) == 6:
+        value += 'ff'
+    return tuple(int(value[i:i + 2], 16) for i in range(0, 8, 2))
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def spec_hash(spec):
+    """Hash of everything in an icon spec that affects the output"""
+    relevant = {
+        key: value for key, value in spec.items()
+        if key not in ('description', 'purpose', 'manifest', 'rel')
+    }
+    relevant['renderVersion'] = RENDER_VERSION
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+def fit_size(logo_size, size, padding_percent):
+    """Logo size that fits the icon's available space, keeping the aspect ratio"""
+    logo_width, logo_height = logo_size
+    padding = int(size * (padding_percent / 100))
+    available_size = size - (2 * padding)
+    logo_ratio = logo_width / logo_height
+
+    if logo_ratio > 1:  # Wider than tall
+        return available_size, int(available_size / logo_ratio)
+    # Taller than wide or square
+    return int(available_size * logo_ratio), available_size
 
-def create_square_icon(logo_img, size, padding_percent=0, bg_color=(255, 255, 255, 255)):
+class LogoPyramid:
+    """
+    Downscaled copies of the logo shared between icons
+
+    The chain of levels is planned from every logo size in the config, not
+    only the icons being regenerated: each size is resized from the smallest
+    planned size at least twice as large (or from the logo itself), so an
+    icon comes out byte-identical whether it is rendered alone or with the
+    whole set. This keeps LANCZOS quality while avoiding a full-resolution
+    resize per icon.
+    """
+
+    def __init__(self, logo_img, sizes):
+        self.logo = logo_img
+        self.sizes = sorted(set(sizes))
+        self.levels = {logo_img.size: logo_img}
+
+    def source_size(self, width, height):
+        """Planned level a size is resized from"""
+        for w, h in self.sizes:
+            if w >= 2 * width and h >= 2 * height:
+                return w, h
+        return self.logo.size
+
+    def resize(self, width, height):
+        cached = self.levels.get((width, height))
+        if cached is not None:
+            return cached
+
+        source = self.resize(*self.source_size(width, height))
+        resized = source.resize((width, height), Image.Resampling.LANCZOS)
+        self.levels[(width, height)] = resized
+        return resized
+
+def create_square_icon(logo_img, size, padding_percent=0, bg_color=(255, 255, 255, 255), pyramid=None):
     """
     Create a square icon from the logo with optional padding
 
@@ -20,26 +125,17 @@ def create_square_icon(logo_img, size, padding_percent=0, bg_color=(255, 255, 25
         size: Target size (width and height)
         padding_percent: Padding as percentage of size (0-50)
         bg_color: Background color RGBA tuple
+        pyramid: Optional LogoPyramid to reuse downscaled copies of the logo
     """
     # Create square canvas
     canvas = Image.new('RGBA', (size, size), bg_color)
 
-    # Calculate padding
-    padding = int(size * (padding_percent / 100))
-    available_size = size - (2 * padding)
-
-    # Calculate scaling to fit logo in available space
-    logo_ratio = logo_img.width / logo_img.height
-
-    if logo_ratio > 1:  # Wider than tall
-        new_width = available_size
-        new_height = int(available_size / logo_ratio)
-    else:  # Taller than wide or square
-        new_height = available_size
-        new_width = int(available_size * logo_ratio)
-
-    # Resize logo
-    logo_resized = logo_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Resize logo to fit the available space
+    new_width, new_height = fit_size(logo_img.size, size, padding_percent)
+    if pyramid is not None:
+        logo_resized = pyramid.resize(new_width, new_height)
+    else:
+        logo_resized = logo_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
     # Calculate position to center logo
     x = (size - new_width) // 2
@@ -50,59 +146,262 @@ def create_square_icon(logo_img, size, padding_percent=0, bg_color=(255, 255, 25
 
     return canvas
 
+def icon_sizes(spec):
+    """Pixel sizes rendered for a spec (several for an .ico)"""
+    return spec['sizes'] if 'sizes' in spec else [spec['size']]
+
+def webp_name(file_name):
+    return os.path.splitext(file_name)[0] + '.webp'
+
+def encode_png(icon):
+    buffer = io.BytesIO()
+    icon.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+def encode_webp(icon):
+    buffer = io.BytesIO()
+    icon.save(buffer, "WEBP", lossless=True, quality=100, method=6)
+    return buffer.getvalue()
+
+def encode_ico(images):
+    """One .ico with a frame per size (Pillow stores each frame as PNG)"""
+    largest = max(images, key=lambda img: img.width)
+    buffer = io.BytesIO()
+    largest.save(
+        buffer, "ICO",
+        sizes=[img.size for img in images],
+        append_images=[img for img in images if img is not largest],
+    )
+    return buffer.getvalue()
+
+def encode_icon(job):
+    """Encode one spec's rendered images -> {output file: bytes}"""
+    spec, images, webp = job
+    if spec['file'].endswith('.ico'):
+        return {spec['file']: encode_ico(images)}
+
+    outputs = {spec['file']: encode_png(images[0])}
+    if webp:
+        # Lossless WebP is usually smaller, but keep it only when it beats the PNG
+        data = encode_webp(images[0])
+        if len(data) < len(outputs[spec['file']]):
+            outputs[webp_name(spec['file'])] = data
+    return outputs
+
+def load_cache():
+    try:
+        with open(CACHE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+def is_up_to_date(spec, public_dir, logo_hash, cache):
+    entry = cache.get('icons', {}).get(spec['file'])
+    return (
+        entry is not None
+        and cache.get('logoHash') == logo_hash
+        and entry.get('specHash') == spec_hash(spec)
+        and spec['file'] in entry.get('outputs', {})
+        and all(
+            os.path.exists(os.path.join(public_dir, name))
+            and file_hash(os.path.join(public_dir, name)) == output_hash
+            for name, output_hash in entry['outputs'].items()
+        )
+    )
+
+def build_fragment(specs, icons_cache):
+    """
+    Manifest icons, precache lists and <head> tags for the generated files
+
+    The manifest lists the WebP copy of each icon when it was kept (it is
+    only kept when smaller than the PNG), followed by the PNG for the
+    required sizes (REQUIRED_PNG_SIZES, any and maskable) or when there is
+    no WebP copy. Browsers pick the first supported type among icons of the
+    same size, so the PNG is the fallback. vite-plugin-pwa precaches every
+    manifest icon; the other PNG copies are left out of the precache. Every
+    URL carries a short content hash for cache busting.
+    """
+    def version(name, spec):
+        return icons_cache[spec['file']]['outputs'][name][:8]
+
+    manifest_icons = []
+    head = []
+    head_files = []
+    linked = set()
+
+    for spec in specs:
+        outputs = icons_cache[spec['file']]['outputs']
+        sizes = ' '.join(f"{size}x{size}" for size in icon_sizes(spec))
+
+        if spec.get('manifest'):
+            names = [webp_name(spec['file'])] if webp_name(spec['file']) in outputs else []
+            if not names or spec.get('size') in REQUIRED_PNG_SIZES:
+                names.append(spec['file'])
+            for name in names:
+                manifest_icons.append({
+                    'src': name,
+                    'sizes': sizes,
+                    'type': MIME_TYPES[os.path.splitext(name)[1]],
+                    'purpose': spec.get('purpose', 'any'),
+                })
+                linked.add(name)
+
+        if spec.get('rel'):
+            mime_type = MIME_TYPES[os.path.splitext(spec['file'])[1]]
+            type_attr = f' type="{mime_type}"' if spec['rel'] == 'icon' else ''
+            head.append(
+                f'<link rel="{spec["rel"]}"{type_attr} sizes="{sizes}" '
+                f'href="/{spec["file"]}?v={version(spec["file"], spec)}" />'
+            )
+            head_files.append(spec['file'])
+            linked.add(spec['file'])
+
+    generated = [name for spec in specs for name in icons_cache[spec['file']]['outputs']]
+    return {
+        'manifestIcons': manifest_icons,
+        # Linked from <head>; the manifest icons are precached by vite-plugin-pwa itself
+        'includeAssets': head_files,
+        # Generated but not referenced by the app (PNG copies of the smaller manifest
+        # icons for browserconfig.xml, favicon.png for other apps)
+        'globIgnores': [name for name in generated if name not in linked],
+        'head': head,
+    }
+
+def write_if_changed(path, content):
+    """Write a text file only when its content changes; returns True if written"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+def inject_head(html_path, head):
+    """Replace the tags between the pwa-icons markers; returns False if the markers are missing"""
+    with open(html_path, encoding='utf-8') as f:
+        html = f.read()
+
+    start = html.find(HTML_START)
+    end = html.find(HTML_END)
+    if start < 0 or end < start:
+        return False
+
+    line_start = html.rfind('\n', 0, start) + 1
+    indent = html[line_start:start]
+    block = HTML_START + ''.join(f"\n{indent}{tag}" for tag in head) + f"\n{indent}"
+    write_if_changed(html_path, html[:start] + block + html[end:])
+    return True
+
 def main():
+    parser = argparse.ArgumentParser(description='Generate PWA icons from the NeuroOne logo')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Icon spec file (default: %(default)s)')
+    parser.add_argument('--force', action='store_true', help='Regenerate all icons, ignoring the cache')
+    args = parser.parse_args()
+
     print("Generating PWA icons for NeuroOne...")
 
+    with open(args.config, encoding='utf-8') as f:
+        config = json.load(f)
+
+    logo_path = config['logo']
+    public_dir = config.get('outputDir', 'public')
+    webp = config.get('webp', False)
+
     # Load original logo
-    if not os.path.exists(LOGO_PATH):
-        print(f"Error: Logo not found at {LOGO_PATH}")
+    if not os.path.exists(logo_path):
+        print(f"Error: Logo not found at {logo_path}")
         return 1
 
-    logo = Image.open(LOGO_PATH)
-    print(f"Loaded logo: {logo.width}x{logo.height}px")
-
     # Ensure public directory exists
-    os.makedirs(PUBLIC_DIR, exist_ok=True)
+    os.makedirs(public_dir, exist_ok=True)
 
-    # White background for standard icons
-    white_bg = (255, 255, 255, 255)
+    logo_hash = file_hash(logo_path)
+    cache = {} if args.force else load_cache()
+    specs = [
+        # WebP copies are only useful for the manifest icons
+        dict(spec, webp=webp) if spec.get('manifest') else spec
+        for spec in config['icons'] + ([config['favicon']] if 'favicon' in config else [])
+    ]
+    pending = [spec for spec in specs if not is_up_to_date(spec, public_dir, logo_hash, cache)]
 
-    # NeuroOne cyan background for maskable (#00D9FF)
-    cyan_bg = (0, 217, 255, 255)
+    previous = cache.get('icons', {}) if cache.get('logoHash') == logo_hash else {}
+    icons_cache = {spec['file']: previous[spec['file']] for spec in specs if spec['file'] in previous}
 
-    icons_to_generate = [
-        # Standard PWA icons (10% padding) - Multiple sizes for all devices
-        ("pwa-72x72.png", 72, 10, white_bg, "PWA icon 72x72 (small mobile)"),
-        ("pwa-96x96.png", 96, 10, white_bg, "PWA icon 96x96 (medium mobile)"),
-        ("pwa-144x144.png", 144, 10, white_bg, "PWA icon 144x144 (Windows tiles/tablets)"),
-        ("pwa-192x192.png", 192, 10, white_bg, "PWA icon 192x192 (Android standard)"),
-        ("pwa-384x384.png", 384, 10, white_bg, "PWA icon 384x384 (large tablets)"),
-        ("pwa-512x512.png", 512, 10, white_bg, "PWA icon 512x512 (high-res displays)"),
+    if pending:
+        logo = Image.open(logo_path)
+        logo.load()
+        print(f"Loaded logo: {logo.width}x{logo.height}px")
 
-        # Maskable icons (20% safe zone padding)
-        ("pwa-192x192-maskable.png", 192, 20, cyan_bg, "Maskable icon 192x192"),
-        ("pwa-512x512-maskable.png", 512, 20, cyan_bg, "Maskable icon 512x512"),
+        # The chain comes from every spec, so cached and pending icons share the same levels
+        pyramid = LogoPyramid(logo.convert('RGBA'), [
+            fit_size(logo.size, size, spec.get('padding', 0))
+            for spec in specs for size in icon_sizes(spec)
+        ])
+        rendered = {}
+        for spec in pending:
+            for size in icon_sizes(spec):
+                rendered[(spec['file'], size)] = create_square_icon(
+                    pyramid.logo, size, spec.get('padding', 0),
+                    parse_color(spec.get('background', '#ffffff')), pyramid,
+                )
 
-        # Apple touch icon (10% padding)
-        ("apple-touch-icon.png", 180, 10, white_bg, "Apple touch icon 180x180"),
+        # PNG/WebP encoding releases the GIL, so threads encode in parallel
+        encode_jobs = [
+            (spec, [rendered[(spec['file'], size)] for size in icon_sizes(spec)], spec.get('webp', False))
+            for spec in pending
+        ]
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            encoded = list(executor.map(encode_icon, encode_jobs))
 
-        # Favicon (10% padding)
-        ("favicon.png", 256, 10, white_bg, "Favicon 256x256"),
-    ]
+        for spec, outputs in zip(pending, encoded):
+            # Drop a WebP copy left over from a previous run that is no longer kept
+            stale = set(icons_cache.get(spec['file'], {}).get('outputs', {})) - set(outputs)
+            for name in stale:
+                if os.path.exists(os.path.join(public_dir, name)):
+                    os.remove(os.path.join(public_dir, name))
+
+            for name, data in outputs.items():
+                with open(os.path.join(public_dir, name), 'wb') as f:
+                    f.write(data)
+            icons_cache[spec['file']] = {
+                'specHash': spec_hash(spec),
+                'outputs': {name: hashlib.sha256(data).hexdigest() for name, data in outputs.items()},
+            }
+            sizes = ', '.join(f"{len(data) / 1024:.1f} KB {os.path.splitext(name)[1][1:]}" for name, data in outputs.items())
+            print(f"Created {spec.get('description', spec['file'])}: {os.path.join(public_dir, spec['file'])} ({sizes})")
 
-    for filename, size, padding, bg_color, description in icons_to_generate:
-        output_path = os.path.join(PUBLIC_DIR, filename)
+        save_cache({'logoHash': logo_hash, 'icons': icons_cache})
+    else:
+        print(f"All {len(specs)} icons are up to date (logo and specs unchanged)")
 
-        # Generate icon
-        icon = create_square_icon(logo, size, padding, bg_color)
+    # Manifest/<head> fragment, rewritten only when it changes
+    fragment = build_fragment(specs, icons_cache)
+    generated_path = config.get('generated', 'pwa-icons.generated.json')
+    if write_if_changed(generated_path, json.dumps(fragment, indent=2) + '\n'):
+        print(f"\nUpdated manifest fragment: {generated_path}")
 
-        # Save as PNG
-        icon.save(output_path, "PNG", optimize=True)
+    html_path = config.get('html')
+    if html_path and not inject_head(html_path, fragment['head']):
+        print(f"\nMarkers {HTML_START} / {HTML_END} not found in {html_path}; add these tags to <head>:")
+        for tag in fragment['head']:
+            print(f"    {tag}")
 
-        print(f"Created {description}: {output_path}")
+    if not pending:
+        return 0
 
+    skipped = len(specs) - len(pending)
+    if skipped:
+        print(f"\n{skipped} icons already up to date")
     print("\nAll PWA icons generated successfully!")
-    print(f"\nIcons saved to: {os.path.abspath(PUBLIC_DIR)}")
+    print(f"\nIcons saved to: {os.path.abspath(public_dir)}")
     return 0
 
 if __name__ == "__main__":
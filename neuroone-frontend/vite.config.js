@@ -2,6 +2,10 @@ import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 import { VitePWA } from 'vite-plugin-pwa'
 import path from 'path'
+import fs from 'fs'
+
+// Icon list written by generate-pwa-icons.py (manifest icons, precache lists)
+const pwaIcons = JSON.parse(fs.readFileSync(path.resolve(__dirname, 'pwa-icons.generated.json'), 'utf-8'))
 
 // https://vite.dev/config/
 export default defineConfig({
@@ -15,18 +19,9 @@ export default defineConfig({
         navigateFallback: 'index.html'
       },
       injectRegister: 'auto',
-      includeAssets: [
-        'favicon.png',
-        'apple-touch-icon.png',
-        'pwa-72x72.png',
-        'pwa-96x96.png',
-        'pwa-144x144.png',
-        'pwa-192x192.png',
-        'pwa-384x384.png',
-        'pwa-512x512.png',
-        'pwa-192x192-maskable.png',
-        'pwa-512x512-maskable.png'
-      ],
+      includeAssets: pwaIcons.includeAssets,
+      // Precaches the manifest icons (WebP, plus PNG for 192/512); the unused PNG copies are in globIgnores
+      includeManifestIcons: true,
       manifest: {
         name: 'NeuroOne - Sistema de Neurofeedback Educacional',
         short_name: 'NeuroOne',
@@ -37,59 +32,11 @@ export default defineConfig({
         display: 'standalone',
         scope: '/',
         start_url: '/',
-        icons: [
-          {
-            src: 'pwa-72x72.png',
-            sizes: '72x72',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-96x96.png',
-            sizes: '96x96',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-144x144.png',
-            sizes: '144x144',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-192x192.png',
-            sizes: '192x192',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-384x384.png',
-            sizes: '384x384',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-512x512.png',
-            sizes: '512x512',
-            type: 'image/png',
-            purpose: 'any'
-          },
-          {
-            src: 'pwa-192x192-maskable.png',
-            sizes: '192x192',
-            type: 'image/png',
-            purpose: 'maskable'
-          },
-          {
-            src: 'pwa-512x512-maskable.png',
-            sizes: '512x512',
-            type: 'image/png',
-            purpose: 'maskable'
-          }
-        ]
+        icons: pwaIcons.manifestIcons
       },
       workbox: {
         globPatterns: ['**/*.{js,css,html,ico,png,svg,woff,woff2,ttf}'],
+        globIgnores: pwaIcons.globIgnores,
         navigateFallback: 'index.html',
         navigateFallbackDenylist: [/^\/api/, /^\/socket\.io/],
         cleanupOutdatedCaches: true,
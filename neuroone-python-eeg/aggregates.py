@@ -0,0 +1,187 @@
+"""
+Aggregates - NeuroOne
+Agregados por janela (média/mín/máx/desvio) das métricas de cada aluno
+
+Cada frame entra apenas no acumulador da menor resolução (Welford, O(1)).
+Quando uma janela fecha, o acumulador é emitido e combinado no da
+resolução seguinte (fórmula de Chan), então 10 s e 1 min custam uma
+combinação por janela fechada, não uma atualização por amostra. As
+janelas são alinhadas ao relógio (epoch), iguais para todos os alunos.
+
+Uma janela emitida nunca é reaberta: frames com timestamp anterior à
+janela aberta (ou ao fim da última fechada) do aluno chegam atrasados,
+por exemplo lidos da serial antes de um collect() e processados depois,
+e são descartados e contados em `late`.
+
+O bridge envia as janelas fechadas em um evento eeg:aggregate separado do
+envio ao vivo, para relatórios e gráficos de histórico lerem séries já
+agregadas.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+# Métricas agregadas (chaves de EEGBridge.format_eeg_data)
+AGGREGATE_FIELDS = ('attention', 'relaxation', 'signalQuality', 'delta', 'theta', 'alpha', 'beta', 'gamma')
+
+DEFAULT_RESOLUTIONS = (1, 10, 60)
+
+
+class RunningStats:
+    """Média, variância, mínimo e máximo incrementais (Welford)"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'RunningStats'):
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'mean': round(self.mean, 3),
+            'min': self.min,
+            'max': self.max,
+            'std': round(math.sqrt(self.m2 / self.count), 3),
+        }
+
+
+class _Window:
+    __slots__ = ('start', 'count', 'stats')
+
+    def __init__(self, start: int):
+        self.start = start
+        self.count = 0
+        self.stats = {name: RunningStats() for name in AGGREGATE_FIELDS}
+
+
+class WindowAggregator:
+    """
+    Janelas fixas de várias resoluções (segundos) por aluno
+
+    Cada resolução deve ser múltipla da anterior (ex.: 1, 10, 60).
+    """
+
+    def __init__(self, resolutions: Sequence[int] = DEFAULT_RESOLUTIONS):
+        resolutions = tuple(sorted(int(r) for r in resolutions))
+        if not resolutions or resolutions[0] <= 0:
+            raise ValueError(f"Resoluções inválidas: {resolutions}")
+        for smaller, larger in zip(resolutions, resolutions[1:]):
+            if larger % smaller:
+                raise ValueError(f"{larger}s não é múltiplo de {smaller}s")
+
+        self.resolutions = resolutions
+        self._periods = [r * 1000 for r in resolutions]
+        self._windows: Dict[str, List[Optional[_Window]]] = {}
+        self._closed: List[Dict[str, Any]] = []
+        # Menor timestamp aceito por aluno: início da janela aberta ou fim da última fechada
+        self._floors: Dict[str, int] = {}
+        self.late = 0
+
+    def add(self, student_id: str, timestamp_ms: int, data: Dict[str, Any]):
+        """Adiciona um frame formatado (ver EEGBridge.format_eeg_data)"""
+        if timestamp_ms < self._floors.get(student_id, timestamp_ms):
+            self.late += 1
+            return
+
+        windows = self._windows.get(student_id)
+        if windows is None:
+            windows = self._windows[student_id] = [None] * len(self.resolutions)
+        else:
+            self._advance(student_id, windows, timestamp_ms)
+
+        window = windows[0]
+        if window is None:
+            window = windows[0] = _Window(timestamp_ms - timestamp_ms % self._periods[0])
+            self._floors[student_id] = window.start
+
+        window.count += 1
+        stats = window.stats
+        for name in AGGREGATE_FIELDS:
+            value = data.get(name)
+            if value is not None:
+                stats[name].add(value)
+
+    def collect(self, now_ms: int) -> List[Dict[str, Any]]:
+        """Fecha as janelas que terminaram até now_ms e retorna as fechadas desde a última coleta"""
+        for student_id, windows in self._windows.items():
+            self._advance(student_id, windows, now_ms)
+
+        closed, self._closed = self._closed, []
+        return closed
+
+    def remove(self, student_id: str):
+        """Esquece um aluno removido do bridge (as janelas abertas são descartadas)"""
+        self._windows.pop(student_id, None)
+        self._floors.pop(student_id, None)
+
+    def _advance(self, student_id: str, windows: List[Optional[_Window]], now_ms: int):
+        for level, period in enumerate(self._periods):
+            window = windows[level]
+            if window is not None and window.start + period <= now_ms:
+                self._close(student_id, windows, level)
+
+    def _close(self, student_id: str, windows: List[Optional[_Window]], level: int):
+        """Emite a janela do nível e a combina na janela do nível seguinte"""
+        window = windows[level]
+        windows[level] = None
+        self._closed.append(self._emit(student_id, level, window))
+        if level == 0:
+            self._floors[student_id] = window.start + self._periods[0]
+
+        if level + 1 == len(windows):
+            return
+
+        period = self._periods[level + 1]
+        start = window.start - window.start % period
+        parent = windows[level + 1]
+        if parent is not None and parent.start != start:
+            # Janela maior de um período anterior (houve um intervalo sem dados)
+            self._close(student_id, windows, level + 1)
+            parent = None
+        if parent is None:
+            parent = windows[level + 1] = _Window(start)
+
+        parent.count += window.count
+        for name, stats in window.stats.items():
+            parent.stats[name].merge(stats)
+
+    def _emit(self, student_id: str, level: int, window: _Window) -> Dict[str, Any]:
+        summary = {
+            'studentId': student_id,
+            'resolution': self.resolutions[level],
+            'start': window.start,
+            'count': window.count,
+        }
+        for name, stats in window.stats.items():
+            if stats.count:
+                summary[name] = stats.as_dict()
+        return summary
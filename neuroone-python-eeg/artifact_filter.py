@@ -0,0 +1,132 @@
+"""
+Artifact Filter - NeuroOne
+Filtro de qualidade de sinal e artefatos aplicado aos frames de cada headset
+
+Etapas (por frame, depois do parser e do BandPowerEngine):
+- frames sem attention/relaxation ainda não recebidos são retidos, em vez
+  de irem ao backend como zeros;
+- signalQuality abaixo de `min_quality` marca o frame como 'poorSignal';
+- piscadas (código 0x16 desde o último frame) marcam 'blink';
+- o sinal bruto que chegou desde o último frame é verificado: amplitude
+  acima de AMPLITUDE_MICROVOLTS marca 'amplitude' (movimento, piscada não
+  detectada pelo chip) e amostras no fundo de escala do ADC marcam
+  'saturation' (eletrodo solto);
+- frames iguais ao último encaminhado são suprimidos.
+
+No modo 'flag' o frame segue com a lista `artifacts`; no modo 'drop' ele é
+descartado e não chega ao backend nem às estatísticas da sessão.
+"""
+
+from typing import Any, List
+
+# Mesma conversão de band_power.py: (raw * 1.8 / 4096) / 2000 * 1e6
+RAW_TO_MICROVOLTS = 1.8 / 4096 / 2000 * 1e6
+
+ARTIFACT_MODES = ('flag', 'drop')
+
+# Campos comparados para suprimir frames repetidos
+_SIGNATURE_FIELDS = (
+    'attention', 'relaxation', 'signalQuality', 'blinkStrength',
+    'delta', 'theta', 'lowAlpha', 'highAlpha', 'lowBeta', 'highBeta', 'lowGamma', 'midGamma',
+    'bandPower', 'artifacts',
+)
+
+
+class ArtifactFilter:
+    """Gating por qualidade de sinal e rejeição de artefatos de um headset"""
+
+    # Fundo de escala do ADC de 12 bits do TGAM
+    SATURATION_LEVEL = 2047
+    SATURATION_MIN_SAMPLES = 8
+
+    # Pico acima do qual o trecho é considerado artefato (EEG típico: 10-100 µV)
+    AMPLITUDE_MICROVOLTS = 300.0
+
+    def __init__(self, parser, min_quality: int = 0, mode: str = 'flag'):
+        if mode not in ARTIFACT_MODES:
+            raise ValueError(f"Modo de artefato inválido: {mode}")
+
+        self.parser = parser
+        self.raw_wave = parser.raw_wave
+        self.min_quality = min_quality
+        self.mode = mode
+        self.amplitude_limit = int(self.AMPLITUDE_MICROVOLTS / RAW_TO_MICROVOLTS)
+
+        self._raw_seen = self.raw_wave.total
+        self._blinks_seen = parser.blinks
+        self._last_signature = None
+
+        self.stats = {
+            'passed': 0, 'incomplete': 0, 'unchanged': 0, 'dropped': 0,
+            'poorSignal': 0, 'blink': 0, 'amplitude': 0, 'saturation': 0,
+        }
+
+    def apply(self, frames: List[Any]) -> List[Any]:
+        """Retorna os frames a encaminhar (marcados com `artifacts` no modo 'flag')"""
+        if not frames:
+            return frames
+
+        stats = self.stats
+        raw_flags = self._raw_artifacts()
+        accepted = []
+
+        for frame in frames:
+            if frame.get('attention') is None or frame.get('relaxation') is None:
+                stats['incomplete'] += 1
+                continue
+
+            flags = list(raw_flags)
+            if self.min_quality and frame.get('signalQuality', 0) < self.min_quality:
+                flags.append('poorSignal')
+
+            if flags:
+                for flag in flags:
+                    stats[flag] += 1
+                if self.mode == 'drop':
+                    stats['dropped'] += 1
+                    continue
+                frame = {**frame, 'artifacts': flags}
+
+            signature = tuple(
+                tuple(value) if isinstance(value, list) else value
+                for value in (frame.get(key) for key in _SIGNATURE_FIELDS)
+            )
+            if signature == self._last_signature:
+                stats['unchanged'] += 1
+                continue
+
+            self._last_signature = signature
+            stats['passed'] += 1
+            accepted.append(frame)
+
+        return accepted
+
+    def _raw_artifacts(self) -> List[str]:
+        """Artefatos no sinal bruto e piscadas desde a última chamada"""
+        flags = []
+
+        blinks = self.parser.blinks
+        if blinks != self._blinks_seen:
+            self._blinks_seen = blinks
+            flags.append('blink')
+
+        raw_wave = self.raw_wave
+        new = min(raw_wave.total - self._raw_seen, len(raw_wave))
+        self._raw_seen = raw_wave.total
+        if new <= 0:
+            return flags
+
+        window = raw_wave.latest(new)
+        peak = max(max(window), -min(window))
+
+        if peak >= self.SATURATION_LEVEL:
+            level = self.SATURATION_LEVEL
+            clipped = sum(1 for value in window if value >= level or value <= -level)
+            if clipped >= self.SATURATION_MIN_SAMPLES:
+                flags.append('saturation')
+                return flags
+
+        if peak >= self.amplitude_limit:
+            flags.append('amplitude')
+
+        return flags
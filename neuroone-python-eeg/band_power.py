@@ -0,0 +1,108 @@
+"""
+Band Power Engine - NeuroOne
+Cálculo das bandas EEG a partir do sinal bruto (0x80) do ThinkGear
+
+Em vez de depender do EEG_POWER (0x83) que o headset envia a 1 Hz, calcula
+uma PSD de Welch sobre uma janela deslizante do RawWaveBuffer e extrai
+delta/theta/alpha/beta/gamma, razões e um índice de atenção próprio,
+tudo em uma única passada vetorizada por janela.
+
+Dependências:
+    pip install numpy
+"""
+
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+# Conversão do valor bruto do TGAM para microvolts:
+# (raw * 1.8 / 4096) / 2000 (ganho do amplificador) * 1e6
+RAW_TO_MICROVOLTS = 1.8 / 4096 / 2000 * 1e6
+
+# Bandas (Hz) - mesmas faixas agregadas que o bridge envia ao backend
+BANDS = (
+    ('delta', 0.5, 4.0),
+    ('theta', 4.0, 8.0),
+    ('alpha', 8.0, 13.0),
+    ('beta', 13.0, 30.0),
+    ('gamma', 30.0, 50.0),
+)
+
+
+class BandPowerEngine:
+    """
+    Calcula potência por banda sobre as últimas `window_seconds` do sinal bruto
+
+    A janela é dividida em segmentos de `segment_seconds` com 50% de
+    sobreposição (Welch, janela de Hann). Um novo resultado é produzido a
+    cada 1/update_hz segundos de amostras novas, então com update_hz=4 o
+    feedback chega a cada ~250 ms em vez de 1 s.
+    """
+
+    def __init__(
+        self,
+        raw_wave,
+        update_hz: float = 4.0,
+        window_seconds: float = 2.0,
+        segment_seconds: float = 1.0
+    ):
+        if update_hz <= 0:
+            raise ValueError(f"update_hz inválido: {update_hz}")
+
+        self.raw_wave = raw_wave
+        sample_rate = raw_wave.sample_rate
+
+        self.window = min(int(window_seconds * sample_rate), raw_wave.capacity)
+        self.segment = min(int(segment_seconds * sample_rate), self.window)
+        self.step = max(1, self.segment // 2)
+        self.hop = max(1, int(sample_rate / update_hz))
+        self._next_total = self.window
+
+        # Pré-calculados: janela de Hann normalizada e matriz de bandas
+        hann = np.hanning(self.segment)
+        self._taper = hann * RAW_TO_MICROVOLTS
+        self._scale = 2.0 / (sample_rate * np.sum(hann ** 2))
+
+        freqs = np.fft.rfftfreq(self.segment, d=1.0 / sample_rate)
+        df = freqs[1] - freqs[0]
+        self._band_matrix = np.array(
+            [(freqs >= low) & (freqs < high) for _, low, high in BANDS],
+            dtype=np.float64
+        ) * df
+
+    def update(self) -> Optional[Dict[str, Any]]:
+        """Retorna as métricas se já chegou amostra suficiente para um novo passo"""
+        if self.raw_wave.total < self._next_total:
+            return None
+
+        self._next_total = self.raw_wave.total + self.hop
+        samples = np.frombuffer(self.raw_wave.latest(self.window), dtype=np.int16)
+        return self.compute(samples)
+
+    def compute(self, samples: np.ndarray) -> Dict[str, Any]:
+        """Calcula as potências de banda (µV²) de uma janela de amostras int16"""
+        # Segmentos sobrepostos como view (sem cópia): (n_segmentos, segment)
+        segments = np.lib.stride_tricks.sliding_window_view(samples, self.segment)[::self.step]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+
+        spectrum = np.fft.rfft(segments * self._taper, axis=1)
+        psd = (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=0) * self._scale
+
+        delta, theta, alpha, beta, gamma = self._band_matrix @ psd
+        total = delta + theta + alpha + beta + gamma
+
+        # Índice de engajamento beta / (alpha + theta), mapeado para 0-100
+        engagement = beta / (alpha + theta) if alpha + theta > 0 else 0.0
+
+        return {
+            'delta': float(delta),
+            'theta': float(theta),
+            'alpha': float(alpha),
+            'beta': float(beta),
+            'gamma': float(gamma),
+            'relativeAlpha': float(alpha / total) if total > 0 else 0.0,
+            'relativeBeta': float(beta / total) if total > 0 else 0.0,
+            'thetaBetaRatio': float(theta / beta) if beta > 0 else 0.0,
+            'alphaThetaRatio': float(alpha / theta) if theta > 0 else 0.0,
+            'attentionIndex': round(100.0 * engagement / (1.0 + engagement)),
+        }
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks do parser ThinkGear e do caminho de envio do EEG Bridge
+
+Cenários:
+- parser/clean        somente pacotes eSense + EEG_POWER (0x83)
+- parser/garbage      raw wave com ~10% de bytes de lixo e checksums inválidos
+- parser/raw          raw wave a 512 Hz + eSense (caso real do headset)
+- parser/raw-x64      64 dispositivos intercalados, um parser por dispositivo
+- parser/capture      uma captura gravada (--capture arquivo.bin)
+- send/json           format_eeg_data + json.dumps por frame
+- send/binary         format_eeg_data + wire_format.encode_frame por frame
+
+Para cada cenário: pacotes/s, MB/s, latência por pacote (p50/p99, medida
+por leitura de 256 bytes como na serial) e blocos de memória retidos por
+pacote (sys.getallocatedblocks, mantendo os resultados).
+
+Os resultados são comparados com benchmarks/baseline.json; uma queda de
+vazão ou aumento de p99 acima de --threshold faz o script sair com código 1.
+Como o baseline pode ter sido gravado em outra máquina (ou a máquina pode
+estar ocupada), cada cenário mede também, logo antes e logo depois, uma
+carga de referência fixa em Python puro; os números do baseline são
+escalados pela razão entre a referência de agora e a dele antes da
+comparação.
+
+Uso:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --capture aula.bin
+    python benchmarks/bench_parser.py --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eeg_bridge import EEGBridge, ThinkGearParser, logger  # noqa: E402
+from simulator import ThinkGearGenerator, make_packet  # noqa: E402
+from wire_format import encode_frame  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# Tamanho de cada leitura da serial
+READ_SIZE = 256
+
+
+def build_stream(kind: str, seconds: int, seed: int = 1) -> bytes:
+    """Stream sintético determinístico para um cenário"""
+    if kind == 'clean':
+        generator = ThinkGearGenerator(seed=seed, raw=False)
+        return b''.join(make_packet(generator.esense_payload(sample)) for sample in range(seconds * 512))
+
+    if kind == 'garbage':
+        # ~0.2 inserções de 1-8 bytes por pacote de 8 bytes ≈ 10% de lixo
+        generator = ThinkGearGenerator(seed=seed, noise=0.2, bad_checksum=0.01, sync_loss=0.01)
+    else:
+        generator = ThinkGearGenerator(seed=seed)
+    return generator.generate(seconds * 512)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_parser(streams, repeat: int):
+    """Alimenta um parser por stream em leituras de READ_SIZE bytes, intercalando os streams"""
+    best = None
+
+    for _ in range(repeat):
+        parsers = [ThinkGearParser() for _ in streams]
+        views = [memoryview(stream) for stream in streams]
+        total_bytes = sum(len(stream) for stream in streams)
+        longest = max(len(stream) for stream in streams)
+
+        results = []
+        latencies = []
+        gc.disable()
+        blocks_before = sys.getallocatedblocks()
+        started = time.perf_counter_ns()
+
+        for offset in range(0, longest, READ_SIZE):
+            for parser, view in zip(parsers, views):
+                chunk = view[offset:offset + READ_SIZE]
+                if not chunk:
+                    continue
+                raw_before = parser.raw_wave.total
+                call_started = time.perf_counter_ns()
+                packets = parser.parse_packets(chunk)
+                elapsed = time.perf_counter_ns() - call_started
+                # Pacotes só de raw wave não geram dicionário de saída
+                count = len(packets) + parser.raw_wave.total - raw_before
+                if count:
+                    latencies.append(elapsed / count)
+                    results.extend(packets)
+
+        elapsed_ns = time.perf_counter_ns() - started
+        blocks = sys.getallocatedblocks() - blocks_before
+        gc.enable()
+
+        decoded = sum(parser.raw_wave.total for parser in parsers) + len(results)
+        run = {
+            'packets_per_s': decoded / (elapsed_ns / 1e9),
+            'mb_per_s': total_bytes / (elapsed_ns / 1e9) / 1e6,
+            'p50_us': percentile(latencies, 0.5) / 1000 if latencies else 0.0,
+            'p99_us': percentile(latencies, 0.99) / 1000 if latencies else 0.0,
+            'blocks_per_packet': blocks / decoded if decoded else 0.0,
+            'packets': decoded,
+        }
+        if best is None or run['packets_per_s'] > best['packets_per_s']:
+            best = run
+        del results
+
+    return best
+
+
+def bench_reference(repeat: int) -> float:
+    """
+    Carga fixa que não depende do código do bridge (checksum byte a byte em
+    Python puro sobre 256 KB), medida na mesma execução: MB/s da melhor rodada
+    """
+    data = bytes(range(256)) * 1024
+    best = 0.0
+
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        checksum = 0
+        for byte in data:
+            checksum = (checksum + byte) & 0xFF
+        elapsed_ns = time.perf_counter_ns() - started
+        best = max(best, len(data) / (elapsed_ns / 1e9) / 1e6)
+
+    return best
+
+
+def bench_send(encoding: str, frames: int, repeat: int):
+    """Custo de formatar e serializar frames (sem WebSocket)"""
+    bridge = EEGBridge(session_id='661e8400-e29b-41d4-a716-446655440000')
+    student_id = '550e8400-e29b-41d4-a716-446655440000'
+    parser = ThinkGearParser()
+    samples = parser.parse_packets(build_stream('clean', 1))
+    timestamp_ms = int(time.time() * 1000)
+    best = None
+
+    for _ in range(repeat):
+        latencies = []
+        total_bytes = 0
+        gc.disable()
+        started = time.perf_counter_ns()
+
+        for index in range(frames):
+            eeg_data = samples[index % len(samples)]
+            call_started = time.perf_counter_ns()
+            data = bridge.format_eeg_data(eeg_data, student_id, timestamp_ms)
+            if encoding == 'json':
+                message = json.dumps({'event': 'eeg:data', 'data': data})
+            else:
+                message = encode_frame(1, timestamp_ms, data)
+            latencies.append(time.perf_counter_ns() - call_started)
+            total_bytes += len(message)
+
+        elapsed_ns = time.perf_counter_ns() - started
+        gc.enable()
+        run = {
+            'packets_per_s': frames / (elapsed_ns / 1e9),
+            'mb_per_s': total_bytes / (elapsed_ns / 1e9) / 1e6,
+            'p50_us': percentile(latencies, 0.5) / 1000,
+            'p99_us': percentile(latencies, 0.99) / 1000,
+            'bytes_per_frame': total_bytes / frames,
+            'packets': frames,
+        }
+        if best is None or run['packets_per_s'] > best['packets_per_s']:
+            best = run
+
+    return best
+
+
+def with_reference(bench, repeat: int):
+    """Roda um cenário entre duas medições da carga de referência (vale a melhor)"""
+    before = bench_reference(repeat)
+    result = bench()
+    result['reference_mb_per_s'] = max(before, bench_reference(repeat))
+    return result
+
+
+def scenarios(args) -> dict:
+    """Cenário → função que o mede (com referência); chamada de novo para confirmar regressões"""
+    streams = {
+        'parser/clean': [build_stream('clean', args.seconds)],
+        'parser/garbage': [build_stream('garbage', args.seconds)],
+        'parser/raw': [build_stream('raw', args.seconds)],
+        'parser/raw-x64': [build_stream('raw', max(1, args.seconds // 8), seed=device) for device in range(64)],
+    }
+    if args.capture:
+        streams['parser/capture'] = [Path(args.capture).read_bytes()]
+
+    benches = {
+        name: (lambda built=built: with_reference(lambda: bench_parser(built, args.repeat), args.repeat))
+        for name, built in streams.items()
+    }
+    for encoding in ('json', 'binary'):
+        benches[f'send/{encoding}'] = (
+            lambda encoding=encoding: with_reference(lambda: bench_send(encoding, args.frames, args.repeat), args.repeat)
+        )
+    return benches
+
+
+def machine_scale(current, previous) -> float:
+    """
+    Velocidade da máquina agora em relação à do baseline, pela carga de
+    referência medida junto do cenário (1.0 se o baseline não tem referência)
+    """
+    if not previous.get('reference_mb_per_s'):
+        return 1.0
+    return current['reference_mb_per_s'] / previous['reference_mb_per_s']
+
+
+def compare(results, baseline, threshold: float) -> list:
+    """Retorna a lista de regressões (cenário, descrição) em relação ao baseline escalado pela referência"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        scale = machine_scale(current, previous)
+        expected = previous['packets_per_s'] * scale
+        if current['packets_per_s'] < expected * (1 - threshold):
+            regressions.append((name, f"vazão {current['packets_per_s']:.0f}/s < baseline {expected:.0f}/s"))
+        expected_p99 = previous['p99_us'] / scale
+        if expected_p99 and current['p99_us'] > expected_p99 * (1 + threshold):
+            regressions.append((name, f"p99 {current['p99_us']:.2f} µs > baseline {expected_p99:.2f} µs"))
+    return regressions
+
+
+def report(results, baseline):
+    previous = baseline.get('results', {})
+    print(
+        f"{'cenário':18s} {'pacotes/s':>12s} {'MB/s':>8s} {'p50 µs':>8s} {'p99 µs':>8s} "
+        f"{'blocos/pct':>10s} {'máquina':>8s} {'vs base':>8s}"
+    )
+    for name, result in results.items():
+        base = previous.get(name)
+        scale = machine_scale(result, base) if base else 1.0
+        delta = f"{(result['packets_per_s'] / (base['packets_per_s'] * scale) - 1) * 100:+.0f}%" if base else '-'
+        print(
+            f"{name:18s} {result['packets_per_s']:12.0f} {result['mb_per_s']:8.2f} "
+            f"{result['p50_us']:8.2f} {result['p99_us']:8.2f} "
+            f"{result.get('blocks_per_packet', 0.0):10.2f} {scale:7.2f}x {delta:>8s}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks do parser e do envio do EEG Bridge')
+    parser.add_argument('--seconds', type=int, default=60, help='Segundos de stream sintético por cenário')
+    parser.add_argument('--frames', type=int, default=50_000, help='Frames nos cenários de envio')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições (vale a melhor)')
+    parser.add_argument('--capture', help='Captura gravada para o cenário parser/capture')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Regressão tolerada (0.2 = 20%%)')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='Vezes que um cenário com regressão é medido de novo antes de falhar')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Arquivo de baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='Gravar os resultados como novo baseline')
+    parser.add_argument('--output', help='Gravar os resultados desta execução em JSON')
+    args = parser.parse_args()
+
+    # Checksums inválidos são esperados nos cenários com ruído
+    logger.setLevel(logging.ERROR)
+
+    benches = scenarios(args)
+    results = {name: bench() for name, bench in benches.items()}
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+    document = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+        'results': results,
+    }
+
+    report(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(document, indent=2))
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(document, indent=2) + '\n')
+        print(f"\nBaseline atualizado: {baseline_path}")
+        return 0
+
+    referenced = all('reference_mb_per_s' in result for result in baseline.get('results', {}).values())
+    if baseline and not referenced and baseline.get('machine') != document['machine']:
+        # Baseline antigo, sem referência: números absolutos de outra máquina não são comparáveis
+        print(f"\n⚠️  Baseline gravado em outra máquina ({baseline.get('machine')}) e sem referência; "
+              f"rode --update-baseline. Comparação ignorada")
+        return 0
+
+    # Antes de falhar, medir de novo (com nova referência) os cenários que regrediram:
+    # uma máquina compartilhada ocupada durante um único cenário não é regressão
+    regressions = compare(results, baseline, args.threshold)
+    for _ in range(args.retries):
+        regressed = sorted({name for name, _ in regressions})
+        if not regressed:
+            break
+        print(f"\n🔁 Medindo de novo: {', '.join(regressed)}")
+        rerun = {name: benches[name]() for name in regressed}
+        report(rerun, baseline)
+        results.update(rerun)
+        regressions = compare(results, baseline, args.threshold)
+
+    if regressions:
+        print("\n❌ Regressões:")
+        for name, regression in regressions:
+            print(f"   {name}: {regression}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência serial → parser do EEG Bridge
+
+Cria um dispositivo falso com um pseudo-terminal (pty), escreve pacotes
+ThinkGear em intervalos fixos e mede o tempo entre a escrita de cada pacote
+e o momento em que o parser o entrega, comparando:
+
+- polling: leitura antiga (run_in_executor + read(256) com timeout=1 + sleep(0.01))
+- event:   SerialReader (thread dedicada + asyncio.Queue)
+
+Uso (Linux/macOS, requer pyserial):
+    python benchmarks/bench_serial_latency.py --packets 300 --interval 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import pty
+import statistics
+import sys
+import threading
+import time
+import tty
+from pathlib import Path
+
+import serial
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eeg_bridge import SerialReader, ThinkGearParser  # noqa: E402
+from simulator import make_packet  # noqa: E402
+
+
+def sequence_packet(sequence: int) -> bytes:
+    """Pacote com o número de sequência codificado em attention/meditation"""
+    return make_packet(bytes([0x04, sequence & 0x7F, 0x05, (sequence >> 7) & 0x7F]))
+
+
+def open_fake_device():
+    """Abre um par pty e retorna (fd do lado 'headset', caminho do lado 'serial')"""
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    return master, os.ttyname(slave)
+
+
+def start_writer(master: int, packets: int, interval: float, sent_at: list):
+    def write():
+        time.sleep(0.2)  # Dar tempo ao leitor de começar
+        for sequence in range(packets):
+            sent_at[sequence] = time.perf_counter()
+            os.write(master, sequence_packet(sequence))
+            time.sleep(interval)
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return thread
+
+
+def record(parser: ThinkGearParser, data: bytes, sent_at: list, latencies: list):
+    now = time.perf_counter()
+    for eeg_data in parser.parse_packets(data):
+        sequence = eeg_data['attention'] | (eeg_data['relaxation'] << 7)
+        latencies.append((now - sent_at[sequence]) * 1000)
+
+
+async def run_polling(master: int, port: str, packets: int, interval: float) -> list:
+    conn = serial.Serial(port, 57600, timeout=1)
+    parser = ThinkGearParser()
+    sent_at, latencies = [0.0] * packets, []
+    writer = start_writer(master, packets, interval, sent_at)
+    loop = asyncio.get_running_loop()
+
+    while writer.is_alive() or len(latencies) < packets:
+        data = await loop.run_in_executor(None, conn.read, 256)
+        if not data and not writer.is_alive():
+            break
+        record(parser, data, sent_at, latencies)
+        await asyncio.sleep(0.01)
+
+    conn.close()
+    return latencies
+
+
+async def run_event(master: int, port: str, packets: int, interval: float) -> list:
+    conn = serial.Serial(port, 57600, timeout=SerialReader.READ_TIMEOUT)
+    parser = ThinkGearParser()
+    reader = SerialReader(conn, name=port)
+    reader.start()
+    sent_at, latencies = [0.0] * packets, []
+    writer = start_writer(master, packets, interval, sent_at)
+
+    while len(latencies) < packets:
+        try:
+            data = await asyncio.wait_for(reader.read(), timeout=2.0)
+        except asyncio.TimeoutError:
+            break
+        if data is None:
+            break
+        record(parser, data, sent_at, latencies)
+
+    writer.join()
+    await reader.stop()
+    conn.close()
+    return latencies
+
+
+def report(mode: str, latencies: list, packets: int):
+    if not latencies:
+        print(f"{mode:8s} nenhum pacote recebido")
+        return
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{mode:8s} pacotes={len(latencies)}/{packets}  "
+        f"p50={statistics.median(ordered):7.2f} ms  p99={p99:7.2f} ms  max={ordered[-1]:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de latência serial do EEG Bridge')
+    parser.add_argument('--packets', type=int, default=300, help='Pacotes por modo')
+    parser.add_argument('--interval', type=float, default=0.01, help='Intervalo entre pacotes (s)')
+    parser.add_argument('--mode', choices=['polling', 'event', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = ['polling', 'event'] if args.mode == 'both' else [args.mode]
+    runners = {'polling': run_polling, 'event': run_event}
+
+    for mode in modes:
+        master, port = open_fake_device()
+        latencies = asyncio.run(runners[mode](master, port, args.packets, args.interval))
+        os.close(master)
+        report(mode, latencies, args.packets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Bridge Metrics - NeuroOne
+Contadores e histogramas do caminho quente do bridge
+
+Os contadores do parser (bytes lidos, pacotes, checksums inválidos, bytes
+descartados na ressincronização) são inteiros simples mantidos sempre pelo
+ThinkGearParser e lidos apenas na coleta. Os histogramas (tempo de parse,
+latência leitura serial → envio, tempo de send no WebSocket) só são
+alimentados quando o bridge roda com --metrics-port ou --metrics-interval.
+
+Exposição:
+- GET http://127.0.0.1:<porta>/metrics  (formato texto do Prometheus)
+- resumo periódico no log (--metrics-interval)
+
+Com isso dá para separar, por aluno, atraso do link do headset (leitura
+parada, checksums), do parser (tempo de parse) ou da rede (send/fila).
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger('EEGBridge')
+
+# Limites dos buckets (segundos)
+PARSE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Histograma de buckets fixos (acumulado só na renderização)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimativa pelo limite superior do bucket (0 se vazio)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class BridgeMetrics:
+    """Histogramas por aluno e renderização no formato do Prometheus"""
+
+    def __init__(self):
+        self.parse_seconds: Dict[str, Histogram] = {}
+        self.read_to_send_seconds: Dict[str, Histogram] = {}
+        self.ws_send_seconds = Histogram(LATENCY_BUCKETS)
+
+    def observe_parse(self, student_id: str, seconds: float):
+        histogram = self.parse_seconds.get(student_id)
+        if histogram is None:
+            histogram = self.parse_seconds[student_id] = Histogram(PARSE_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_read_to_send(self, student_id: str, seconds: float):
+        histogram = self.read_to_send_seconds.get(student_id)
+        if histogram is None:
+            histogram = self.read_to_send_seconds[student_id] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def render(self, bridge) -> str:
+        """Texto de exposição do Prometheus com o estado atual do bridge"""
+        lines = []
+        now = time.monotonic_ns()
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP eeg_bridge_{name} {help_text}")
+            lines.append(f"# TYPE eeg_bridge_{name} {kind}")
+
+        devices = list(bridge.devices.values())
+        parser_counters = (
+            ('bytes_read_total', 'bytes_read', 'Bytes lidos da serial'),
+            ('packets_total', 'packets', 'Pacotes ThinkGear válidos'),
+            ('checksum_errors_total', 'checksum_errors', 'Pacotes descartados por checksum inválido'),
+            ('resync_bytes_total', 'resync_bytes', 'Bytes descartados procurando SYNC'),
+        )
+        for name, attribute, help_text in parser_counters:
+            metric(name, 'counter', help_text)
+            for device in devices:
+                lines.append(f"eeg_bridge_{name}{_labels(device)} {getattr(device.parser, attribute)}")
+
+        metric('serial_idle_seconds', 'gauge', 'Segundos desde a última leitura da serial')
+        for device in devices:
+            if device.last_read is not None:
+                lines.append(f"eeg_bridge_serial_idle_seconds{_labels(device)} {(now - device.last_read) / 1e9:.3f}")
+
+        metric('reader_queue_depth', 'gauge', 'Leituras aguardando o parser')
+        for device in devices:
+            if device.reader is not None:
+                lines.append(f"eeg_bridge_reader_queue_depth{_labels(device)} {device.reader.queue.qsize()}")
+
+        metric('artifact_frames_total', 'counter', 'Frames retidos ou marcados pelo ArtifactFilter, por motivo')
+        for device in devices:
+            labels = _labels(device)[1:-1]
+            for reason, count in device.artifacts.stats.items():
+                if reason != 'passed':
+                    lines.append(f'eeg_bridge_artifact_frames_total{{{labels},reason="{reason}"}} {count}')
+
+        by_student = {device.student_id: device for device in devices}
+        for name, histograms, help_text in (
+            ('parse_seconds', self.parse_seconds, 'Tempo de parse + bandas por leitura'),
+            ('read_to_send_seconds', self.read_to_send_seconds, 'Latência leitura serial → envio no WebSocket'),
+        ):
+            metric(name, 'histogram', help_text)
+            for student_id, histogram in histograms.items():
+                device = by_student.get(student_id)
+                labels = _labels(device) if device else f'{{student="{_escape(student_id)}"}}'
+                _render_histogram(lines, f"eeg_bridge_{name}", labels, histogram)
+
+        metric('ws_send_seconds', 'histogram', 'Duração de cada send no WebSocket')
+        _render_histogram(lines, 'eeg_bridge_ws_send_seconds', '', self.ws_send_seconds)
+
+        stats = bridge.scheduler.stats
+        for key, help_text in (
+            ('frames', 'Frames recebidos pelo scheduler'),
+            ('messages', 'Mensagens enviadas'),
+            ('merged', 'Frames mesclados antes do envio'),
+            ('dropped', 'Frames descartados'),
+        ):
+            metric(f'scheduler_{key}_total', 'counter', help_text)
+            lines.append(f"eeg_bridge_scheduler_{key}_total {stats[key]}")
+
+        metric('send_queue_depth', 'gauge', 'Frames aguardando o SendScheduler')
+        lines.append(f"eeg_bridge_send_queue_depth {bridge.scheduler.pending}")
+
+        metric('backlog_frames', 'gauge', 'Frames guardados em disco aguardando reenvio')
+        lines.append(f"eeg_bridge_backlog_frames {len(bridge.store) if bridge.store is not None else 0}")
+
+        metric('connected', 'gauge', '1 se o envio ao vivo está ativo')
+        lines.append(f"eeg_bridge_connected {int(bridge.connected)}")
+
+        if bridge.aggregator is not None:
+            metric('aggregate_late_frames_total', 'counter', 'Frames descartados por chegarem depois da janela agregada')
+            lines.append(f"eeg_bridge_aggregate_late_frames_total {bridge.aggregator.late}")
+
+        metric('clock_offset_ms', 'gauge', 'Diferença de relógio backend - bridge (--clock-sync)')
+        lines.append(f"eeg_bridge_clock_offset_ms {bridge.clock.offset_ms}")
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, bridge) -> str:
+        """Resumo de uma linha por aluno para o log periódico"""
+        now = time.monotonic_ns()
+        parts = []
+        for device in bridge.devices.values():
+            parser = device.parser
+            parse = self.parse_seconds.get(device.student_id)
+            latency = self.read_to_send_seconds.get(device.student_id)
+            idle = (now - device.last_read) / 1e9 if device.last_read is not None else float('nan')
+            parts.append(
+                f"{device.student_id}: {parser.packets} pct, {parser.checksum_errors} chk, "
+                f"ocioso {idle:.1f}s, parse p99 {parse.quantile(0.99) * 1000 if parse else 0:.2f}ms, "
+                f"envio p99 {latency.quantile(0.99) * 1000 if latency else 0:.0f}ms"
+            )
+        parts.append(
+            f"fila {bridge.scheduler.pending}, ws p99 {self.ws_send_seconds.quantile(0.99) * 1000:.0f}ms"
+        )
+        return ' | '.join(parts)
+
+
+def _escape(value) -> str:
+    """Escapa um valor de label como pede o formato de exposição (\\, \" e quebra de linha)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(device) -> str:
+    return f'{{student="{_escape(device.student_id)}",port="{_escape(device.serial_port)}"}}'
+
+
+def _render_histogram(lines, name: str, labels: str, histogram: Histogram):
+    inner = labels[1:-1] + ',' if labels else ''
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{inner}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{inner}le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{labels} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{labels} {histogram.count}")
+
+
+class MetricsServer:
+    """Servidor HTTP mínimo (asyncio) que responde GET /metrics"""
+
+    def __init__(self, metrics: BridgeMetrics, bridge, port: int, host: str = '127.0.0.1'):
+        self.metrics = metrics
+        self.bridge = bridge
+        self.port = port
+        self.host = host
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"📈 Métricas em http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # Descartar os headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5.0)) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1].split(b'?')[0] == b'/metrics':
+                status = '200 OK'
+                body = self.metrics.render(self.bridge).encode()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                status = '404 Not Found'
+                body = b'not found\n'
+                content_type = 'text/plain'
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -11,14 +11,28 @@ Autor: NeuroOne Team
 Data: 2025-11-17
 """
 
+import argparse
 import asyncio
+import os
+import random
+import threading
+import time
 import websockets
 import json
 import serial
 import struct
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any
+from array import array
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from aggregates import WindowAggregator
+from artifact_filter import ArtifactFilter, ARTIFACT_MODES
+from bridge_metrics import BridgeMetrics, MetricsServer
+from frame_store import FrameStore
+from session_clock import SessionClock, iso_ms
+from simulator import is_virtual_port, open_virtual_port
+from wire_format import WIRE_ENCODING, encode_frame, encode_batch
 
 # Configuração de logging
 logging.basicConfig(
@@ -28,10 +42,158 @@ logging.basicConfig(
 logger = logging.getLogger('EEGBridge')
 
 
+# Campos produzidos pelo BandPowerEngine (band_power.py), enviados em `bandPower`
+BAND_POWER_FIELDS = (
+    'delta', 'theta', 'alpha', 'beta', 'gamma',
+    'relativeAlpha', 'relativeBeta', 'thetaBetaRatio', 'alphaThetaRatio', 'attentionIndex',
+)
+
+
+class RawWaveBuffer:
+    """
+    Buffer circular pré-alocado para as amostras brutas (0x80) do ThinkGear
+
+    Cada amostra é gravada duas vezes (posição i e i + capacity), então os
+    últimos N valores estão sempre contíguos na memória e latest() devolve
+    uma memoryview sem cópia. Nenhuma alocação é feita por amostra.
+    """
+
+    SAMPLE_RATE = 512  # Hz (TGAM / MindWave)
+
+    def __init__(self, seconds: float = 4.0, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.capacity = max(1, int(seconds * sample_rate))
+        self._data = array('h', bytes(4 * self.capacity))  # 2x capacity, int16
+        self._view = memoryview(self._data)
+        self._index = 0
+        self.total = 0  # Amostras recebidas desde o início (nunca volta a zero)
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, sample: int):
+        """Adiciona uma amostra int16"""
+        data = self._data
+        index = self._index
+        data[index] = sample
+        data[index + self.capacity] = sample
+        index += 1
+        self._index = 0 if index == self.capacity else index
+        self.total += 1
+
+    def extend(self, samples: List[int]):
+        """Adiciona várias amostras int16 de uma vez (mesmo resultado que append() em sequência)"""
+        count = len(samples)
+        capacity = self.capacity
+        if count > capacity:
+            samples = samples[count - capacity:]
+        kept = len(samples)
+
+        start = (self._index + count - kept) % capacity
+        first = min(kept, capacity - start)
+        values = memoryview(array('h', samples))
+        view = self._view
+
+        view[start:start + first] = values[:first]
+        view[start + capacity:start + capacity + first] = values[:first]
+        if kept > first:
+            view[0:kept - first] = values[first:]
+            view[capacity:capacity + kept - first] = values[first:]
+
+        self._index = (start + kept) % capacity
+        self.total += count
+
+    def latest(self, count: Optional[int] = None) -> memoryview:
+        """
+        Retorna uma view (sem cópia) das últimas `count` amostras, da mais antiga
+        para a mais recente. A view é sobrescrita por novas amostras; quem
+        precisar guardar os valores deve copiá-los.
+        """
+        available = len(self)
+        count = available if count is None else min(count, available)
+        end = self._index + self.capacity
+        return self._view[end - count:end]
+
+    def clear(self):
+        self._index = 0
+        self.total = 0
+
+
+class EEGReading:
+    """
+    Estado decodificado de um headset, com um atributo por campo ThinkGear
+
+    Os atributos têm os mesmos nomes das chaves JSON usadas no resto do
+    bridge (None = ainda não recebido); get(), [] e `in` permitem usar o
+    registro onde antes circulava um dict.
+    """
+
+    __slots__ = (
+        'signalQuality', 'attention', 'relaxation', 'blinkStrength',
+        'delta', 'theta', 'lowAlpha', 'highAlpha', 'lowBeta', 'highBeta', 'lowGamma', 'midGamma',
+    )
+
+    def __init__(self):
+        self.signalQuality = self.attention = self.relaxation = self.blinkStrength = None
+        self.delta = self.theta = self.lowAlpha = self.highAlpha = None
+        self.lowBeta = self.highBeta = self.lowGamma = self.midGamma = None
+
+    def copy(self) -> 'EEGReading':
+        other = EEGReading.__new__(EEGReading)
+        other.signalQuality = self.signalQuality
+        other.attention = self.attention
+        other.relaxation = self.relaxation
+        other.blinkStrength = self.blinkStrength
+        other.delta = self.delta
+        other.theta = self.theta
+        other.lowAlpha = self.lowAlpha
+        other.highAlpha = self.highAlpha
+        other.lowBeta = self.lowBeta
+        other.highBeta = self.highBeta
+        other.lowGamma = self.lowGamma
+        other.midGamma = self.midGamma
+        return other
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _READING_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def keys(self) -> List[str]:
+        return [key for key in self.__slots__ if getattr(self, key) is not None]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"EEGReading({self.as_dict()})"
+
+
+_READING_FIELDS = frozenset(EEGReading.__slots__)
+
+# 8 bandas do 0x83 (uint24 big-endian) lidas como 8 x (uint8, uint16) em um único unpack
+_EEG_POWER = struct.Struct('>' + 'BH' * 8)
+
+
 class ThinkGearParser:
     """
     Parser para o protocolo ThinkGear (Neurosky)
     Baseado na documentação: ThinkGear Communications Protocol
+
+    Os valores decodificados são gravados em um único EEGReading reutilizado
+    (last_data); só pacotes que mudam algum campo geram uma cópia na saída.
+    Pacotes de raw wave vão direto para o RawWaveBuffer, sem alocação.
     """
 
     # Payload IDs
@@ -42,13 +204,65 @@ class ThinkGearParser:
     RAW_WAVE = 0x80
     EEG_POWER = 0x83
 
-    def __init__(self):
-        self.buffer = bytearray()
-        self.last_data = {}
+    # Prefixo de código estendido (ignorado) e início dos códigos com length
+    EXCODE = 0x55
+    MULTI_BYTE_CODE = 0x80
+
+    # Bytes de sincronização e limites do protocolo
+    SYNC = 0xAA
+    SYNC_BYTES = b'\xAA\xAA'
+    MAX_PAYLOAD_LENGTH = 169
+
+    # Capacidade do buffer circular (bytes). Um pacote tem no máximo 173 bytes.
+    BUFFER_CAPACITY = 4096
+
+    def __init__(self, buffer_capacity: int = BUFFER_CAPACITY, raw_seconds: float = 4.0):
+        if buffer_capacity < 2 * (self.MAX_PAYLOAD_LENGTH + 4):
+            raise ValueError(f"buffer_capacity muito pequeno: {buffer_capacity}")
+
+        # Buffer de capacidade fixa com offsets de leitura/escrita.
+        # Nunca é redimensionado: bytes consumidos só avançam self._start,
+        # e a compactação copia apenas o pacote incompleto pendente.
+        self.buffer = bytearray(buffer_capacity)
+        self._view = memoryview(self.buffer)
+        self._start = 0
+        self._end = 0
+        self.last_data = EEGReading()
+
+        # Contadores lidos pelas métricas (bridge_metrics.py)
+        self.bytes_read = 0
+        self.packets = 0
+        self.checksum_errors = 0
+        self.resync_bytes = 0
+        self.blinks = 0  # Pacotes 0x16 (lido pelo ArtifactFilter)
+
+        # Últimos `raw_seconds` segundos do sinal bruto a 512 Hz
+        self.raw_wave = RawWaveBuffer(raw_seconds)
+
+        # Tabela código → decoder(payload, offset, length) -> True se mudou last_data
+        self._decoders: List[Optional[Callable[[memoryview, int, int], bool]]] = [None] * 256
+        self._decoders[self.POOR_SIGNAL_QUALITY] = self._decode_signal_quality
+        self._decoders[self.ATTENTION] = self._decode_attention
+        self._decoders[self.MEDITATION] = self._decode_meditation
+        self._decoders[self.BLINK_STRENGTH] = self._decode_blink
+        self._decoders[self.RAW_WAVE] = self._decode_raw_wave
+        self._decoders[self.EEG_POWER] = self._decode_eeg_power
+
+    def parse_packet(self, data: bytes) -> Optional[EEGReading]:
+        """
+        Parseia os pacotes ThinkGear disponíveis e retorna o estado mais recente
+
+        Mantido por compatibilidade: consome todos os pacotes completos
+        (ver parse_packets) e retorna apenas o último resultado, que já
+        acumula os valores anteriores em last_data.
+        """
+        packets = self.parse_packets(data)
+        return packets[-1] if packets else None
 
-    def parse_packet(self, data: bytes) -> Optional[Dict[str, Any]]:
+    def parse_packets(self, data: bytes) -> List[EEGReading]:
         """
-        Parseia um pacote ThinkGear e retorna os dados EEG
+        Parseia todos os pacotes ThinkGear completos e retorna uma cópia de
+        last_data para cada pacote que alterou algum campo
 
         Formato do pacote:
         [SYNC][SYNC][PLENGTH][PAYLOAD...][CHECKSUM]
@@ -57,101 +271,195 @@ class ThinkGearParser:
         PLENGTH = tamanho do payload (1 byte)
         PAYLOAD = dados TLV (Type-Length-Value)
         CHECKSUM = 1 byte
-        """
-        self.buffer.extend(data)
 
-        while len(self.buffer) >= 4:
+        Bytes de um pacote incompleto ficam no buffer até a próxima chamada.
+        """
+        results: List[EEGReading] = []
+        incoming = memoryview(data)
+        self.bytes_read += len(incoming)
+
+        while incoming:
+            written = self._feed(incoming)
+            incoming = incoming[written:]
+            self._extract_packets(results)
+
+        return results
+
+    @property
+    def pending(self) -> int:
+        """Quantidade de bytes aguardando o restante de um pacote"""
+        return self._end - self._start
+
+    def _feed(self, data: memoryview) -> int:
+        """Copia o máximo possível de data para o buffer e retorna quantos bytes foram copiados"""
+        capacity = len(self.buffer)
+
+        if self._end == capacity or len(data) > capacity - self._end:
+            # Compactar: mover o pacote pendente para o início (mesmo tamanho, sem realocar)
+            pending = self._end - self._start
+            if self._start:
+                self.buffer[0:pending] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = pending
+
+        count = min(len(data), capacity - self._end)
+        self.buffer[self._end:self._end + count] = data[:count]
+        self._end += count
+        return count
+
+    def _extract_packets(self, results: List[EEGReading]):
+        """Extrai todos os pacotes completos entre self._start e self._end"""
+        buf = self.buffer
+        view = self._view
+        samples: List[int] = []  # Amostras brutas, gravadas no RawWaveBuffer de uma vez
+        pos = self._start
+        end = self._end
+        packets = 0
+        skipped = 0
+
+        while end - pos >= 4:
             # Procurar por SYNC bytes (0xAA 0xAA)
-            if self.buffer[0] != 0xAA or self.buffer[1] != 0xAA:
-                # Remover byte inválido e continuar
-                self.buffer.pop(0)
+            if buf[pos] != self.SYNC or buf[pos + 1] != self.SYNC:
+                sync = buf.find(self.SYNC_BYTES, pos + 1, end)
+                if sync < 0:
+                    # Manter um 0xAA final, que pode ser metade de um SYNC
+                    sync = end - 1 if buf[end - 1] == self.SYNC else end
+                    skipped += sync - pos
+                    pos = sync
+                    break
+                skipped += sync - pos
+                pos = sync
                 continue
 
             # Ler tamanho do payload
-            payload_length = self.buffer[2]
+            payload_length = buf[pos + 2]
+            if payload_length > self.MAX_PAYLOAD_LENGTH:
+                # PLENGTH == 0xAA é um SYNC extra; maior que isso é inválido
+                skipped += 1
+                pos += 1
+                continue
 
             # Verificar se temos o pacote completo
-            packet_length = 4 + payload_length  # SYNC(2) + PLENGTH(1) + PAYLOAD + CHECKSUM(1)
-            if len(self.buffer) < packet_length:
+            packet_end = pos + 4 + payload_length  # SYNC(2) + PLENGTH(1) + PAYLOAD + CHECKSUM(1)
+            if packet_end > end:
                 # Aguardar mais dados
-                return None
-
-            # Extrair pacote completo
-            packet = self.buffer[:packet_length]
-            self.buffer = self.buffer[packet_length:]
+                break
+
+            # Caminho rápido: pacote só com uma amostra bruta (512 por segundo)
+            if payload_length == 4 and buf[pos + 3] == 0x80 and buf[pos + 4] == 2:
+                high = buf[pos + 5]
+                low = buf[pos + 6]
+                checksum = buf[pos + 7]
+                calculated_checksum = ~(0x82 + high + low) & 0xFF
+                pos = packet_end
+                if calculated_checksum != checksum:
+                    self.checksum_errors += 1
+                    logger.warning("Checksum inválido: esperado %d, recebido %d", calculated_checksum, checksum)
+                    continue
+
+                packets += 1
+                value = (high << 8) | low
+                samples.append(value - 0x10000 if value & 0x8000 else value)
+                continue
 
-            # Verificar checksum
-            payload = packet[3:-1]  # Payload sem SYNC, PLENGTH e CHECKSUM
-            checksum = packet[-1]
+            # Verificar checksum (memoryview: sem copiar o payload)
+            payload = view[pos + 3:packet_end - 1]
+            checksum = buf[packet_end - 1]
+            pos = packet_end
 
             calculated_checksum = (~sum(payload) & 0xFF)
             if calculated_checksum != checksum:
-                logger.warning(f"Checksum inválido: esperado {calculated_checksum}, recebido {checksum}")
+                self.checksum_errors += 1
+                logger.warning("Checksum inválido: esperado %d, recebido %d", calculated_checksum, checksum)
                 continue
 
-            # Parsear payload
-            eeg_data = self._parse_payload(payload)
-            if eeg_data:
-                return eeg_data
-
-        return None
+            packets += 1
+
+            # Parsear payload (amostras pendentes antes, para manter a ordem do sinal bruto)
+            if samples:
+                self.raw_wave.extend(samples)
+                samples.clear()
+            if self._parse_payload(payload):
+                results.append(self.last_data.copy())
+
+        if samples:
+            self.raw_wave.extend(samples)
+        self.packets += packets
+        self.resync_bytes += skipped
+        self._start = pos
+        if pos == end:
+            # Buffer vazio: voltar ao início sem copiar nada
+            self._start = self._end = 0
+
+    def _parse_payload(self, payload: memoryview) -> bool:
+        """
+        Parseia o payload TLV (Type-Length-Value) em last_data
 
-    def _parse_payload(self, payload: bytes) -> Optional[Dict[str, Any]]:
-        """Parseia o payload TLV (Type-Length-Value)"""
-        data = {}
+        Códigos < 0x80 têm 1 byte de valor; a partir de 0x80 o código é
+        seguido de um byte de length, usado também para pular códigos
+        desconhecidos sem perder o alinhamento do restante do payload.
+        Retorna True se algum campo de last_data mudou.
+        """
+        decoders = self._decoders
+        size = len(payload)
+        updated = False
         i = 0
 
-        while i < len(payload):
+        while i < size:
             code = payload[i]
-            i += 1
-
-            # Códigos de 1 byte (sem length)
-            if code == self.POOR_SIGNAL_QUALITY:
-                data['signalQuality'] = 200 - payload[i] if i < len(payload) else 0
-                i += 1
-
-            elif code == self.ATTENTION:
-                data['attention'] = payload[i] if i < len(payload) else 0
-                i += 1
-
-            elif code == self.MEDITATION:
-                data['relaxation'] = payload[i] if i < len(payload) else 0  # Meditation = Relaxation
-                i += 1
-
-            elif code == self.BLINK_STRENGTH:
-                data['blinkStrength'] = payload[i] if i < len(payload) else 0
-                i += 1
-
-            # Códigos multi-byte (com length)
-            elif code == self.EEG_POWER:
-                length = payload[i] if i < len(payload) else 0
+            if code == self.EXCODE:
                 i += 1
-                if length == 24:  # 8 bandas x 3 bytes cada
-                    eeg_powers = self._parse_eeg_power(payload[i:i+24])
-                    data.update(eeg_powers)
-                i += length
+                continue
 
-            elif code == self.RAW_WAVE:
-                length = payload[i] if i < len(payload) else 0
+            if code < self.MULTI_BYTE_CODE:
+                length = 1
                 i += 1
-                # Raw wave (não usado no neurofeedback básico)
-                i += length
-
             else:
-                # Código desconhecido, pular
-                logger.debug(f"Código desconhecido: 0x{code:02X}")
-                i += 1
-
-        # Atualizar last_data e retornar apenas se temos novos dados
-        if data:
-            self.last_data.update(data)
-            return self.last_data.copy()
-
-        return None
-
-    def _parse_eeg_power(self, data: bytes) -> Dict[str, int]:
+                if i + 1 >= size:
+                    break
+                length = payload[i + 1]
+                i += 2
+
+            if i + length > size:
+                logger.debug("Payload truncado no código 0x%02X", code)
+                break
+
+            decoder = decoders[code]
+            if decoder is None:
+                logger.debug("Código desconhecido: 0x%02X (%d bytes)", code, length)
+            elif decoder(payload, i, length):
+                updated = True
+            i += length
+
+        return updated
+
+    def _decode_signal_quality(self, payload: memoryview, i: int, length: int) -> bool:
+        self.last_data.signalQuality = 200 - payload[i]
+        return True
+
+    def _decode_attention(self, payload: memoryview, i: int, length: int) -> bool:
+        self.last_data.attention = payload[i]
+        return True
+
+    def _decode_meditation(self, payload: memoryview, i: int, length: int) -> bool:
+        self.last_data.relaxation = payload[i]  # Meditation = Relaxation
+        return True
+
+    def _decode_blink(self, payload: memoryview, i: int, length: int) -> bool:
+        self.last_data.blinkStrength = payload[i]
+        self.blinks += 1
+        return True
+
+    def _decode_raw_wave(self, payload: memoryview, i: int, length: int) -> bool:
+        if length == 2:
+            # Amostra bruta: int16 big-endian com sinal
+            value = (payload[i] << 8) | payload[i + 1]
+            self.raw_wave.append(value - 0x10000 if value & 0x8000 else value)
+        return False
+
+    def _decode_eeg_power(self, payload: memoryview, i: int, length: int) -> bool:
         """
-        Parseia os valores de potência das bandas EEG (8 bandas x 3 bytes)
+        Potência das bandas EEG (8 bandas x uint24 big-endian)
 
         Bandas:
         - Delta (0.5-2.75Hz)
@@ -163,125 +471,847 @@ class ThinkGearParser:
         - Low Gamma (31-39.75Hz)
         - Mid Gamma (41-49.75Hz)
         """
-        if len(data) != 24:
-            return {}
-
-        def read_uint24(offset):
-            """Lê um inteiro de 24 bits (big-endian)"""
-            return (data[offset] << 16) | (data[offset+1] << 8) | data[offset+2]
-
-        return {
-            'delta': read_uint24(0),
-            'theta': read_uint24(3),
-            'lowAlpha': read_uint24(6),
-            'highAlpha': read_uint24(9),
-            'lowBeta': read_uint24(12),
-            'highBeta': read_uint24(15),
-            'lowGamma': read_uint24(18),
-            'midGamma': read_uint24(21),
-        }
+        if length != 24:
+            return False
+
+        v = _EEG_POWER.unpack_from(payload, i)
+        reading = self.last_data
+        reading.delta = v[0] << 16 | v[1]
+        reading.theta = v[2] << 16 | v[3]
+        reading.lowAlpha = v[4] << 16 | v[5]
+        reading.highAlpha = v[6] << 16 | v[7]
+        reading.lowBeta = v[8] << 16 | v[9]
+        reading.highBeta = v[10] << 16 | v[11]
+        reading.lowGamma = v[12] << 16 | v[13]
+        reading.midGamma = v[14] << 16 | v[15]
+        return True
+
+
+class SerialReader:
+    """
+    Leitura orientada a eventos de uma porta serial
 
+    Uma thread dedicada fica bloqueada em read() e entrega cada rajada de
+    bytes a uma asyncio.Queue assim que ela chega, sem polling nem sleep
+    no event loop. Funciona com qualquer objeto com a interface de
+    serial.Serial (read, in_waiting, close, is_open).
+    """
 
-class EEGBridge:
+    # Timeout do read() bloqueante: limita o tempo para a thread perceber stop()
+    READ_TIMEOUT = 0.1
+
+    def __init__(self, serial_conn, name: str = 'serial'):
+        self.serial_conn = serial_conn
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # time.monotonic_ns() de cada leitura na thread, na mesma ordem da fila
+        self._read_times: deque = deque()
+        self.read_ns: Optional[int] = None  # chegada da última rajada retornada por read()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._run, name=f"reader-{self.name}", daemon=True)
+        self._thread.start()
+
+    async def read(self) -> Optional[bytes]:
+        """Aguarda a próxima rajada de bytes. Retorna None quando a leitura terminou."""
+        data = await self.queue.get()
+        if data is not None:
+            self.read_ns = self._read_times.popleft()
+        return data
+
+    async def stop(self):
+        """Para a thread de leitura (volta em até READ_TIMEOUT segundos)"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
+    def _run(self):
+        conn = self.serial_conn
+        deliver = self.queue.put_nowait
+        read_times = self._read_times
+        try:
+            while not self._stop.is_set():
+                # Bloqueia até o primeiro byte e depois pega o que já chegou
+                data = conn.read(1)
+                if not data:
+                    continue
+                waiting = conn.in_waiting
+                if waiting:
+                    data += conn.read(waiting)
+                read_times.append(time.monotonic_ns())
+                self._loop.call_soon_threadsafe(deliver, data)
+        except Exception as e:
+            if not self._stop.is_set():
+                logger.error(f"Erro ao ler serial {self.name}: {e}")
+        finally:
+            try:
+                self._loop.call_soon_threadsafe(deliver, None)
+            except RuntimeError:
+                pass  # Event loop já encerrado
+
+
+class EEGDevice:
     """
-    Ponte entre dispositivos EEG e Node.js backend
+    Um headset EEG ligado ao bridge: porta serial, parser e aluno associado
     """
 
     def __init__(
         self,
-        serial_port: str = 'COM3',
+        serial_port: str,
+        student_id: str,
         baud_rate: int = 57600,
-        backend_url: str = 'ws://localhost:3001',
-        student_id: Optional[str] = None,
-        session_id: Optional[str] = None
+        raw_seconds: float = 4.0,
+        band_power_hz: float = 0.0,
+        min_quality: int = 0,
+        artifact_mode: str = 'flag'
     ):
         self.serial_port = serial_port
-        self.baud_rate = baud_rate
-        self.backend_url = backend_url
         self.student_id = student_id
-        self.session_id = session_id
+        self.baud_rate = baud_rate
+
+        self.parser = ThinkGearParser(raw_seconds=raw_seconds)
+
+        # Bandas calculadas no próprio bridge a partir do sinal bruto (opcional, requer numpy)
+        self.band_power = None
+        self.band_data: Dict[str, Any] = {}
+        if band_power_hz > 0:
+            from band_power import BandPowerEngine
+            self.band_power = BandPowerEngine(self.parser.raw_wave, update_hz=band_power_hz)
+
+        # Qualidade de sinal, piscadas/saturação e supressão de frames repetidos
+        self.artifacts = ArtifactFilter(self.parser, min_quality=min_quality, mode=artifact_mode)
 
-        self.parser = ThinkGearParser()
         self.serial_conn: Optional[serial.Serial] = None
-        self.websocket: Optional[websockets.WebSocketClientProtocol] = None
-        self.running = False
+        self.reader: Optional[SerialReader] = None
+        self.task: Optional[asyncio.Task] = None
+        self.joined = False  # student:join deve ser (re)enviado a cada conexão
+        self.last_read: Optional[int] = None  # time.monotonic_ns() da última leitura
 
     async def connect_serial(self):
         """Conecta ao dispositivo EEG via Serial/Bluetooth"""
         try:
             logger.info(f"Conectando à porta serial {self.serial_port}...")
             # Serial connection é bloqueante, executar em thread
+            if is_virtual_port(self.serial_port):
+                # Dispositivo simulado ou replay (simulator.py)
+                def open_port():
+                    return open_virtual_port(self.serial_port, timeout=SerialReader.READ_TIMEOUT)
+            else:
+                def open_port():
+                    return serial.Serial(self.serial_port, self.baud_rate, timeout=SerialReader.READ_TIMEOUT)
+
             loop = asyncio.get_event_loop()
-            self.serial_conn = await loop.run_in_executor(
-                None,
-                lambda: serial.Serial(self.serial_port, self.baud_rate, timeout=1)
-            )
-            logger.info(f"✅ Conectado à porta {self.serial_port}")
+            self.serial_conn = await loop.run_in_executor(None, open_port)
+            logger.info(f"✅ Conectado à porta {self.serial_port} (aluno {self.student_id})")
+
+            self.reader = SerialReader(self.serial_conn, name=self.serial_port)
+            self.reader.start()
         except Exception as e:
-            logger.error(f"❌ Erro ao conectar à porta serial: {e}")
+            logger.error(f"❌ Erro ao conectar à porta serial {self.serial_port}: {e}")
             raise
 
+    async def read_serial(self) -> Optional[bytes]:
+        """Aguarda os próximos bytes do dispositivo (None quando a leitura terminou)"""
+        return await self.reader.read()
+
+    def process(self, raw_data: bytes) -> List[Dict[str, Any]]:
+        """Parseia uma leitura e retorna os dados EEG a enviar"""
+        frames = [self._with_band_power(eeg_data) for eeg_data in self.parser.parse_packets(raw_data)]
+
+        # Novo passo da janela deslizante do sinal bruto
+        if self.band_power:
+            band_data = self.band_power.update()
+            if band_data:
+                self.band_data = band_data
+                frames.append(self._with_band_power(self.parser.last_data))
+
+        return self.artifacts.apply(frames)
+
+    def _with_band_power(self, eeg_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Anexa o último resultado do BandPowerEngine em `bandPower` (sem tocar nas bandas do 0x83)"""
+        if not self.band_data:
+            return eeg_data
+        return {**eeg_data, 'bandPower': self.band_data}
+
+    async def close(self):
+        if self.reader:
+            await self.reader.stop()
+            self.reader = None
+
+        if self.serial_conn and self.serial_conn.is_open:
+            self.serial_conn.close()
+            logger.info(f"Porta serial {self.serial_port} fechada")
+
+
+class SendScheduler:
+    """
+    Agenda o envio dos dados EEG respeitando o rate limit do backend
+
+    Todos os headsets compartilham o mesmo socket; o backend aceita 300
+    eeg:data/min por aluno que entrou por ele (middleware rateLimit). O
+    scheduler envia no máximo `max_rate` mensagens por segundo:
+
+    - modo padrão: guarda só o estado mais recente de cada aluno (frames
+      que chegam entre dois envios são mesclados) e envia um eeg:data por
+      vez, em rodízio entre os alunos pendentes;
+    - modo batch: acumula os frames e envia um único eeg:batch com todos
+      os alunos a cada intervalo.
+
+    No modo padrão cada aluno é atualizado a cada N / max_rate segundos
+    (N = alunos enviando): com 30 headsets a 4/s, ~7.5 s. O limite não
+    cresce sozinho com a sala; o eeg:batch mantém a taxa de todos os
+    alunos com uma mensagem por intervalo.
+    """
+
+    # Intervalo (s) entre os logs de estatísticas de envio
+    STATS_INTERVAL = 60.0
+
+    # Frames guardados por aluno entre dois eeg:batch (os mais antigos são descartados)
+    MAX_BATCH_FRAMES = 64
+
+    # Intervalo (s) por aluno no modo padrão acima do qual o bridge avisa no log
+    SLOW_UPDATE_WARNING = 2.0
+
+    def __init__(
+        self,
+        flush: Callable[[List[Tuple[str, Any]]], Awaitable[None]],
+        max_rate: float = 4.0,
+        batch: bool = False
+    ):
+        self.flush = flush
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.batch = batch
+
+        self._pending: Dict[str, Any] = {}  # student_id → frame (deque no modo batch)
+        self._ready = asyncio.Event()
+        self._resumed = asyncio.Event()  # Limpo por hold(): frames continuam sendo mesclados
+        self._resumed.set()
+        self.stats = {'frames': 0, 'messages': 0, 'merged': 0, 'dropped': 0}
+
+    def submit(self, student_id: str, frame: Any):
+        """Enfileira um frame; no modo padrão substitui o frame pendente do aluno"""
+        self.stats['frames'] += 1
+
+        if self.batch:
+            frames = self._pending.get(student_id)
+            if frames is None:
+                frames = self._pending[student_id] = deque(maxlen=self.MAX_BATCH_FRAMES)
+            elif len(frames) == frames.maxlen:
+                self.stats['dropped'] += 1
+            frames.append(frame)
+        else:
+            if student_id in self._pending:
+                self.stats['merged'] += 1
+            self._pending[student_id] = frame
+
+        self._ready.set()
+
+    def hold(self):
+        """Suspende os envios (ex.: enquanto o backlog usa o rate limit); submit() continua aceitando frames"""
+        self._resumed.clear()
+
+    def release(self):
+        self._resumed.set()
+
+    def update_interval(self, students: int) -> float:
+        """Intervalo (s) entre duas atualizações de um mesmo aluno com `students` alunos enviando"""
+        if self.batch:
+            return self.interval
+        return self.interval * students
+
+    @property
+    def pending(self) -> int:
+        """Frames aguardando envio"""
+        if self.batch:
+            return sum(len(frames) for frames in self._pending.values())
+        return len(self._pending)
+
+    def _take(self) -> List[Tuple[str, Any]]:
+        if self.batch:
+            items = [(student_id, frame) for student_id, frames in self._pending.items() for frame in frames]
+            self._pending.clear()
+        else:
+            # Aluno pendente há mais tempo primeiro (ordem de inserção do dict)
+            student_id = next(iter(self._pending))
+            items = [(student_id, self._pending.pop(student_id))]
+
+        if not self._pending:
+            self._ready.clear()
+        return items
+
+    async def run(self):
+        """Loop de envio (executar como task)"""
+        loop = asyncio.get_running_loop()
+        last_send = -self.interval
+        last_stats = loop.time()
+
+        while True:
+            await self._ready.wait()
+            await self._resumed.wait()
+
+            delay = last_send + self.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            items = self._take()
+            last_send = loop.time()
+            await self._send(items)
+
+            if last_send - last_stats >= self.STATS_INTERVAL:
+                last_stats = last_send
+                self.log_stats()
+
+    async def drain(self):
+        """Envia o que estiver pendente, sem esperar o intervalo (usado ao encerrar)"""
+        while self._pending:
+            await self._send(self._take())
+
+    async def _send(self, items: List[Tuple[str, Any]]):
+        try:
+            await self.flush(items)
+            self.stats['messages'] += 1
+        except Exception as e:
+            self.stats['dropped'] += len(items)
+            logger.error(f"Erro ao enviar dados EEG: {e}")
+
+    def log_stats(self):
+        stats = self.stats
+        logger.info(
+            f"📤 Envio: {stats['frames']} frames, {stats['messages']} mensagens, "
+            f"{stats['merged']} mesclados, {stats['dropped']} descartados"
+        )
+
+
+class EEGBridge:
+    """
+    Ponte entre dispositivos EEG e Node.js backend
+
+    Um único processo atende vários headsets (mapa porta → aluno) e
+    multiplexa todos os fluxos sobre uma única conexão WebSocket. Headsets
+    podem ser adicionados/removidos em execução com attach_device() e
+    detach_device(), ou editando o arquivo passado em config_path.
+
+    Se o WebSocket cair, os frames vão para um FrameStore em disco e a
+    conexão é refeita com backoff exponencial; ao reconectar, o backlog é
+    reenviado em lotes eeg:batch antes de voltar ao envio ao vivo.
+    """
+
+    # Intervalo (s) para reler o arquivo de configuração da sala
+    CONFIG_POLL_INTERVAL = 5.0
+
+    # Backoff da reconexão (s)
+    RECONNECT_BASE_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 30.0
+
+    # Frames lidos do FrameStore por vez ao reenviar o backlog (um eeg:batch por leitura)
+    REPLAY_BATCH_SIZE = 200
+
+    # Sincronização de relógio com o backend: rodadas de ping a cada N segundos
+    CLOCK_SYNC_INTERVAL = 30.0
+    CLOCK_SYNC_PINGS = 4
+
+    # Intervalo (s) para fechar e enviar janelas agregadas, e quantas guardar sem conexão
+    AGGREGATE_INTERVAL = 1.0
+    MAX_PENDING_AGGREGATES = 50_000
+
+    def __init__(
+        self,
+        serial_port: str = 'COM3',
+        baud_rate: int = 57600,
+        backend_url: str = 'ws://localhost:3001',
+        student_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        raw_seconds: float = 4.0,
+        band_power_hz: float = 0.0,
+        devices: Optional[Dict[str, str]] = None,
+        config_path: Optional[str] = None,
+        max_send_rate: float = 4.0,
+        batch: bool = False,
+        wire: str = 'json',
+        buffer_path: Optional[str] = None,
+        recording_dir: Optional[str] = None,
+        min_quality: int = 0,
+        artifact_mode: str = 'flag',
+        aggregate_resolutions: Optional[List[int]] = None,
+        clock_sync: bool = False,
+        metrics_port: Optional[int] = None,
+        metrics_interval: float = 0.0
+    ):
+        self.baud_rate = baud_rate
+        self.backend_url = backend_url
+        self.session_id = session_id
+        self.raw_seconds = raw_seconds
+        self.band_power_hz = band_power_hz
+        self.min_quality = min_quality
+        self.artifact_mode = artifact_mode
+        self.config_path = config_path
+
+        # Mapa porta serial → student_id desejado (modo de um único headset por padrão)
+        self.device_map: Dict[str, str] = dict(devices or {})
+        if not self.device_map and student_id:
+            self.device_map[serial_port] = student_id
+        self._config_mtime: Optional[float] = None
+        self._warned_devices = 0  # Tamanho da sala já avisado em _check_send_rate
+
+        self.devices: Dict[str, EEGDevice] = {}
+        self.websocket: Optional[websockets.WebSocketClientProtocol] = None
+        self.running = False
+
+        # Envio com rate limit compartilhado por todos os headsets
+        self.scheduler = SendScheduler(self._flush_frames, max_rate=max_send_rate, batch=batch)
+        self._scheduler_task: Optional[asyncio.Task] = None
+
+        # Formato binário (wire_format.py) negociado por aluno no student:join
+        self.wire = wire
+        self.stream_ids: Dict[str, int] = {}
+
+        # Store-and-forward: connected só fica True depois que o backlog foi reenviado
+        self.store = FrameStore(buffer_path) if buffer_path else None
+        self.connected = False
+        self._connection_task: Optional[asyncio.Task] = None
+
+        # Gravação colunar da sessão (session_recorder.py, requer numpy)
+        self.recording_dir = recording_dir
+        self.recorder = None
+
+        # Base de tempo da sessão (session_clock.py), opcionalmente sincronizada com o backend
+        self.clock = SessionClock()
+        self.clock_sync = clock_sync
+        self._warned_no_pong = False
+
+        # Agregados por janela (aggregates.py) enviados em eeg:aggregate
+        self.aggregator = WindowAggregator(aggregate_resolutions) if aggregate_resolutions else None
+        self._pending_aggregates: deque = deque(maxlen=self.MAX_PENDING_AGGREGATES)
+        self._aggregate_task: Optional[asyncio.Task] = None
+
+        # Histogramas do caminho quente (bridge_metrics.py); None = desativado
+        self.metrics = BridgeMetrics() if metrics_port or metrics_interval > 0 else None
+        self.metrics_port = metrics_port
+        self.metrics_interval = metrics_interval
+        self._metrics_server: Optional[MetricsServer] = None
+        self._metrics_task: Optional[asyncio.Task] = None
+
     async def connect_websocket(self):
-        """Conecta ao Node.js WebSocket backend"""
+        """Conecta ao Node.js WebSocket backend (uma conexão para todos os headsets)"""
         try:
             logger.info(f"Conectando ao backend {self.backend_url}...")
             # TODO: Adicionar autenticação JWT aqui
             self.websocket = await websockets.connect(self.backend_url)
             logger.info("✅ Conectado ao backend WebSocket")
-
-            # Enviar mensagem de join como student
-            await self.websocket.send(json.dumps({
-                'event': 'student:join',
-                'data': {
-                    'sessionId': self.session_id,
-                    'studentId': self.student_id,
-                }
-            }))
         except Exception as e:
             logger.error(f"❌ Erro ao conectar ao WebSocket: {e}")
             raise
 
-    async def read_serial(self):
-        """Lê dados da porta serial de forma assíncrona"""
-        loop = asyncio.get_event_loop()
+    async def _send_event(self, event: str, data: Dict[str, Any]):
+        if not self.websocket:
+            raise ConnectionError("WebSocket não conectado")
+        await self.websocket.send(json.dumps({'event': event, 'data': data}))
+
+    async def _receive_loop(self):
+        """Processa as mensagens do backend (confirmações de join e erros)"""
         try:
-            data = await loop.run_in_executor(
-                None,
-                self.serial_conn.read,
-                256  # Ler até 256 bytes por vez
-            )
-            return data
+            async for message in self.websocket:
+                if isinstance(message, bytes):
+                    continue
+
+                try:
+                    event = json.loads(message)
+                except ValueError:
+                    logger.debug("Mensagem não-JSON ignorada: %.80s", message)
+                    continue
+
+                data = event.get('data') or {}
+                if event.get('event') == 'student:joined':
+                    self._on_student_joined(data)
+                elif event.get('event') == 'clock:pong':
+                    if self.clock.on_pong(data):
+                        logger.debug("🕒 Offset do backend: %d ms (atraso %.0f ms)", self.clock.offset_ms, self.clock.delay_ms)
+                elif event.get('event') == 'error':
+                    logger.warning(f"⚠️  Backend: {data.get('message')}")
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"Conexão com o backend encerrada: {e}")
+
+    def _on_student_joined(self, data: Dict[str, Any]):
+        """Ativa o formato binário para o aluno se o backend aceitou"""
+        student_id = data.get('studentId')
+        stream_id = data.get('streamId')
+
+        if (
+            self.wire == WIRE_ENCODING
+            and data.get('encoding') == WIRE_ENCODING
+            and student_id
+            and isinstance(stream_id, int)
+        ):
+            self.stream_ids[student_id] = stream_id
+            logger.info(f"🔢 Aluno {student_id}: formato binário (stream {stream_id})")
+
+    async def attach_device(self, serial_port: str, student_id: str):
+        """Adiciona um headset em execução e começa a ler dele"""
+        if serial_port in self.devices:
+            if self.devices[serial_port].student_id == student_id:
+                return
+            await self.detach_device(serial_port)
+
+        device = EEGDevice(
+            serial_port,
+            student_id,
+            baud_rate=self.baud_rate,
+            raw_seconds=self.raw_seconds,
+            band_power_hz=self.band_power_hz,
+            min_quality=self.min_quality,
+            artifact_mode=self.artifact_mode
+        )
+        self.devices[serial_port] = device
+        device.task = asyncio.create_task(self._device_loop(device))
+
+    async def detach_device(self, serial_port: str):
+        """Remove um headset em execução e avisa o backend"""
+        device = self.devices.pop(serial_port, None)
+        if not device:
+            return
+
+        if device.task and device.task is not asyncio.current_task():
+            device.task.cancel()
+            try:
+                await device.task
+            except asyncio.CancelledError:
+                pass
+
+        await device.close()
+        if self.aggregator is not None and not any(
+            other.student_id == device.student_id for other in self.devices.values()
+        ):
+            self.aggregator.remove(device.student_id)
+        logger.info(f"⏏️  Headset {serial_port} removido (aluno {device.student_id})")
+
+    async def _device_loop(self, device: EEGDevice):
+        """Loop de leitura e envio de um headset"""
+        try:
+            await device.connect_serial()
+
+            # Enviar mensagem de join como student (reenviada a cada reconexão)
+            device.joined = True
+            await self._send_join(device)
+
+            while self.running:
+                # Aguardar dados do dispositivo EEG (acordado pela thread de leitura)
+                raw_data = await device.read_serial()
+                if raw_data is None:
+                    logger.warning(f"Leitura de {device.serial_port} encerrada")
+                    break
+
+                # Timestamp da chegada na serial, não do processamento
+                read_ns = device.last_read = device.reader.read_ns
+                timestamp_ms = self.clock.epoch_ms(read_ns)
+                if self.metrics is None:
+                    frames = device.process(raw_data)
+                else:
+                    parse_started = time.perf_counter()
+                    frames = device.process(raw_data)
+                    self.metrics.observe_parse(device.student_id, time.perf_counter() - parse_started)
+
+                for eeg_data in frames:
+                    # Agendar envio para o backend
+                    self.scheduler.submit(device.student_id, (eeg_data, timestamp_ms, read_ns))
+
+                # Gravar todos os frames (antes da mescla do scheduler) e o sinal bruto
+                if self.recorder is not None:
+                    for eeg_data in frames:
+                        self.recorder.record(device.student_id, timestamp_ms, eeg_data)
+                    self.recorder.record_raw(device.student_id, timestamp_ms, device.parser.raw_wave)
+
+                # Agregados por janela, sem frames marcados como artefato
+                if self.aggregator is not None and frames:
+                    for eeg_data in frames:
+                        if 'artifacts' not in eeg_data:
+                            self.aggregator.add(device.student_id, timestamp_ms, eeg_metrics(eeg_data))
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao ler serial: {e}")
-            return b''
+            logger.error(f"❌ Erro no headset {device.serial_port}: {e}")
+        finally:
+            self.stream_ids.pop(device.student_id, None)
+            if device.joined and self.connected:
+                try:
+                    await self._send_event('student:leave', {
+                        'sessionId': self.session_id,
+                        'studentId': device.student_id,
+                    })
+                except Exception as e:
+                    logger.warning(f"Erro ao enviar student:leave: {e}")
+
+            await device.close()
+            if self.devices.get(device.serial_port) is device:
+                del self.devices[device.serial_port]
+
+    async def _send_join(self, device: EEGDevice):
+        """Envia student:join do headset; sem conexão, fica para a reconexão"""
+        join_data = {
+            'sessionId': self.session_id,
+            'studentId': device.student_id,
+        }
+        if self.wire == WIRE_ENCODING:
+            join_data['encodings'] = [WIRE_ENCODING, 'json']
 
-    async def send_eeg_data(self, eeg_data: Dict[str, Any]):
-        """Envia dados EEG para o backend Node.js"""
-        if not self.websocket:
+        try:
+            await self._send_event('student:join', join_data)
+        except (websockets.ConnectionClosed, OSError) as e:
+            logger.debug("student:join de %s adiado: %s", device.student_id, e)
+
+    async def _connection_loop(self):
+        """Mantém a conexão com o backend, com backoff exponencial entre tentativas"""
+        attempt = 0
+
+        while self.running:
+            try:
+                await self.connect_websocket()
+            except Exception:
+                delay = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)  # Jitter: salas inteiras não reconectam juntas
+                attempt += 1
+                logger.info(f"🔄 Nova tentativa de conexão em {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            self.stream_ids.clear()
+            receiver = asyncio.create_task(self._receive_loop())
+            clock_sync = asyncio.create_task(self._clock_sync_loop()) if self.clock_sync else None
+            try:
+                for device in list(self.devices.values()):
+                    if device.joined:
+                        await self._send_join(device)
+
+                # O backlog usa o rate limit sozinho; frames ao vivo ficam no scheduler (mesclados)
+                self.scheduler.hold()
+                await self._replay_backlog()
+                self.connected = True
+                self.scheduler.release()
+                logger.info("📡 Envio ao vivo")
+
+                # _receive_loop termina quando a conexão cai
+                await receiver
+            except (websockets.ConnectionClosed, OSError) as e:
+                logger.warning(f"Conexão com o backend perdida: {e}")
+            finally:
+                self.connected = False
+                self.scheduler.release()
+                receiver.cancel()
+                if clock_sync is not None:
+                    clock_sync.cancel()
+
+    async def _clock_sync_loop(self):
+        """Rodadas de clock:ping enquanto a conexão estiver aberta (respostas em _receive_loop)"""
+        while True:
+            for _ in range(self.CLOCK_SYNC_PINGS):
+                try:
+                    await self._send_event('clock:ping', self.clock.ping())
+                except (websockets.ConnectionClosed, OSError):
+                    return
+                await asyncio.sleep(0.25)
+            await asyncio.sleep(self.CLOCK_SYNC_INTERVAL)
+
+            if self.clock.delay_ms is None and not self._warned_no_pong:
+                self._warned_no_pong = True
+                logger.warning(
+                    "⚠️  Nenhum clock:pong do backend; os timestamps seguem o relógio do bridge "
+                    "(o backend precisa tratar clock:ping)"
+                )
+
+    async def _replay_backlog(self):
+        """
+        Reenvia os frames guardados em lotes eeg:batch com "replay": true
+
+        O backend grava o lote em um único insert sem atualizar o dashboard,
+        então o reenvio leva poucos intervalos do scheduler em vez do tempo
+        que a conexão ficou fora. Frames de outra sessão ou de alunos que
+        não estão mais conectados são descartados antes (o backend os
+        rejeitaria). Cada linha só é apagada do FrameStore depois de enviada.
+        """
+        if self.store is None or not len(self.store):
+            return
+
+        student_ids = {device.student_id for device in self.devices.values()}
+        purged = self.store.purge(self.session_id, student_ids)
+        if purged:
+            logger.warning(f"🗑️  {purged} frames guardados descartados (outra sessão ou aluno desconectado)")
+        if not len(self.store):
             return
 
+        logger.info(f"⏪ Reenviando {len(self.store)} frames guardados (eeg:batch)...")
+        header = '{"event":"eeg:batch","data":{"sessionId":%s,"replay":true,"samples":[' % json.dumps(self.session_id)
+
+        while True:
+            rows = self.store.read_batch(self.REPLAY_BATCH_SIZE)
+            if not rows:
+                break
+
+            # Frames já estão em JSON: montar a mensagem sem decodificar de novo
+            await self.websocket.send(header + ','.join(row[2] for row in rows) + ']}}')
+            self.store.delete_upto(rows[-1][0])
+            await asyncio.sleep(self.scheduler.interval)
+
+        logger.info("⏪ Backlog reenviado")
+
+    async def _aggregate_loop(self):
+        """Fecha as janelas agregadas e as envia em eeg:aggregate (guardadas enquanto desconectado)"""
+        while True:
+            await asyncio.sleep(self.AGGREGATE_INTERVAL)
+            self._pending_aggregates.extend(self.aggregator.collect(self.clock.epoch_ms()))
+            if self.connected and self._pending_aggregates:
+                await self._send_aggregates()
+
+    async def _send_aggregates(self):
+        windows = list(self._pending_aggregates)
+        try:
+            await self._send_event('eeg:aggregate', {
+                'sessionId': self.session_id,
+                'windows': windows,
+            })
+            self._pending_aggregates.clear()
+            logger.debug("📊 %d janelas agregadas enviadas", len(windows))
+        except (websockets.ConnectionClosed, OSError) as e:
+            logger.debug("eeg:aggregate adiado: %s", e)
+
+    def _store_frames(self, frames: List[Dict[str, Any]]):
+        """Guarda frames formatados no FrameStore (sem store, eles são descartados)"""
+        if self.store is None:
+            raise ConnectionError("Sem conexão com o backend e sem buffer local")
+        self.store.append([(data['sessionId'], data['studentId'], json.dumps(data)) for data in frames])
+
+    def _load_config(self) -> bool:
+        """Relê o arquivo de configuração se ele mudou. Retorna True se mudou."""
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError as e:
+            logger.warning(f"Arquivo de configuração indisponível: {e}")
+            return False
+
+        if mtime == self._config_mtime:
+            return False
+
+        try:
+            config = load_classroom_config(self.config_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Configuração inválida em {self.config_path}: {e}")
+            return False
+
+        self._config_mtime = mtime
+        self.device_map = config['devices']
+        if config.get('sessionId'):
+            self.session_id = config['sessionId']
+        logger.info(f"📋 Configuração carregada: {len(self.device_map)} headset(s)")
+        return True
+
+    async def _sync_devices(self):
+        """Conecta/desconecta headsets para refletir device_map"""
+        for serial_port in list(self.devices):
+            if serial_port not in self.device_map:
+                await self.detach_device(serial_port)
+
+        for serial_port, student_id in self.device_map.items():
+            await self.attach_device(serial_port, student_id)
+
+        self._check_send_rate()
+
+    def _check_send_rate(self):
+        """Avisa quando o rodízio do modo padrão deixa cada aluno lento demais"""
+        count = len(self.devices)
+        interval = self.scheduler.update_interval(count)
+        if interval <= self.scheduler.SLOW_UPDATE_WARNING or count <= self._warned_devices:
+            return
+
+        self._warned_devices = count
+        logger.warning(
+            f"⚠️  {count} headsets a {1 / self.scheduler.interval:.1f} msg/s: cada aluno é atualizado "
+            f"a cada ~{interval:.1f}s. Use --batch, ou aumente "
+            f"--max-send-rate (o backend aceita 300 eeg:data/min por aluno do bridge)"
+        )
+
+    def format_eeg_data(
+        self,
+        eeg_data: Dict[str, Any],
+        student_id: Optional[str],
+        timestamp_ms: int
+    ) -> Dict[str, Any]:
+        """Formata os dados no formato esperado pelo backend"""
+        data = {
+            'studentId': student_id,
+            'sessionId': self.session_id,
+            'timestamp': iso_ms(timestamp_ms),
+            **eeg_metrics(eeg_data),
+        }
+
+        # Artefatos marcados pelo ArtifactFilter (modo 'flag')
+        if 'artifacts' in eeg_data:
+            data['artifacts'] = eeg_data['artifacts']
+
+        return data
+
+    async def _flush_frames(self, frames: List[Tuple[str, Tuple[Dict[str, Any], int, int]]]):
+        """Envia os frames liberados pelo SendScheduler (eeg:data, eeg:batch ou binário)"""
+        formatted = [
+            self.format_eeg_data(eeg_data, student_id, timestamp)
+            for student_id, (eeg_data, timestamp, _) in frames
+        ]
+
+        # Desconectado ou reenviando backlog: gravar em disco para manter a ordem
+        if not self.connected:
+            self._store_frames(formatted)
+            return
+
+        binary = []
+        text = []
+        for data, (student_id, (_, timestamp, _)) in zip(formatted, frames):
+            stream_id = self.stream_ids.get(student_id)
+            if stream_id is None:
+                text.append(data)
+            else:
+                binary.append(encode_frame(stream_id, timestamp, data))
+
+        metrics = self.metrics
+        send_started = time.monotonic_ns() if metrics is not None else 0
+
         try:
-            # Formatar dados no formato esperado pelo backend
-            payload = {
-                'event': 'eeg:data',
-                'data': {
-                    'studentId': self.student_id,
+            if binary:
+                await self.websocket.send(binary[0] if len(binary) == 1 else encode_batch(binary))
+
+            if text and not self.scheduler.batch:
+                data = text[0]
+                await self._send_event('eeg:data', data)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"📊 Dados enviados ({data['studentId']}): Att={data['attention']}, Rel={data['relaxation']}, Q={data['signalQuality']}")
+            elif text:
+                await self._send_event('eeg:batch', {
                     'sessionId': self.session_id,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'attention': eeg_data.get('attention', 0),
-                    'relaxation': eeg_data.get('relaxation', 0),
-                    'signalQuality': eeg_data.get('signalQuality', 0),
-                    'delta': eeg_data.get('delta', 0),
-                    'theta': eeg_data.get('theta', 0),
-                    'alpha': (eeg_data.get('lowAlpha', 0) + eeg_data.get('highAlpha', 0)) // 2,
-                    'beta': (eeg_data.get('lowBeta', 0) + eeg_data.get('highBeta', 0)) // 2,
-                    'gamma': (eeg_data.get('lowGamma', 0) + eeg_data.get('midGamma', 0)) // 2,
-                }
-            }
-
-            await self.websocket.send(json.dumps(payload))
-            logger.debug(f"📊 Dados enviados: Att={payload['data']['attention']}, Rel={payload['data']['relaxation']}, Q={payload['data']['signalQuality']}")
+                    'samples': text,
+                })
+                logger.debug("📦 Lote enviado: %d frames", len(text))
+
+        except (websockets.ConnectionClosed, OSError) as e:
+            logger.warning(f"Falha ao enviar, guardando {len(formatted)} frames: {e}")
+            self.connected = False
+            self._store_frames(formatted)
+            return
 
+        if metrics is not None:
+            sent = time.monotonic_ns()
+            metrics.ws_send_seconds.observe((sent - send_started) / 1e9)
+            for student_id, (_, _, read_ns) in frames:
+                metrics.observe_read_to_send(student_id, (sent - read_ns) / 1e9)
+
+    async def send_eeg_data(self, eeg_data: Dict[str, Any], student_id: Optional[str] = None):
+        """Envia dados EEG para o backend Node.js imediatamente (sem o SendScheduler)"""
+        if not self.websocket:
+            return
+
+        try:
+            await self._send_event('eeg:data', self.format_eeg_data(eeg_data, student_id, self.clock.epoch_ms()))
         except Exception as e:
             logger.error(f"Erro ao enviar dados EEG: {e}")
 
@@ -290,28 +1320,39 @@ class EEGBridge:
         self.running = True
 
         try:
-            # Conectar ao dispositivo e backend
-            await self.connect_serial()
-            await self.connect_websocket()
+            if self.config_path:
+                self._load_config()
+
+            if self.recording_dir:
+                from session_recorder import SessionRecorder
+                self.recorder = SessionRecorder(self.recording_dir, self.session_id)
+
+            if self.metrics_port:
+                self._metrics_server = MetricsServer(self.metrics, self, self.metrics_port)
+                await self._metrics_server.start()
+            if self.metrics_interval > 0:
+                self._metrics_task = asyncio.create_task(self._log_metrics())
+            if self.aggregator is not None:
+                self._aggregate_task = asyncio.create_task(self._aggregate_loop())
+
+            # Conectar ao backend (com reconexão) e aos dispositivos
+            self._connection_task = asyncio.create_task(self._connection_loop())
+            self._scheduler_task = asyncio.create_task(self.scheduler.run())
+            await self._sync_devices()
 
             logger.info("🚀 EEG Bridge iniciado!")
-            logger.info(f"📡 Lendo dados de {self.serial_port} e enviando para {self.backend_url}")
+            logger.info(f"📡 {len(self.devices)} headset(s) enviando para {self.backend_url}")
 
-            # Loop de leitura e envio
+            # Supervisionar headsets: com arquivo de configuração, aplicar mudanças
+            # em execução; sem ele, encerrar quando todos os headsets pararem
             while self.running:
-                # Ler dados do dispositivo EEG
-                raw_data = await self.read_serial()
-
-                if raw_data:
-                    # Parsear dados ThinkGear
-                    eeg_data = self.parser.parse_packet(raw_data)
-
-                    if eeg_data:
-                        # Enviar para backend
-                        await self.send_eeg_data(eeg_data)
+                if self.config_path:
+                    self._load_config()
+                    await self._sync_devices()
+                elif not self.devices:
+                    break
 
-                # Small delay to avoid busy waiting
-                await asyncio.sleep(0.01)
+                await asyncio.sleep(self.CONFIG_POLL_INTERVAL if self.config_path else 1.0)
 
         except KeyboardInterrupt:
             logger.info("⏹️  Bridge parado pelo usuário")
@@ -320,47 +1361,206 @@ class EEGBridge:
         finally:
             await self.cleanup()
 
+    async def _log_metrics(self):
+        """Resumo periódico das métricas no log (--metrics-interval)"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            logger.info(f"📈 {self.metrics.summary(self)}")
+
     async def cleanup(self):
         """Limpa recursos e fecha conexões"""
         self.running = False
 
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+            self._metrics_server = None
+
+        # Enviar o que ficou pendente no scheduler antes dos student:leave
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+            try:
+                await self._scheduler_task
+            except asyncio.CancelledError:
+                pass
+            self._scheduler_task = None
+            await self.scheduler.drain()
+            self.scheduler.log_stats()
+
+        if self._aggregate_task:
+            self._aggregate_task.cancel()
+            self._aggregate_task = None
+            # Janelas já fechadas; as abertas ficam incompletas e não são enviadas
+            if self.connected and self._pending_aggregates:
+                await self._send_aggregates()
+
+        # Parar headsets (cada um envia seu student:leave)
+        for serial_port in list(self.devices):
+            await self.detach_device(serial_port)
+
+        if self._connection_task:
+            self._connection_task.cancel()
+            try:
+                await self._connection_task
+            except asyncio.CancelledError:
+                pass
+            self._connection_task = None
+
+        if self.recorder is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.recorder.close)
+            self.recorder = None
+
+        if self.store is not None:
+            if len(self.store):
+                logger.info(f"💾 {len(self.store)} frames ficam guardados em {self.store.path} para o próximo envio")
+            self.store.close()
+
         if self.websocket:
             try:
-                await self.websocket.send(json.dumps({
-                    'event': 'student:leave',
-                    'data': {
-                        'sessionId': self.session_id
-                    }
-                }))
                 await self.websocket.close()
                 logger.info("WebSocket desconectado")
             except Exception as e:
                 logger.warning(f"Erro ao fechar WebSocket: {e}")
 
-        if self.serial_conn and self.serial_conn.is_open:
-            self.serial_conn.close()
-            logger.info("Porta serial fechada")
+
+def eeg_metrics(eeg_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Métricas enviadas ao backend a partir de um frame do parser/BandPowerEngine"""
+    metrics = {
+        'attention': eeg_data.get('attention', 0),
+        'relaxation': eeg_data.get('relaxation', 0),
+        'signalQuality': eeg_data.get('signalQuality', 0),
+        'delta': eeg_data.get('delta', 0),
+        'theta': eeg_data.get('theta', 0),
+        'alpha': (eeg_data.get('lowAlpha', 0) + eeg_data.get('highAlpha', 0)) // 2,
+        'beta': (eeg_data.get('lowBeta', 0) + eeg_data.get('highBeta', 0)) // 2,
+        'gamma': (eeg_data.get('lowGamma', 0) + eeg_data.get('midGamma', 0)) // 2,
+    }
+
+    # Bandas calculadas pelo BandPowerEngine (µV², float) vão em um campo próprio:
+    # delta..gamma continuam nas unidades inteiras do 0x83 que o backend grava (BIGINT)
+    band_power = eeg_data.get('bandPower')
+    if band_power:
+        metrics['bandPower'] = {key: band_power[key] for key in BAND_POWER_FIELDS}
+
+    return metrics
+
+
+def load_classroom_config(path: str) -> Dict[str, Any]:
+    """
+    Lê o arquivo JSON da sala:
+
+    {
+        "sessionId": "uuid-da-sessao",
+        "devices": {"COM3": "uuid-aluno-1", "COM4": "uuid-aluno-2"}
+    }
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    devices = config.get('devices')
+    if not isinstance(devices, dict):
+        raise ValueError("'devices' deve ser um objeto porta → studentId")
+
+    return config
+
+
+def parse_device_arg(value: str):
+    """Converte 'PORTA=STUDENT_ID' do argumento --device"""
+    serial_port, sep, student_id = value.rpartition('=')
+    if not sep or not serial_port or not student_id:
+        raise argparse.ArgumentTypeError(f"use PORTA=STUDENT_ID (recebido: {value})")
+    return serial_port, student_id
+
+
+def parse_resolutions(value: str) -> List[int]:
+    """Converte '1,10,60' do argumento --aggregates"""
+    try:
+        resolutions = [int(part) for part in value.split(',') if part.strip()]
+        WindowAggregator(resolutions)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"resoluções inválidas ({value}): {e}")
+    return resolutions
 
 
 def main():
     """Ponto de entrada principal"""
-    import argparse
-
     parser = argparse.ArgumentParser(description='EEG Bridge - NeuroOne')
     parser.add_argument('--port', default='COM3', help='Porta serial do dispositivo EEG')
     parser.add_argument('--baud', type=int, default=57600, help='Baud rate')
     parser.add_argument('--backend', default='ws://localhost:3001', help='URL do backend WebSocket')
-    parser.add_argument('--student-id', required=True, help='ID do aluno (UUID)')
-    parser.add_argument('--session-id', required=True, help='ID da sessão (UUID)')
+    parser.add_argument('--student-id', help='ID do aluno (UUID)')
+    parser.add_argument('--session-id', help='ID da sessão (UUID)')
+    parser.add_argument('--device', action='append', type=parse_device_arg, default=[],
+                        metavar='PORTA=STUDENT_ID', help='Headset adicional (pode repetir)')
+    parser.add_argument('--config', help='Arquivo JSON da sala (porta → aluno), relido em execução')
+    parser.add_argument('--max-send-rate', type=float, default=4.0,
+                        help='Máximo de mensagens por segundo no WebSocket, somando todos os headsets '
+                             '(backend aceita 300 eeg:data/min por aluno; 0 = sem limite). Sem --batch, '
+                             'cada aluno é atualizado a cada N headsets / taxa segundos')
+    parser.add_argument('--batch', action='store_true',
+                        help='Enviar todos os frames de cada intervalo em uma mensagem eeg:batch')
+    parser.add_argument('--wire', choices=['json', WIRE_ENCODING], default='json',
+                        help='Formato dos frames EEG (binary-v1 é negociado no student:join, com JSON como fallback)')
+    parser.add_argument('--buffer-db', default='eeg_buffer.db',
+                        help='Arquivo SQLite onde os frames ficam guardados enquanto o backend está fora')
+    parser.add_argument('--no-buffer', action='store_true', help='Descartar frames quando o backend está fora')
+    parser.add_argument('--record', metavar='DIR',
+                        help='Gravar a sessão (métricas + sinal bruto) em colunas binárias em DIR (requer numpy)')
+    parser.add_argument('--band-power-hz', type=float, default=0.0,
+                        help='Calcular bandas a partir do sinal bruto N vezes por segundo (0 = usar 0x83 do headset)')
+    parser.add_argument('--raw-seconds', type=float, default=4.0, help='Segundos de sinal bruto (512 Hz) mantidos em memória')
+    parser.add_argument('--min-quality', type=int, default=0,
+                        help='signalQuality mínimo (0-200) para um frame ser considerado válido (0 = sem gating)')
+    parser.add_argument('--artifacts', choices=ARTIFACT_MODES, default='flag',
+                        help='Frames com sinal ruim/piscada/saturação: marcar com "artifacts" ou descartar')
+    parser.add_argument('--aggregates', type=parse_resolutions, metavar='1,10,60',
+                        help='Enviar média/mín/máx/desvio por janela (segundos) em eeg:aggregate')
+    parser.add_argument('--clock-sync', action='store_true',
+                        help='Estimar a diferença de relógio com o backend (clock:ping/pong) e usar a base de tempo dele')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Expor métricas no formato do Prometheus em http://127.0.0.1:PORTA/metrics')
+    parser.add_argument('--metrics-interval', type=float, default=0.0,
+                        help='Registrar um resumo das métricas no log a cada N segundos (0 = desativado)')
 
     args = parser.parse_args()
 
+    devices = dict(args.device)
+    if args.student_id:
+        devices.setdefault(args.port, args.student_id)
+
+    session_id = args.session_id
+    if args.config:
+        try:
+            session_id = session_id or load_classroom_config(args.config).get('sessionId')
+        except (OSError, ValueError) as e:
+            parser.error(f"configuração inválida: {e}")
+    elif not devices:
+        parser.error('informe --student-id, --device ou --config')
+
+    if not session_id:
+        parser.error('informe --session-id (ou "sessionId" no arquivo de configuração)')
+
     bridge = EEGBridge(
-        serial_port=args.port,
         baud_rate=args.baud,
         backend_url=args.backend,
-        student_id=args.student_id,
-        session_id=args.session_id
+        session_id=session_id,
+        raw_seconds=args.raw_seconds,
+        band_power_hz=args.band_power_hz,
+        devices=devices,
+        config_path=args.config,
+        max_send_rate=args.max_send_rate,
+        batch=args.batch,
+        wire=args.wire,
+        buffer_path=None if args.no_buffer else args.buffer_db,
+        recording_dir=args.record,
+        min_quality=args.min_quality,
+        artifact_mode=args.artifacts,
+        aggregate_resolutions=args.aggregates,
+        clock_sync=args.clock_sync,
+        metrics_port=args.metrics_port,
+        metrics_interval=args.metrics_interval
     )
 
     asyncio.run(bridge.run())
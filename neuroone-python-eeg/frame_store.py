@@ -0,0 +1,106 @@
+"""
+Frame Store - NeuroOne
+Log persistente dos frames EEG que não puderam ser enviados ao backend
+
+Quando o WebSocket cai, o bridge grava os frames aqui (SQLite em modo WAL,
+só inserts no fim e deletes no início) e, ao reconectar, reenvia o backlog
+em lotes antes de voltar ao envio ao vivo. O arquivo sobrevive a um
+reinício do bridge: o que sobrou é reenviado na próxima conexão, desde que
+seja da mesma sessão e de um aluno ainda conectado (ver purge()).
+"""
+
+import logging
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('EEGBridge')
+
+
+class FrameStore:
+    """
+    Fila FIFO limitada em disco de frames já formatados (JSON)
+
+    Ao passar de `max_frames`, os frames mais antigos são descartados.
+    """
+
+    DEFAULT_MAX_FRAMES = 500_000
+
+    def __init__(self, path: str, max_frames: int = DEFAULT_MAX_FRAMES):
+        self.path = path
+        self.max_frames = max_frames
+        self.dropped = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS frames ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' session_id TEXT,'
+            ' student_id TEXT NOT NULL,'
+            ' data TEXT NOT NULL)'
+        )
+        self._migrate()
+        self.conn.commit()
+
+        self._count = self.conn.execute('SELECT COUNT(*) FROM frames').fetchone()[0]
+        if self._count:
+            logger.info(f"💾 {self._count} frames pendentes em {path}")
+
+    def _migrate(self):
+        """Arquivos de versões anteriores não têm session_id: preencher a partir do JSON"""
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(frames)')]
+        if 'session_id' not in columns:
+            self.conn.execute('ALTER TABLE frames ADD COLUMN session_id TEXT')
+            self.conn.execute("UPDATE frames SET session_id = json_extract(data, '$.sessionId')")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, rows: List[Tuple[Optional[str], str, str]]):
+        """Grava (session_id, student_id, data_json) no fim do log"""
+        with self.conn:
+            self.conn.executemany('INSERT INTO frames (session_id, student_id, data) VALUES (?, ?, ?)', rows)
+            self._count += len(rows)
+
+            excess = self._count - self.max_frames
+            if excess > 0:
+                self.conn.execute(
+                    'DELETE FROM frames WHERE id IN (SELECT id FROM frames ORDER BY id LIMIT ?)',
+                    (excess,)
+                )
+                self._count -= excess
+                self.dropped += excess
+
+    def purge(self, session_id: Optional[str], student_ids: Iterable[str]) -> int:
+        """
+        Remove os frames de outra sessão ou de alunos fora de `student_ids`
+
+        O backend só aceita frames de alunos que entraram pelo socket atual;
+        o que sobrou de uma sessão anterior (ou de um headset removido) não
+        tem para onde ir. Retorna quantos frames foram removidos.
+        """
+        student_ids = list(student_ids)
+        placeholders = ','.join('?' * len(student_ids))
+        with self.conn:
+            deleted = self.conn.execute(
+                f'DELETE FROM frames WHERE session_id IS NOT ? OR student_id NOT IN ({placeholders})',
+                (session_id, *student_ids)
+            ).rowcount
+        self._count -= deleted
+        return deleted
+
+    def read_batch(self, limit: int) -> List[Tuple[int, str, str]]:
+        """Retorna os `limit` frames mais antigos como (id, student_id, data_json)"""
+        return self.conn.execute(
+            'SELECT id, student_id, data FROM frames ORDER BY id LIMIT ?', (limit,)
+        ).fetchall()
+
+    def delete_upto(self, frame_id: int):
+        """Remove os frames já reenviados (id <= frame_id)"""
+        with self.conn:
+            deleted = self.conn.execute('DELETE FROM frames WHERE id <= ?', (frame_id,)).rowcount
+        self._count -= deleted
+
+    def close(self):
+        self.conn.close()
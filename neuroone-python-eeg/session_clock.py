@@ -0,0 +1,114 @@
+"""
+Session Clock - NeuroOne
+Timestamps monotônicos dos frames EEG, comparáveis entre headsets
+
+Cada rajada de bytes é carimbada com time.monotonic_ns() na thread de
+leitura, no momento em que chega da serial. O relógio da sessão converte
+esse valor em epoch ms com um offset capturado uma única vez, então ajustes
+do relógio do sistema durante a aula não geram saltos, e todos os headsets
+do bridge compartilham a mesma base de tempo.
+
+Sincronização opcional com o backend (--clock-sync), estilo NTP sobre o
+WebSocket já aberto:
+
+    bridge  → clock:ping  {t0}
+    backend → clock:pong  {t0, t1, t2}   (t1 = recebido, t2 = enviado; ou serverTime)
+
+offset = ((t1 - t0) + (t2 - t3)) / 2 e atraso = (t3 - t0) - (t2 - t1); vale
+a amostra de menor atraso entre as últimas, o que descarta as que pegaram
+fila na rede.
+
+O offset estimado não é somado de uma vez: o offset aplicado desliza até
+ele a no máximo SLEW_MS_PER_S (como o adjtime do sistema), então os
+timestamps de um headset nunca voltam no tempo. A única exceção é a
+primeira estimativa, aplicada de uma vez se for para frente.
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class SessionClock:
+    """Converte tempos monotônicos (ns) em epoch ms do bridge ou do backend"""
+
+    # Amostras de ping/pong consideradas na estimativa do offset
+    SYNC_SAMPLES = 8
+
+    # Velocidade máxima com que o offset aplicado se aproxima do estimado (ms por segundo)
+    SLEW_MS_PER_S = 10.0
+
+    def __init__(self):
+        self._epoch_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._samples: deque = deque(maxlen=self.SYNC_SAMPLES)  # (atraso, offset) em ms
+        self.offset_ms = 0  # backend - bridge (estimado)
+        self.delay_ms: Optional[float] = None
+        self._synced = False
+        # Trechos do offset aplicado: (início em monotonic ns, offset no início, alvo), em ms.
+        # O anterior é mantido para leituras carimbadas antes do último pong.
+        self._segments: deque = deque([(0, 0.0, 0)], maxlen=2)
+
+    def applied_offset_ms(self, monotonic_ns: Optional[int] = None) -> float:
+        """Offset somado aos timestamps no instante dado (desliza até offset_ms)"""
+        if monotonic_ns is None:
+            monotonic_ns = time.monotonic_ns()
+
+        start_ns, start_offset, target = self._segments[0]
+        for segment in self._segments:
+            if segment[0] <= monotonic_ns:
+                start_ns, start_offset, target = segment
+
+        step = self.SLEW_MS_PER_S * max(0, monotonic_ns - start_ns) / 1e9
+        return start_offset + max(-step, min(step, target - start_offset))
+
+    def local_ms(self, monotonic_ns: Optional[int] = None) -> int:
+        """Epoch ms pelo relógio do bridge (sem a correção do backend)"""
+        if monotonic_ns is None:
+            monotonic_ns = time.monotonic_ns()
+        return (monotonic_ns + self._epoch_offset_ns) // 1_000_000
+
+    def epoch_ms(self, monotonic_ns: Optional[int] = None) -> int:
+        """Epoch ms na base de tempo da sessão (corrigida pelo backend se sincronizado)"""
+        if monotonic_ns is None:
+            monotonic_ns = time.monotonic_ns()
+        offset_ns = round(self.applied_offset_ms(monotonic_ns) * 1_000_000)
+        return (monotonic_ns + self._epoch_offset_ns + offset_ns) // 1_000_000
+
+    def ping(self) -> Dict[str, Any]:
+        return {'t0': self.local_ms()}
+
+    def on_pong(self, data: Dict[str, Any]) -> bool:
+        """Registra uma resposta clock:pong. Retorna True se o offset mudou."""
+        t3 = self.local_ms()
+        try:
+            t0 = int(data['t0'])
+            t1 = int(data.get('t1', data.get('serverTime')))
+            t2 = int(data.get('t2', t1))
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        delay = (t3 - t0) - (t2 - t1)
+        if delay < 0:
+            return False
+        self._samples.append((delay, ((t1 - t0) + (t2 - t3)) / 2))
+
+        best_delay, best_offset = min(self._samples)
+        offset = round(best_offset)
+        changed = offset != self.offset_ms
+        self.offset_ms = offset
+        self.delay_ms = best_delay
+
+        # Novo trecho a partir do offset aplicado agora; só a primeira estimativa para frente salta
+        now_ns = time.monotonic_ns()
+        applied = self.applied_offset_ms(now_ns)
+        if not self._synced and offset > applied:
+            applied = float(offset)
+        self._synced = True
+        self._segments.append((now_ns, applied, offset))
+        return changed
+
+
+def iso_ms(timestamp_ms: int) -> str:
+    """Epoch ms → '2025-11-17T12:00:00.000Z'"""
+    seconds, millis = divmod(timestamp_ms, 1000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{millis:03d}Z'
@@ -0,0 +1,364 @@
+"""
+Session Recorder - NeuroOne
+Gravação colunar da sessão EEG (métricas decodificadas + sinal bruto)
+
+Cada aluno ganha um diretório com uma coluna por arquivo, em binário puro
+little-endian, só com appends:
+
+    <dir>/<sessionId>/<studentId>/
+        meta.json           colunas e tipos
+        timestamp.i8        epoch ms de cada linha de métricas (int64)
+        <métrica>.f4        uma coluna float32 por métrica (NaN = ausente)
+        raw.i2              amostras brutas a 512 Hz (int16)
+        raw_offset.i8       índice da primeira amostra de cada bloco (~128 amostras)
+        raw_timestamp.i8    epoch ms de chegada de cada bloco
+
+Rodar de novo com o mesmo diretório e sessão continua a gravação (os offsets
+do sinal bruto seguem do fim de raw.i2); se a gravação existente tiver outras
+colunas ou arquivos com tamanhos inconsistentes, a nova vai para
+<studentId>.1, <studentId>.2...
+
+A escrita acontece em uma thread própria, em blocos, fora do event loop.
+Para ler, load_recording() mapeia as colunas com numpy.memmap (uma sessão
+de 45 minutos abre em milissegundos) e fatia por intervalo de tempo com
+busca binária no timestamp.
+
+Dependências:
+    pip install numpy
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('EEGBridge')
+
+# Métricas gravadas: eSense e bandas do 0x83
+METRIC_COLUMNS = (
+    'attention', 'relaxation', 'signalQuality', 'blinkStrength',
+    'delta', 'theta', 'lowAlpha', 'highAlpha', 'lowBeta', 'highBeta', 'lowGamma', 'midGamma',
+)
+
+# Bandas calculadas no bridge (campo `bandPower`): coluna gravada -> chave do BandPowerEngine
+BAND_POWER_COLUMNS = {
+    'powerDelta': 'delta', 'powerTheta': 'theta', 'powerAlpha': 'alpha',
+    'powerBeta': 'beta', 'powerGamma': 'gamma',
+    'relativeAlpha': 'relativeAlpha', 'relativeBeta': 'relativeBeta',
+    'thetaBetaRatio': 'thetaBetaRatio', 'alphaThetaRatio': 'alphaThetaRatio',
+    'attentionIndex': 'attentionIndex',
+}
+
+COLUMNS = METRIC_COLUMNS + tuple(BAND_POWER_COLUMNS)
+
+METRIC_DTYPE = np.dtype('<f4')  # uint24 do 0x83 cabe exato em float32
+TIMESTAMP_DTYPE = np.dtype('<i8')
+RAW_DTYPE = np.dtype('<i2')
+
+
+class _StudentRecording:
+    """Blocos em memória de um aluno, entregues à thread de escrita quando cheios"""
+
+    def __init__(self, directory: Path, chunk_rows: int, raw_chunk_samples: int, raw_total: int = 0):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.raw_chunk_samples = raw_chunk_samples
+        self.raw_total = raw_total  # Amostras brutas já gravadas (offset global, inclui execuções anteriores)
+        self.raw_seen = 0   # RawWaveBuffer.total na última captura
+        self.raw_indexed = None  # Offset da última entrada em raw_blocks
+        self._new_metrics()
+        self._new_raw()
+
+    def _new_metrics(self):
+        self.timestamps = np.empty(self.chunk_rows, dtype=TIMESTAMP_DTYPE)
+        self.metrics = np.full((len(COLUMNS), self.chunk_rows), np.nan, dtype=METRIC_DTYPE)
+        self.rows = 0
+
+    def _new_raw(self):
+        self.raw = np.empty(self.raw_chunk_samples, dtype=RAW_DTYPE)
+        self.raw_blocks = []  # (offset, timestamp_ms)
+        self.raw_count = 0
+
+    def take_metrics(self):
+        chunk = (self.timestamps[:self.rows], self.metrics[:, :self.rows])
+        self._new_metrics()
+        return chunk
+
+    def take_raw(self):
+        blocks = np.array(self.raw_blocks, dtype=TIMESTAMP_DTYPE).reshape(-1, 2)
+        chunk = (self.raw[:self.raw_count], blocks[:, 0].copy(), blocks[:, 1].copy())
+        self._new_raw()
+        return chunk
+
+
+class SessionRecorder:
+    """Grava as métricas e o sinal bruto de todos os alunos de uma sessão"""
+
+    # Linhas de métricas / amostras brutas por bloco entregue à thread de escrita
+    CHUNK_ROWS = 256
+    RAW_CHUNK_SAMPLES = 512 * 8
+
+    # Blocos incompletos são gravados pelo menos a cada N segundos
+    FLUSH_INTERVAL = 5.0
+
+    # Amostras brutas por entrada do índice (raw_offset/raw_timestamp): leituras
+    # seguidas da serial (~1 pacote cada) são agrupadas em um bloco de ~0.25 s
+    RAW_INDEX_SAMPLES = 128
+
+    def __init__(self, directory: str, session_id: str):
+        self.directory = Path(directory) / str(session_id)
+        self._students: Dict[str, _StudentRecording] = {}
+        self._last_flush = time.monotonic()
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name='session-recorder', daemon=True)
+        self._thread.start()
+        logger.info(f"🎙️  Gravando sessão em {self.directory}")
+
+    def _student(self, student_id: str) -> _StudentRecording:
+        recording = self._students.get(student_id)
+        if recording is None:
+            directory = self._student_directory(student_id)
+            raw_total = _length(directory / 'raw.i2', RAW_DTYPE) or 0
+            recording = _StudentRecording(directory, self.CHUNK_ROWS, self.RAW_CHUNK_SAMPLES, raw_total)
+            self._students[student_id] = recording
+            self._queue.put(('meta', directory, None))
+        return recording
+
+    def _student_directory(self, student_id: str) -> Path:
+        """
+        Diretório do aluno; uma gravação anterior da mesma sessão só é
+        continuada se for consistente, senão a nova vai para <studentId>.1, .2...
+        """
+        base = self.directory / str(student_id)
+        directory = base
+        suffix = 0
+        while not _can_append(directory):
+            suffix += 1
+            directory = base.with_name(f'{base.name}.{suffix}')
+
+        if suffix:
+            logger.warning(f"⚠️  Gravação em {base} não pode ser continuada (colunas diferentes ou "
+                           f"arquivos com tamanhos inconsistentes); gravando em {directory}")
+        elif (directory / 'meta.json').exists():
+            logger.info(f"🎙️  Continuando a gravação em {directory}")
+        return directory
+
+    def record(self, student_id: str, timestamp_ms: int, eeg_data: Dict[str, Any]):
+        """Adiciona uma linha de métricas"""
+        recording = self._student(student_id)
+        row = recording.rows
+        recording.timestamps[row] = timestamp_ms
+        metrics = recording.metrics
+        for column, name in enumerate(METRIC_COLUMNS):
+            value = eeg_data.get(name)
+            if value is not None:
+                metrics[column, row] = value
+        band_power = eeg_data.get('bandPower')
+        if band_power:
+            for column, key in enumerate(BAND_POWER_COLUMNS.values(), len(METRIC_COLUMNS)):
+                metrics[column, row] = band_power[key]
+        recording.rows = row + 1
+
+        if recording.rows == recording.chunk_rows:
+            self._queue.put(('metrics', recording.directory, recording.take_metrics()))
+        self._maybe_flush()
+
+    def record_raw(self, student_id: str, timestamp_ms: int, raw_wave):
+        """Copia as amostras que chegaram no RawWaveBuffer desde a última chamada"""
+        recording = self._student(student_id)
+        new = raw_wave.total - recording.raw_seen
+        if new <= 0:
+            return
+        recording.raw_seen = raw_wave.total
+
+        samples = np.frombuffer(raw_wave.latest(new), dtype=RAW_DTYPE)
+        if new > len(samples):
+            logger.warning(f"{new - len(samples)} amostras brutas de {student_id} perdidas antes da gravação")
+
+        # Nova entrada no índice só a cada RAW_INDEX_SAMPLES; o timestamp é o da primeira leitura do bloco
+        if recording.raw_indexed is None or recording.raw_total - recording.raw_indexed >= self.RAW_INDEX_SAMPLES:
+            recording.raw_blocks.append((recording.raw_total, timestamp_ms))
+            recording.raw_indexed = recording.raw_total
+
+        while len(samples):
+            space = recording.raw_chunk_samples - recording.raw_count
+            part = samples[:space]
+            recording.raw[recording.raw_count:recording.raw_count + len(part)] = part
+            recording.raw_count += len(part)
+            recording.raw_total += len(part)
+            samples = samples[len(part):]
+
+            if recording.raw_count == recording.raw_chunk_samples:
+                self._queue.put(('raw', recording.directory, recording.take_raw()))
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if now - self._last_flush >= self.FLUSH_INTERVAL:
+            self._last_flush = now
+            self.flush()
+
+    def flush(self):
+        """Entrega os blocos incompletos à thread de escrita"""
+        for recording in self._students.values():
+            if recording.rows:
+                self._queue.put(('metrics', recording.directory, recording.take_metrics()))
+            if recording.raw_count:
+                self._queue.put(('raw', recording.directory, recording.take_raw()))
+
+    def close(self):
+        """Grava o que falta e encerra a thread de escrita"""
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            kind, directory, chunk = item
+            try:
+                if kind == 'meta':
+                    self._write_meta(directory)
+                elif kind == 'metrics':
+                    timestamps, metrics = chunk
+                    _append(directory / 'timestamp.i8', timestamps)
+                    for column, name in enumerate(COLUMNS):
+                        _append(directory / f'{name}.f4', metrics[column])
+                elif kind == 'raw':
+                    samples, offsets, timestamps = chunk
+                    _append(directory / 'raw.i2', samples)
+                    _append(directory / 'raw_offset.i8', offsets)
+                    _append(directory / 'raw_timestamp.i8', timestamps)
+            except OSError as e:
+                logger.error(f"Erro ao gravar sessão em {directory}: {e}")
+
+    @staticmethod
+    def _write_meta(directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        meta_path = directory / 'meta.json'
+        if meta_path.exists():
+            return
+        meta_path.write_text(json.dumps({
+            'version': 2,
+            'columns': list(COLUMNS),
+            'metricDtype': METRIC_DTYPE.str,
+            'timestampDtype': TIMESTAMP_DTYPE.str,
+            'rawDtype': RAW_DTYPE.str,
+            'rawSampleRate': 512,
+        }, indent=2))
+
+
+def _length(path: Path, dtype: np.dtype) -> Optional[int]:
+    """Elementos em um arquivo de coluna (0 se não existe, None se a última escrita ficou pela metade)"""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return 0
+    if size % dtype.itemsize:
+        return None
+    return size // dtype.itemsize
+
+
+def _can_append(directory: Path) -> bool:
+    """Diretório novo/vazio, ou gravação deste formato com todas as colunas do mesmo tamanho"""
+    meta_path = directory / 'meta.json'
+    if not meta_path.exists():
+        return not directory.exists() or not any(directory.iterdir())
+
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return False
+    if meta.get('columns') != list(COLUMNS):
+        return False
+
+    rows = _length(directory / 'timestamp.i8', TIMESTAMP_DTYPE)
+    blocks = _length(directory / 'raw_offset.i8', TIMESTAMP_DTYPE)
+    return (
+        rows is not None
+        and all(_length(directory / f'{name}.f4', METRIC_DTYPE) == rows for name in COLUMNS)
+        and blocks is not None
+        and _length(directory / 'raw_timestamp.i8', TIMESTAMP_DTYPE) == blocks
+        and _length(directory / 'raw.i2', RAW_DTYPE) is not None
+    )
+
+
+def _append(path: Path, array: np.ndarray):
+    with open(path, 'ab') as f:
+        f.write(np.ascontiguousarray(array).tobytes())
+
+
+def _map(path: Path, dtype: np.dtype) -> np.ndarray:
+    if not path.exists() or path.stat().st_size == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class Recording:
+    """Gravação de um aluno aberta com memmap (nada é lido até ser fatiado)"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / 'meta.json').read_text())
+        self.columns = tuple(meta['columns'])
+        self.sample_rate = meta['rawSampleRate']
+
+        rows = _map(self.directory / 'timestamp.i8', np.dtype(meta['timestampDtype']))
+        self.timestamps = rows
+        self._metrics = {
+            name: _map(self.directory / f'{name}.f4', np.dtype(meta['metricDtype']))[:len(rows)]
+            for name in self.columns
+        }
+
+        self.raw_samples = _map(self.directory / 'raw.i2', np.dtype(meta['rawDtype']))
+        self.raw_offsets = _map(self.directory / 'raw_offset.i8', np.dtype(meta['timestampDtype']))
+        self.raw_timestamps = _map(self.directory / 'raw_timestamp.i8', np.dtype(meta['timestampDtype']))
+
+    def metrics(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Colunas de métricas (views) com timestamp em [start_ms, end_ms)"""
+        lo, hi = _time_range(self.timestamps, start_ms, end_ms)
+        columns = {name: values[lo:hi] for name, values in self._metrics.items()}
+        columns['timestamp'] = self.timestamps[lo:hi]
+        return columns
+
+    def raw(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Amostras brutas (view) dos blocos que chegaram em [start_ms, end_ms)
+        e o offset global da primeira amostra retornada
+
+        A resolução é a de um bloco do índice (~128 amostras, 0.25 s).
+        """
+        lo, hi = _time_range(self.raw_timestamps, start_ms, end_ms)
+        if lo >= hi:
+            return self.raw_samples[:0], 0
+
+        first = int(self.raw_offsets[lo])
+        last = int(self.raw_offsets[hi]) if hi < len(self.raw_offsets) else len(self.raw_samples)
+        return self.raw_samples[first:last], first
+
+
+def _time_range(timestamps: np.ndarray, start_ms: Optional[int], end_ms: Optional[int]) -> Tuple[int, int]:
+    lo = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+    hi = len(timestamps) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='left'))
+    return lo, hi
+
+
+def load_recording(session_dir: str, student_id: str) -> Recording:
+    """Abre a gravação de um aluno em <session_dir>/<studentId>"""
+    return Recording(str(Path(session_dir) / str(student_id)))
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Simulador ThinkGear - NeuroOne
+Dispositivos EEG sintéticos e replay de capturas para testes de carga
+
+Os dispositivos virtuais têm a mesma interface de serial.Serial usada pelo
+SerialReader (read, in_waiting, close, is_open), então entram no EEGBridge
+como uma porta qualquer:
+
+    sim://?seed=1&noise=0.1&bad_checksum=0.01&sync_loss=0.01&speed=1
+    replay://capturas/aula.bin?speed=0&loop=1
+
+- sim://    gera pacotes determinísticos (mesma seed = mesmos bytes): raw wave
+            a 512 Hz (raw=0 desliga), eSense + EEG_POWER (0x83) a 1 Hz, com
+            bytes de lixo, checksums inválidos e perda de sincronismo injetados.
+- replay:// relê uma captura binária do stream ThinkGear. Com speed=1 segue o
+            relógio dos pacotes (1/512 s por amostra bruta); speed=0 entrega
+            tudo o mais rápido possível.
+
+Uso:
+    # Gerar uma captura sintética de 60 s
+    python simulator.py generate --seconds 60 --noise 0.1 --out aula.bin
+
+    # 100 alunos virtuais contra o backend local
+    python simulator.py load --students 100 --session-id uuid-da-sessao --seconds 60
+"""
+
+import abc
+import argparse
+import math
+import random
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+SAMPLE_RATE = 512
+
+VIRTUAL_SCHEMES = ('sim://', 'replay://')
+
+
+def is_virtual_port(port: str) -> bool:
+    return port.startswith(VIRTUAL_SCHEMES)
+
+
+def make_packet(payload: bytes) -> bytes:
+    """Monta um pacote ThinkGear com checksum"""
+    return b'\xAA\xAA' + bytes([len(payload)]) + payload + bytes([~sum(payload) & 0xFF])
+
+
+class ThinkGearGenerator:
+    """
+    Gera um stream ThinkGear sintético e determinístico
+
+    A atenção e o relaxamento variam lentamente (senoides com fase definida
+    pela seed); o sinal bruto é alpha (10 Hz) modulado pelo relaxamento +
+    beta (20 Hz) modulado pela atenção + ruído.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        raw: bool = True,
+        noise: float = 0.0,
+        bad_checksum: float = 0.0,
+        sync_loss: float = 0.0
+    ):
+        self.random = random.Random(seed)
+        self.raw = raw
+        self.noise = noise
+        self.bad_checksum = bad_checksum
+        self.sync_loss = sync_loss
+        self.sample = 0  # Próxima amostra (tempo = sample / 512)
+        self._attention, self._relaxation = 0, 0
+
+        self._phase = self.random.uniform(0, 2 * math.pi)
+        self._alpha = [math.sin(2 * math.pi * 10 * i / SAMPLE_RATE) for i in range(SAMPLE_RATE)]
+        self._beta = [math.sin(2 * math.pi * 20 * i / SAMPLE_RATE) for i in range(SAMPLE_RATE)]
+
+    def _levels(self, seconds: float):
+        attention = 50 + 40 * math.sin(2 * math.pi * seconds / 60 + self._phase)
+        relaxation = 50 + 40 * math.cos(2 * math.pi * seconds / 45 + self._phase)
+        return int(attention), int(relaxation)
+
+    def _emit(self, out: bytearray, payload: bytes):
+        rnd = self.random
+        if self.noise and rnd.random() < self.noise:
+            out += bytes(rnd.randrange(256) for _ in range(rnd.randint(1, 8)))
+
+        packet = bytearray(make_packet(payload))
+        if self.bad_checksum and rnd.random() < self.bad_checksum:
+            packet[-1] ^= 0xFF
+        if self.sync_loss and rnd.random() < self.sync_loss:
+            del packet[rnd.randrange(len(packet)):]
+        out += packet
+
+    def esense_payload(self, seconds: float) -> bytes:
+        attention, relaxation = self._levels(seconds)
+        quality = 0 if self.random.random() > 0.05 else self.random.randint(25, 200)
+        powers = b''.join(
+            self.random.randint(1000, 1_000_000).to_bytes(3, 'big') for _ in range(8)
+        )
+        return bytes([0x02, quality, 0x04, attention, 0x05, relaxation, 0x83, 24]) + powers
+
+    def generate(self, samples: int) -> bytes:
+        """Gera o stream correspondente às próximas `samples` amostras (1/512 s cada)"""
+        out = bytearray()
+        rnd = self.random
+
+        for sample in range(self.sample, self.sample + samples):
+            index = sample % SAMPLE_RATE
+            if index == 0:
+                self._emit(out, self.esense_payload(sample / SAMPLE_RATE))
+                self._attention, self._relaxation = self._levels(sample / SAMPLE_RATE)
+
+            if self.raw:
+                value = int(
+                    self._relaxation * 8 * self._alpha[index]
+                    + self._attention * 4 * self._beta[index]
+                    + rnd.gauss(0, 60)
+                )
+                self._emit(out, bytes([0x80, 2]) + (value & 0xFFFF).to_bytes(2, 'big'))
+
+        self.sample += samples
+        return bytes(out)
+
+
+class VirtualSerial(abc.ABC):
+    """
+    Base dos dispositivos virtuais: interface de serial.Serial com read()
+    bloqueante até `size` bytes ou `timeout` segundos
+    """
+
+    # Granularidade da geração/entrega (amostras), ~31 ms
+    CHUNK_SAMPLES = 16
+
+    def __init__(self, port: str, speed: float = 1.0, timeout: Optional[float] = None):
+        self.port = port
+        self.speed = speed
+        self.timeout = timeout
+        self.is_open = True
+        self.bytes_read = 0
+
+        self._buffer = bytearray()
+        self._pending = None  # Trecho gerado que ainda não estava na hora de entregar
+        self._start = time.monotonic()
+        self._elapsed = 0.0  # Tempo de stream já entregue (s)
+        self._closed = threading.Event()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._buffer)
+
+    @abc.abstractmethod
+    def _next_chunk(self):
+        """Retorna (bytes, duração em segundos) do próximo trecho, ou None no fim"""
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while len(self._buffer) < size and self.is_open:
+            chunk, self._pending = self._pending or self._next_chunk(), None
+            if chunk is None:
+                break
+
+            data, duration = chunk
+            if self.speed > 0:
+                due = self._start + self._elapsed / self.speed
+                wait = due - time.monotonic()
+                if deadline is not None and due > deadline:
+                    # Não cabe no timeout: devolver o trecho e esperar só até o deadline
+                    self._pending = chunk
+                    self._closed.wait(max(0.0, deadline - time.monotonic()))
+                    break
+                if wait > 0 and self._closed.wait(wait):
+                    break
+
+            self._elapsed += duration
+            self._buffer += data
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self.is_open = False
+        self._closed.set()
+
+
+class SimulatedSerial(VirtualSerial):
+    """Dispositivo sintético (sim://)"""
+
+    def __init__(self, port: str, generator: ThinkGearGenerator, **kwargs):
+        super().__init__(port, **kwargs)
+        self.generator = generator
+
+    def _next_chunk(self):
+        return self.generator.generate(self.CHUNK_SAMPLES), self.CHUNK_SAMPLES / SAMPLE_RATE
+
+
+class ReplaySerial(VirtualSerial):
+    """Replay de uma captura binária do stream ThinkGear (replay://)"""
+
+    def __init__(self, port: str, path: str, loop: bool = False, **kwargs):
+        super().__init__(port, **kwargs)
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.loop = loop
+        self._offset = 0
+
+        # Sem raw wave na captura, cada pacote vale 1 s (eSense a 1 Hz)
+        self._packet_seconds = 1 / SAMPLE_RATE if b'\xAA\xAA\x04\x80\x02' in self.data else 1.0
+
+    def _next_chunk(self):
+        if self._offset >= len(self.data):
+            if not self.loop or not self.data:
+                return None
+            self._offset = 0
+
+        # Avançar CHUNK_SAMPLES pacotes (procurando SYNC) e medir a duração
+        start = self._offset
+        position = start
+        packets = 0
+        while packets < self.CHUNK_SAMPLES:
+            sync = self.data.find(b'\xAA\xAA', position + 1)
+            if sync < 0:
+                position = len(self.data)
+                break
+            position = sync
+            packets += 1
+
+        self._offset = position
+        return self.data[start:position], max(packets, 1) * self._packet_seconds
+
+
+def open_virtual_port(port: str, timeout: Optional[float] = None) -> VirtualSerial:
+    """Abre um dispositivo virtual a partir de sim://... ou replay://..."""
+    scheme, rest = port.split('://', 1)
+    target, _, query = rest.partition('?')
+    params: Dict[str, str] = {key: values[-1] for key, values in parse_qs(query).items()}
+    speed = float(params.get('speed', 1.0))
+
+    if scheme == 'sim':
+        generator = ThinkGearGenerator(
+            seed=int(params.get('seed', 0)),
+            raw=params.get('raw', '1') != '0',
+            noise=float(params.get('noise', 0.0)),
+            bad_checksum=float(params.get('bad_checksum', 0.0)),
+            sync_loss=float(params.get('sync_loss', 0.0)),
+        )
+        return SimulatedSerial(port, generator, speed=speed, timeout=timeout)
+
+    if scheme == 'replay':
+        return ReplaySerial(port, target, loop=params.get('loop') == '1', speed=speed, timeout=timeout)
+
+    raise ValueError(f"Porta virtual desconhecida: {port}")
+
+
+def generate_capture(path: str, seconds: float, **generator_args):
+    """Grava uma captura sintética para usar com replay://"""
+    generator = ThinkGearGenerator(**generator_args)
+    remaining = round(seconds * SAMPLE_RATE)
+    with open(path, 'wb') as f:
+        while remaining > 0:
+            samples = min(remaining, SAMPLE_RATE)
+            f.write(generator.generate(samples))
+            remaining -= samples
+
+
+def run_load_test(args):
+    """Roda um EEGBridge com N alunos virtuais e relata a vazão"""
+    import asyncio
+    from eeg_bridge import EEGBridge
+
+    devices = {
+        f"sim://?seed={index}&noise={args.noise}&bad_checksum={args.bad_checksum}"
+        f"&sync_loss={args.sync_loss}&speed={args.speed}": f"sim-student-{index:03d}"
+        for index in range(args.students)
+    }
+
+    bridge = EEGBridge(
+        backend_url=args.backend,
+        session_id=args.session_id,
+        devices=devices,
+        max_send_rate=args.max_send_rate,
+        batch=args.batch,
+        band_power_hz=args.band_power_hz,
+    )
+
+    async def run():
+        task = asyncio.create_task(bridge.run())
+        await asyncio.sleep(args.seconds)
+        totals = {
+            'bytes': sum(d.serial_conn.bytes_read for d in bridge.devices.values() if d.serial_conn),
+            'samples': sum(d.parser.raw_wave.total for d in bridge.devices.values()),
+        }
+        bridge.running = False
+        await task
+        return totals
+
+    started = time.monotonic()
+    totals = asyncio.run(run())
+    elapsed = time.monotonic() - started
+    stats = bridge.scheduler.stats
+
+    print()
+    print(f"Alunos virtuais:   {args.students}")
+    print(f"Duração:           {elapsed:.1f} s")
+    print(f"Bytes lidos:       {totals['bytes'] / elapsed / 1024:.1f} KB/s")
+    print(f"Amostras brutas:   {totals['samples'] / elapsed:.0f} /s")
+    print(f"Frames:            {stats['frames'] / elapsed:.1f} /s")
+    print(f"Mensagens:         {stats['messages'] / elapsed:.1f} /s")
+    print(f"Mesclados:         {stats['merged']}  Descartados: {stats['dropped']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulador ThinkGear - NeuroOne')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_stream_args(command):
+        command.add_argument('--noise', type=float, default=0.0, help='Probabilidade de lixo antes de cada pacote')
+        command.add_argument('--bad-checksum', type=float, default=0.0, help='Probabilidade de checksum inválido')
+        command.add_argument('--sync-loss', type=float, default=0.0, help='Probabilidade de pacote truncado')
+
+    generate = commands.add_parser('generate', help='Gravar uma captura sintética')
+    generate.add_argument('--out', required=True, help='Arquivo de saída')
+    generate.add_argument('--seconds', type=float, default=60)
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--no-raw', action='store_true', help='Somente eSense/EEG_POWER, sem raw wave')
+    add_stream_args(generate)
+
+    load = commands.add_parser('load', help='Teste de carga com alunos virtuais')
+    load.add_argument('--students', type=int, default=30)
+    load.add_argument('--seconds', type=float, default=30)
+    load.add_argument('--speed', type=float, default=1.0, help='1 = tempo real, 0 = o mais rápido possível')
+    load.add_argument('--backend', default='ws://localhost:3001')
+    load.add_argument('--session-id', required=True)
+    load.add_argument('--max-send-rate', type=float, default=4.0)
+    load.add_argument('--batch', action='store_true')
+    load.add_argument('--band-power-hz', type=float, default=0.0)
+    add_stream_args(load)
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate_capture(
+            args.out,
+            args.seconds,
+            seed=args.seed,
+            raw=not args.no_raw,
+            noise=args.noise,
+            bad_checksum=args.bad_checksum,
+            sync_loss=args.sync_loss,
+        )
+        print(f"Captura gravada em {args.out}")
+    else:
+        run_load_test(args)
+
+
+if __name__ == '__main__':
+    main()
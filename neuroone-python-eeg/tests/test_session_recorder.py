@@ -0,0 +1,64 @@
+"""
+Testes - session_recorder.py
+Gravação, reabertura e continuação de uma sessão no mesmo diretório
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eeg_bridge import RawWaveBuffer  # noqa: E402
+from session_recorder import SessionRecorder, load_recording  # noqa: E402
+
+
+def record_run(directory, start_ms, rows, first_sample):
+    """Uma execução do bridge: `rows` linhas de métricas e 64 amostras brutas por linha"""
+    recorder = SessionRecorder(str(directory), 'sessao-1')
+    raw_wave = RawWaveBuffer()
+    sample = first_sample
+    for row in range(rows):
+        timestamp = start_ms + row * 125
+        recorder.record('aluno-1', timestamp, {'attention': row, 'relaxation': 50})
+        raw_wave.extend(list(range(sample, sample + 64)))
+        sample += 64
+        recorder.record_raw('aluno-1', timestamp, raw_wave)
+    recorder.close()
+    return sample
+
+
+def test_reabrir_continua_a_gravacao(tmp_path):
+    end = record_run(tmp_path, 1_000_000, rows=10, first_sample=0)
+    record_run(tmp_path, 2_000_000, rows=6, first_sample=end)
+
+    recording = load_recording(str(tmp_path / 'sessao-1'), 'aluno-1')
+
+    metrics = recording.metrics()
+    assert len(metrics['timestamp']) == 16
+    assert list(metrics['attention']) == list(range(10)) + list(range(6))
+
+    # Os offsets da segunda execução continuam do fim de raw.i2
+    assert list(recording.raw_offsets) == sorted(set(recording.raw_offsets))
+    assert np.array_equal(recording.raw_samples, np.arange(16 * 64))
+
+    samples, first = recording.raw(2_000_000)
+    assert first == 10 * 64
+    assert np.array_equal(samples, np.arange(10 * 64, 16 * 64))
+
+
+def test_gravacao_inconsistente_vai_para_outro_diretorio(tmp_path):
+    record_run(tmp_path, 1_000_000, rows=10, first_sample=0)
+
+    # Coluna com uma linha a menos (ex.: escrita interrompida)
+    student_dir = tmp_path / 'sessao-1' / 'aluno-1'
+    attention = student_dir / 'attention.f4'
+    attention.write_bytes(attention.read_bytes()[:-4])
+
+    record_run(tmp_path, 2_000_000, rows=6, first_sample=0)
+
+    assert len(load_recording(str(tmp_path / 'sessao-1'), 'aluno-1').timestamps) == 10
+    retry = load_recording(str(tmp_path / 'sessao-1'), 'aluno-1.1')
+    assert len(retry.timestamps) == 6
+    assert retry.raw_offsets[0] == 0
@@ -0,0 +1,142 @@
+"""
+Wire Format - NeuroOne
+Codificação binária compacta dos frames EEG enviados pelo bridge
+
+Negociada no student:join: o bridge anuncia `encodings: ['binary-v1']` e, se
+o backend responder student:joined com `encoding: 'binary-v1'` e um
+`streamId` numérico, os frames daquele aluno passam a ser enviados como
+mensagens binárias. Sem essa resposta o bridge continua usando JSON.
+
+Frame (big-endian, 36 bytes):
+
+    magic     uint8    0xE1
+    type      uint8    1 = frame, 2 = batch
+    streamId  uint16   atribuído pelo backend no join
+    timestamp uint64   epoch em milissegundos
+    attention uint8
+    relax.    uint8
+    quality   uint8    signalQuality
+    flags     uint8    bit 0: bandas calculadas no bridge (extensão)
+                       bits 1-4: artefatos (poorSignal, blink, saturation, amplitude)
+    bandas    5 x uint32 (delta, theta, alpha, beta, gamma) do 0x83
+
+Extensão (flag bit 0, 37 bytes): campo `bandPower` com delta..gamma em µV²,
+relativeAlpha, relativeBeta, thetaBetaRatio, alphaThetaRatio (float32) e
+attentionIndex (uint8).
+
+Batch: magic, type=2, count (uint16) e em seguida `count` frames.
+"""
+
+import struct
+from typing import Dict, Any, List
+
+WIRE_ENCODING = 'binary-v1'
+
+MAGIC = 0xE1
+TYPE_FRAME = 1
+TYPE_BATCH = 2
+
+FLAG_BAND_POWER = 0x01
+
+# Motivos do ArtifactFilter nos bits 1-4 de flags, na ordem em que ele os marca
+ARTIFACT_FLAGS = (
+    ('poorSignal', 0x02),
+    ('blink', 0x04),
+    ('saturation', 0x08),
+    ('amplitude', 0x10),
+)
+_ARTIFACT_BITS = dict(ARTIFACT_FLAGS)
+
+BANDS = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+BAND_EXTENSION = BANDS + ('relativeAlpha', 'relativeBeta', 'thetaBetaRatio', 'alphaThetaRatio')
+
+_FRAME = struct.Struct('>BBHQBBBB5I')
+_EXTENSION = struct.Struct('>9fB')
+_BATCH_HEADER = struct.Struct('>BBH')
+
+# Posição do byte de flags dentro do frame
+_FLAGS_OFFSET = 15
+
+UINT32_MAX = 0xFFFFFFFF
+
+
+def _uint8(value) -> int:
+    return min(max(int(value), 0), 0xFF)
+
+
+def encode_frame(stream_id: int, timestamp_ms: int, data: Dict[str, Any]) -> bytes:
+    """Codifica um frame já formatado (ver EEGBridge.format_eeg_data)"""
+    header = (
+        MAGIC, TYPE_FRAME, stream_id, timestamp_ms,
+        _uint8(data['attention']), _uint8(data['relaxation']), _uint8(data['signalQuality']),
+    )
+
+    flags = 0
+    if 'artifacts' in data:
+        for reason in data['artifacts']:
+            flags |= _ARTIFACT_BITS.get(reason, 0)
+
+    band_power = data.get('bandPower')
+    if band_power:
+        flags |= FLAG_BAND_POWER
+
+    frame = _FRAME.pack(*header, flags, *(min(int(data[band]), UINT32_MAX) for band in BANDS))
+    if band_power:
+        frame += _EXTENSION.pack(
+            *(band_power[key] for key in BAND_EXTENSION), _uint8(band_power['attentionIndex'])
+        )
+    return frame
+
+
+def encode_batch(frames: List[bytes]) -> bytes:
+    """Junta frames codificados em uma única mensagem"""
+    return _BATCH_HEADER.pack(MAGIC, TYPE_BATCH, len(frames)) + b''.join(frames)
+
+
+def decode(message: bytes) -> List[Dict[str, Any]]:
+    """Decodifica uma mensagem binária (frame ou batch) em dicionários"""
+    if len(message) < 2 or message[0] != MAGIC:
+        raise ValueError("Mensagem binária inválida")
+
+    if message[1] == TYPE_FRAME:
+        frame, _ = _decode_frame(message, 0)
+        return [frame]
+
+    if message[1] == TYPE_BATCH:
+        _, _, count = _BATCH_HEADER.unpack_from(message, 0)
+        offset = _BATCH_HEADER.size
+        frames = []
+        for _ in range(count):
+            frame, offset = _decode_frame(message, offset)
+            frames.append(frame)
+        return frames
+
+    raise ValueError(f"Tipo de mensagem desconhecido: {message[1]}")
+
+
+def _decode_frame(message: bytes, offset: int):
+    flags = message[offset + _FLAGS_OFFSET]
+    values = _FRAME.unpack_from(message, offset)
+    offset += _FRAME.size
+
+    frame = {
+        'streamId': values[2],
+        'timestamp': values[3],
+        'attention': values[4],
+        'relaxation': values[5],
+        'signalQuality': values[6],
+    }
+    frame.update(zip(BANDS, values[8:]))
+
+    if flags & FLAG_BAND_POWER:
+        extension = _EXTENSION.unpack_from(message, offset)
+        offset += _EXTENSION.size
+        band_power = dict(zip(BAND_EXTENSION, extension))
+        band_power['attentionIndex'] = extension[-1]
+        frame['bandPower'] = band_power
+
+    artifacts = [reason for reason, bit in ARTIFACT_FLAGS if flags & bit]
+    if artifacts:
+        frame['artifacts'] = artifacts
+
+    return frame, offset